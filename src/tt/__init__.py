@@ -1,29 +1,35 @@
-from .bank_salad_expense_transaction import (
-    BankSaladExpenseTransaction, BankSaladExpenseTransactionImporter)
-from .db_connection import DBConnection
-from .db_impl_base import DBImplBase
-from .expense_transaction import (ExpenseTransaction,
-                                  ExpenseTransactionControl,
-                                  ExpenseTransactionDBImpl)
-from .malformed_date_error import MalformedDateError
-from .simple_portfolio import SimplePortfolio
-from .simple_transaction import SimpleTransaction
-from .simple_transaction_db_impl import SimpleTransactionDBImpl
-from .yahoo_finance_web_exporter import YahooFinanceWebExporter
+import importlib
 
-__all__ = (
-    "BankSaladExpenseTransaction",
-    "BankSaladExpenseTransactionImporter",
-    "DBConnection",
-    "DBImplBase",
-    "ExpenseTransaction",
-    "ExpenseTransactionControl",
-    "ExpenseTransactionDBImpl",
-    "MalformedDateError",
-    "SimplePortfolio",
-    "SimpleTransaction",
-    "SimpleTransactionDBImpl",
-    "YahooFinanceWebExporter",
-)
+# A public name => A module which defines it
+# Modules are imported on the first access. So, `import tt` does not load pandas, SQLAlchemy or Selenium.
+LAZY_EXPORT_TABLE = {
+    "BankSaladExpenseTransaction": "tt.bank_salad_expense_transaction",
+    "BankSaladExpenseTransactionImporter": "tt.bank_salad_expense_transaction",
+    "DBConnection": "tt.db_connection",
+    "DBImplBase": "tt.db_impl_base",
+    "ExpenseTransaction": "tt.expense_transaction",
+    "ExpenseTransactionControl": "tt.expense_transaction",
+    "ExpenseTransactionDBImpl": "tt.expense_transaction",
+    "MalformedDateError": "tt.malformed_date_error",
+    "SimplePortfolio": "tt.simple_portfolio",
+    "SimpleTransaction": "tt.simple_transaction",
+    "SimpleTransactionDBImpl": "tt.simple_transaction_db_impl",
+    "YahooFinanceWebExporter": "tt.yahoo_finance_web_exporter",
+}
+
+__all__ = tuple(LAZY_EXPORT_TABLE.keys())
 
 __version__ = "0.1.0"
+
+
+def __getattr__(name: str):
+    module_name = LAZY_EXPORT_TABLE.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(__all__))
@@ -1,5 +1,7 @@
+import concurrent.futures
+import itertools
 import pprint
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
 from loguru import logger
 
@@ -11,6 +13,7 @@ from tt.meritz_text_importer import MeritzTextImporter
 from tt.shinhan_text_importer import ShinhanTextImporter
 from tt.simple_transaction import SimpleTransaction
 from tt.symbol_config import SymbolConfig
+from tt.transaction_batch import TransactionBatch
 
 
 class AutomatedTextImporterFactory:
@@ -34,39 +37,215 @@ class AutomatedTextImporterControl:
         self.input_data_dir_path = Constants.input_data_dir_path
         self.output_data_dir_path = Constants.output_data_dir_path
         self.module_config = None
+        self.flag_columnar = False
 
     def load_module_config(self) -> None:
         self.module_config = AutomatedTextImporterHelper.load_module_config()
 
-    def import_all_transactions(self, symbol_config: SymbolConfig) -> Tuple[bool, List[SimpleTransaction]]:
+    def import_all_transactions(
+        self, symbol_config: SymbolConfig, jobs: int = 1, flag_use_cache: bool = False, flag_columnar: bool = False, flag_refresh_cache: bool = False
+    ) -> Tuple[bool, List[SimpleTransaction]]:
+        """Import all transactions.
+
+        Args:
+            symbol_config: The symbol configuration.
+            jobs: The number of worker processes. If it is greater than 1, each file is parsed in a worker process.
+                  The result is the same as the one of a serial run.
+            flag_use_cache: If it is True, parsed results of unchanged files are loaded from the cache.
+            flag_columnar: If it is True, each stream is parsed with column operations. The result is the same as the one of the row-wise parser.
+            flag_refresh_cache: If it is True with |flag_use_cache|, the cache is cleared. Then, all files are parsed and cached again.
+        """
+        self.flag_columnar = flag_columnar
+        if flag_use_cache:
+            return self._import_transactions_from_local_file_system_with_cache(symbol_config, jobs, flag_refresh_cache)
+        if jobs > 1:
+            return self._import_transactions_from_local_file_system_in_parallel(symbol_config, jobs)
         return self._import_transactions_from_local_file_system(symbol_config)
 
+    def import_all_transaction_batch(self, symbol_config: SymbolConfig) -> Tuple[bool, TransactionBatch]:
+        """Import all transactions as a |TransactionBatch|. The result is the same as the one of |import_all_transactions|."""
+        list_of_batches = []
+        for securities_firm_id in self.module_config.get("securities_firm_id", []):
+            importer = AutomatedTextImporterFactory.create_importer(securities_firm_id)
+            if importer is None:
+                logger.warning(f"Failed to create importer for id: {securities_firm_id}")
+                continue
+
+            (result, file_meta_by_account) = importer.find_local_files_by_account()
+            if result and file_meta_by_account:
+                (result, batch) = importer.import_transaction_batch(file_meta_by_account, symbol_config)
+                if result:
+                    logger.info(f"Successfully imported transactions for {securities_firm_id}")
+                    list_of_batches.append(batch)
+                else:
+                    logger.error(f"Failed to import transactions for {securities_firm_id}")
+
+        merged = TransactionBatch.concatenate(list_of_batches).sort_by_date_and_type_rank()
+        logger.info(f"Total imported transactions: {len(merged)}")
+        return (True, merged)
+
+    def iter_all_transactions(self, symbol_config: SymbolConfig) -> Iterator[SimpleTransaction]:
+        """Stream all transactions from local file system, merged by date.
+
+        Transactions are parsed lazily while the returned iterator is consumed.
+        """
+        list_of_sources = []
+        for securities_firm_id in self.module_config.get("securities_firm_id", []):
+            importer = AutomatedTextImporterFactory.create_importer(securities_firm_id)
+            if importer is None:
+                logger.warning(f"Failed to create importer for id: {securities_firm_id}")
+                continue
+
+            (result, file_meta_by_account) = importer.find_local_files_by_account()
+            if result and file_meta_by_account:
+                list_of_sources.append(importer.iter_transactions(file_meta_by_account, symbol_config))
+        return AutomatedTextImporterHelper.iter_merged_simple_transactions(*list_of_sources)
+
     def _import_transactions_from_local_file_system(self, symbol_config: SymbolConfig) -> Tuple[bool, List[SimpleTransaction]]:
         """Import transaction from local file system.
 
         Returns:
             bool: True if import is successful, False otherwise.
         """
-        merged = []
-        index = 0
+        list_of_sources = []
         for securities_firm_id in self.module_config.get("securities_firm_id", []):
             importer = AutomatedTextImporterFactory.create_importer(securities_firm_id)
             if importer is None:
                 logger.warning(f"Failed to create importer for id: {securities_firm_id}")
                 continue
 
-            (result, concatenated_file_meta) = importer.concat_and_cleanup_local_files_if_needed()
-            if result and concatenated_file_meta:
-                (result, list_of_simple_transactions) = importer.import_transactions(concatenated_file_meta, symbol_config)
+            importer.flag_columnar = self.flag_columnar
+            (result, file_meta_by_account) = importer.find_local_files_by_account()
+            if result and file_meta_by_account:
+                (result, list_of_simple_transactions) = importer.import_transactions(file_meta_by_account, symbol_config)
                 if result:
                     logger.info(f"Successfully imported transactions for {securities_firm_id}")
-                    if index == 0:
-                        merged = list_of_simple_transactions.copy()
-                    else:
-                        merged = AutomatedTextImporterHelper.merge_simple_transactions(merged, list_of_simple_transactions)
-                    logger.info(f"Total imported transactions so far: {len(merged)}")
+                    list_of_sources.append(list_of_simple_transactions)
                 else:
                     logger.error(f"Failed to import transactions for {securities_firm_id}")
 
-            index += 1
+        merged = AutomatedTextImporterHelper.merge_simple_transactions(*list_of_sources)
+        logger.info(f"Total imported transactions: {len(merged)}")
+        return (True, merged)
+
+    def _import_transactions_from_local_file_system_in_parallel(self, symbol_config: SymbolConfig, jobs: int) -> Tuple[bool, List[SimpleTransaction]]:
+        """Import transaction from local file system. Files of each (securities firm, account) are parsed in a worker process.
+
+        Results are collected in the order of tasks, not in the order of completion. Then, they are merged at once.
+        Because the merge is stable, the order of transactions is identical to the one of a serial run.
+
+        Returns:
+            bool: True if import is successful, False otherwise.
+        """
+        list_of_tasks = []  # list[tuple[securities_firm_id, list_of_transaction_filepaths, account]]
+        for securities_firm_id in self.module_config.get("securities_firm_id", []):
+            importer = AutomatedTextImporterFactory.create_importer(securities_firm_id)
+            if importer is None:
+                logger.warning(f"Failed to create importer for id: {securities_firm_id}")
+                continue
+
+            (result, file_meta_by_account) = importer.find_local_files_by_account()
+            if result and file_meta_by_account:
+                for (list_of_transaction_filepaths, account) in file_meta_by_account:
+                    list_of_tasks.append((securities_firm_id, list_of_transaction_filepaths, account))
+
+        list_of_results = self._run_tasks(list_of_tasks, symbol_config, jobs)
+        return self._merge_results(list_of_tasks, list_of_results)
+
+    def _import_transactions_from_local_file_system_with_cache(
+        self, symbol_config: SymbolConfig, jobs: int, flag_refresh_cache: bool = False
+    ) -> Tuple[bool, List[SimpleTransaction]]:
+        """Import transaction from local file system. Each `year-YYYY-<account>.csv` file is a task.
+
+        Parsed results of unchanged files are loaded from the cache. Only new or changed files are parsed.
+        If |flag_refresh_cache| is True, all files are parsed. Their results replace the cache.
+
+        Returns:
+            bool: True if import is successful, False otherwise.
+        """
+        from tt.constants import Constants
+        from tt.automated_text_importer_cache import AutomatedTextImporterCache
+
+        list_of_tasks = []  # list[tuple[securities_firm_id, list_of_transaction_filepaths, account]]
+        layouts_by_securities_firm_id = {}
+        for securities_firm_id in self.module_config.get("securities_firm_id", []):
+            importer = AutomatedTextImporterFactory.create_importer(securities_firm_id)
+            if importer is None:
+                logger.warning(f"Failed to create importer for id: {securities_firm_id}")
+                continue
+
+            layouts_by_securities_firm_id[securities_firm_id] = importer.list_of_layouts or []
+            (result, file_meta) = importer.find_local_files()
+            if result and file_meta:
+                for (transaction_filepath, account) in file_meta:
+                    list_of_tasks.append((securities_firm_id, [transaction_filepath], account))
+
+        cache = AutomatedTextImporterCache(Constants.cache_dir_path)
+        cache.open(symbol_config, AutomatedTextImporterCache.get_parser_fingerprint(layouts_by_securities_firm_id))
+        if flag_refresh_cache:
+            cache.clear()
+
+        list_of_results = [None] * len(list_of_tasks)
+        list_of_indexes_of_missed_task = []
+        for (index, (securities_firm_id, [transaction_filepath], account)) in enumerate(list_of_tasks):
+            list_of_simple_transactions = cache.load(securities_firm_id, transaction_filepath, account)
+            if list_of_simple_transactions is None:
+                list_of_indexes_of_missed_task.append(index)
+            else:
+                list_of_results[index] = (True, list_of_simple_transactions)
+
+        list_of_missed_tasks = [list_of_tasks[index] for index in list_of_indexes_of_missed_task]
+        list_of_results_of_missed_tasks = self._run_tasks(list_of_missed_tasks, symbol_config, jobs)
+        for (index, task, (result, list_of_simple_transactions)) in zip(list_of_indexes_of_missed_task, list_of_missed_tasks, list_of_results_of_missed_tasks):
+            list_of_results[index] = (result, list_of_simple_transactions)
+            if result:
+                (securities_firm_id, [transaction_filepath], account) = task
+                cache.store(securities_firm_id, transaction_filepath, account, list_of_simple_transactions)
+        cache.save()
+
+        return self._merge_results(list_of_tasks, list_of_results)
+
+    def _run_tasks(self, list_of_tasks: list[tuple[str, list[str], str]], symbol_config: SymbolConfig, jobs: int) -> list[Tuple[bool, List[SimpleTransaction]]]:
+        """Parse files. Results are in the order of tasks, not in the order of completion."""
+        if jobs <= 1 or len(list_of_tasks) <= 1:
+            return [import_transactions_from_files_in_worker(task, symbol_config, self.flag_columnar) for task in list_of_tasks]
+        logger.info(f"Importing {len(list_of_tasks)} files with {jobs} worker processes...")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(
+                executor.map(
+                    import_transactions_from_files_in_worker,
+                    list_of_tasks,
+                    itertools.repeat(symbol_config),
+                    itertools.repeat(self.flag_columnar),
+                )
+            )
+
+    def _merge_results(self, list_of_tasks: list[tuple[str, list[str], str]], list_of_results: list[Tuple[bool, List[SimpleTransaction]]]) -> Tuple[bool, List[SimpleTransaction]]:
+        # As a serial run does, skip all files of a securities firm if any of them has failed.
+        set_of_failed_securities_firm_id = {
+            task[0] for (task, (result, _)) in zip(list_of_tasks, list_of_results) if not result
+        }
+        for securities_firm_id in sorted(set_of_failed_securities_firm_id):
+            logger.error(f"Failed to import transactions for {securities_firm_id}")
+        list_of_sources = [
+            list_of_simple_transactions
+            for (task, (_, list_of_simple_transactions)) in zip(list_of_tasks, list_of_results)
+            if task[0] not in set_of_failed_securities_firm_id
+        ]
+
+        merged = AutomatedTextImporterHelper.merge_simple_transactions(*list_of_sources)
+        logger.info(f"Total imported transactions: {len(merged)}")
         return (True, merged)
+
+
+def import_transactions_from_files_in_worker(task: tuple[str, list[str], str], symbol_config: SymbolConfig, flag_columnar: bool = False) -> Tuple[bool, List[SimpleTransaction]]:
+    """Parse files of an account in a worker process.
+
+    It is a module-level function so that it can be pickled.
+    """
+    (securities_firm_id, list_of_transaction_filepaths, account) = task
+    importer = AutomatedTextImporterFactory.create_importer(securities_firm_id)
+    if importer is None:
+        return (False, [])
+    importer.flag_columnar = flag_columnar
+    return importer.import_transactions_from_files(list_of_transaction_filepaths, account, symbol_config)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
 from tt.simple_transaction import SimpleTransaction
 from tt.symbol_config import SymbolConfig
@@ -11,9 +11,17 @@ class AutomatedTextImporterBase(ABC):
         pass
 
     @abstractmethod
-    def concat_and_cleanup_local_files_if_needed(self) -> tuple[bool, list[tuple[str, str]] | None]:
+    def find_local_files_by_account(self) -> tuple[bool, list[tuple[list[str], str]] | None]:
         pass
 
     @abstractmethod
-    def import_transactions(self, concatenated_file_meta: list[tuple[str, str]], symbol_config: SymbolConfig) -> Tuple[bool, List[SimpleTransaction]]:
+    def import_transactions(self, file_meta_by_account: list[tuple[list[str], str]], symbol_config: SymbolConfig) -> Tuple[bool, List[SimpleTransaction]]:
+        return (False, [])
+
+    @abstractmethod
+    def iter_transactions(self, file_meta_by_account: list[tuple[list[str], str]], symbol_config: SymbolConfig) -> Iterator[SimpleTransaction]:
+        return iter(())
+
+    @abstractmethod
+    def import_transactions_from_files(self, list_of_transaction_filepaths: list[str], account: str, symbol_config: SymbolConfig) -> Tuple[bool, List[SimpleTransaction]]:
         return (False, [])
@@ -1,71 +1,134 @@
+import io
+import itertools
 import os
 import re
-from abc import abstractmethod
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterable, Iterator, Tuple
 
 from loguru import logger
 
+import tt.automated_text_importer_layout
 from tt.automated_text_importer_base import AutomatedTextImporterBase
 from tt.automated_text_importer_helper import AutomatedTextImporterHelper
 from tt.simple_transaction import SimpleTransaction
 from tt.symbol_config import SymbolConfig
+from tt.transaction_batch import TransactionBatch
+
+YEAR_FILE_NAME_PATTERN = re.compile(r"year-(\d{4})-(.*)\.csv")
 
 
 class AutomatedTextImporterBaseImpl(AutomatedTextImporterBase):
 
     def __init__(self):
         self.securities_firm_id = None
+        self.list_of_layouts = None  # list[AutomatedTextImporterLayout]. The first one is the default.
+        self.flag_columnar = False  # If it is True, a whole stream is parsed with column operations. See |tt.automated_text_importer_columnar|.
 
-    def import_transactions(self, concatenated_file_meta: list[tuple[str, str]], symbol_config: SymbolConfig) -> Tuple[bool, list[SimpleTransaction]]:
+    def import_transactions(self, file_meta_by_account: list[tuple[list[str], str]], symbol_config: SymbolConfig) -> Tuple[bool, list[SimpleTransaction]]:
         """
         Subclasses may override this method.
         """
         logger.info("Importing transactions...")
         logger.info(f"{self.securities_firm_id}")
-        if not concatenated_file_meta or len(concatenated_file_meta) <= 0:
+        if not file_meta_by_account or len(file_meta_by_account) <= 0:
+            return (False, [])
+
+        list_of_sources = []
+        for meta in file_meta_by_account:
+            (list_of_transaction_filepaths, account) = meta
+            (result, imported_list) = self.import_transactions_from_files(list_of_transaction_filepaths, account, symbol_config)
+            if not result:
+                return (False, [])
+            list_of_sources.append(imported_list)
+
+        merged = AutomatedTextImporterHelper.merge_simple_transactions(*list_of_sources)
+        logger.info(f"Total imported transactions: {len(merged)}")
+        return (True, merged)
+
+    def import_transactions_from_file(self, transaction_filepath: str, account: str, symbol_config: SymbolConfig) -> Tuple[bool, list[SimpleTransaction]]:
+        """
+        Import transactions of an account from a single file.
+        The returned list is sorted by date.
+        """
+        return self.import_transactions_from_files([transaction_filepath], account, symbol_config)
+
+    def import_transactions_from_files(self, list_of_transaction_filepaths: list[str], account: str, symbol_config: SymbolConfig) -> Tuple[bool, list[SimpleTransaction]]:
+        """
+        Import transactions of an account from files, which are read as one logical stream.
+        The returned list is sorted by date.
+        """
+        try:
+            imported_list = self._get_list_of_simple_transactions_from_stream(
+                self._iter_cleaned_lines(AutomatedTextImporterHelper.iter_concatenated_lines(list_of_transaction_filepaths, self._get_encoding())),
+                account,
+                symbol_config,
+            )
+        except OSError as e:
+            logger.error(f"Failed to open transaction file: {list_of_transaction_filepaths}, error: {e}")
             return (False, [])
+        return (True, imported_list)
 
-        index = 0
-        merged = []
+    def import_transaction_batch(self, file_meta_by_account: list[tuple[list[str], str]], symbol_config: SymbolConfig) -> Tuple[bool, TransactionBatch]:
+        """
+        Import transactions as a |TransactionBatch|. The result is the same as the one of |import_transactions|.
+        With layouts, streams are parsed with the columnar parser. So, no |SimpleTransaction| object is built.
+        """
+        if not file_meta_by_account:
+            return (False, TransactionBatch.empty())
 
-        for meta in concatenated_file_meta:
-            (transaction_filepath, account) = meta
-            transaction_file = None
+        list_of_batches = []
+        for (list_of_transaction_filepaths, account) in file_meta_by_account:
             try:
-                transaction_file = open(transaction_filepath, newline="", encoding="euc-kr")
-                imported_list = self._get_list_of_simple_transactions_from_stream(
-                    transaction_file, account, symbol_config
+                batch = self._get_transaction_batch_from_stream(
+                    self._iter_cleaned_lines(AutomatedTextImporterHelper.iter_concatenated_lines(list_of_transaction_filepaths, self._get_encoding())),
+                    account,
+                    symbol_config,
                 )
             except OSError as e:
-                logger.error(f"Failed to open transaction file: {transaction_filepath}, error: {e}")
-                return (False, [])
-            finally:
-                if transaction_file is not None:
-                    transaction_file.close()
-            if index == 0:
-                merged = imported_list.copy()
-            else:
-                merged = AutomatedTextImporterHelper.merge_simple_transactions(merged, imported_list)
-            index += 1
+                logger.error(f"Failed to open transaction file: {list_of_transaction_filepaths}, error: {e}")
+                return (False, TransactionBatch.empty())
+            list_of_batches.append(batch)
 
+        # Concatenating date-sorted batches and sorting them stably is the same as merging them.
+        merged = TransactionBatch.concatenate(list_of_batches).sort_by_date_and_type_rank()
         logger.info(f"Total imported transactions: {len(merged)}")
         return (True, merged)
 
-    def concat_and_cleanup_local_files_if_needed(self) -> tuple[bool, list[tuple[str, str]] | None]:
+    def iter_transactions(self, file_meta_by_account: list[tuple[list[str], str]], symbol_config: SymbolConfig) -> Iterator[SimpleTransaction]:
         """
-        Concatenate local files if needed.
-        Do the cleansing on input data, if needed.
+        Stream transactions of all accounts, merged by date.
+        Files are opened lazily and read row by row. So, only a day of transactions per account is held in memory.
+
+        Raises:
+            OSError: If a transaction file cannot be opened.
         """
-        if self.securities_firm_id is None:
-            logger.error("securities_firm_id is not set.")
-            return (False, None)
-        concatenated_file_meta = self._concat_files_if_needed()
-        if concatenated_file_meta:
-            self._cleanup_files(concatenated_file_meta)
-            return (True, concatenated_file_meta)
-        else:
+        logger.info(f"Streaming transactions of {self.securities_firm_id}...")
+        list_of_sources = [
+            self._iter_simple_transactions_from_stream(
+                self._iter_cleaned_lines(AutomatedTextImporterHelper.iter_concatenated_lines(list_of_transaction_filepaths, self._get_encoding())),
+                account,
+                symbol_config,
+            )
+            for (list_of_transaction_filepaths, account) in file_meta_by_account or []
+        ]
+        return AutomatedTextImporterHelper.iter_merged_simple_transactions(*list_of_sources)
+
+    def find_local_files_by_account(self) -> tuple[bool, list[tuple[list[str], str]] | None]:
+        """
+        Find `year-YYYY-<account>.csv` files and group them by account.
+        Files of an account are read as one logical stream, later. Nothing is written to disk.
+
+        Returns:
+            A list of (a list of file paths sorted by year, account), sorted by account.
+        """
+        (result, file_meta) = self.find_local_files()
+        if not result:
             return (False, None)
+        file_meta_by_account = []
+        for (account, group) in itertools.groupby(file_meta, key=itemgetter(1)):
+            file_meta_by_account.append(([transaction_filepath for (transaction_filepath, _) in group], account))
+        return (True, file_meta_by_account)
 
     def _build_input_data_directory_path(self, securities_firm_id: str) -> str:
         from tt.constants import Constants
@@ -73,60 +136,87 @@ class AutomatedTextImporterBaseImpl(AutomatedTextImporterBase):
         input_data_directory_path = os.path.join(input_data_dir_path, f"{securities_firm_id}-exported-transactions")
         return input_data_directory_path
 
-    def _concat_files_if_needed(self) -> List[Tuple[str, str]] | None:
+    def find_local_files(self) -> tuple[bool, list[tuple[str, str]] | None]:
+        """
+        Find `year-YYYY-<account>.csv` files.
+
+        Returns:
+            A list of (file path, account), sorted by account, then, by year.
+        """
+        if self.securities_firm_id is None:
+            logger.error("securities_firm_id is not set.")
+            return (False, None)
         input_data_dir_path = self._build_input_data_directory_path(self.securities_firm_id)
         logger.info(f"Checking for transaction candidate files in: {input_data_dir_path}")
         if not os.path.exists(input_data_dir_path):
             logger.error(f"Input data directory does not exist: {input_data_dir_path}")
-            return None
-        files = []
-        for path in Path(input_data_dir_path).glob("year-*.csv"):
-            logger.info(f"Found transaction candidate file: {path}")
-            files.append(os.path.basename(path))
-
-        files.sort()
-
-        account_set = set()
-        for name in files:
-            match = re.match(r"year-(\d{4})-(.*)\.csv", name)
-            if match:
-                account_set.add(match.group(2))
-            else:
+            return (False, None)
+        account_and_file_map = self._get_account_and_file_map(input_data_dir_path)
+        file_meta = []
+        for account in sorted(account_and_file_map):
+            for name in account_and_file_map[account]:
+                file_meta.append((os.path.join(input_data_dir_path, name), account))
+        if not file_meta:
+            return (False, None)
+        return (True, file_meta)
+
+    def _get_account_and_file_map(self, input_data_dir_path: str) -> dict[str, list[str]]:
+        """
+        Returns:
+            A dict of which key is an account and value is a list of file names, sorted by year.
+        """
+        account_and_file_map = {}
+        for name in sorted(os.path.basename(path) for path in Path(input_data_dir_path).glob("year-*.csv")):
+            logger.info(f"Found transaction candidate file: {name}")
+            match = YEAR_FILE_NAME_PATTERN.match(name)
+            if not match:
                 logger.warning(f"Filename does not match expected pattern: {name}")
                 continue
-        account_and_file_map = {}
-        for account in account_set:
-            account_and_file_map[account] = []
-            for name in files:
-                if f"-{account}." in name:
-                    account_and_file_map[account].append(name)
-        concatenated_file_meta = []
-        sorted_account_list = sorted(account_set)
-        for account in sorted_account_list:
-            concatenated_file_path = os.path.join(input_data_dir_path, f"latest-{account}.csv")
-            with open(concatenated_file_path, "w", encoding="euc-kr") as concatenated_file:
-                for name in account_and_file_map[account]:
-                    file_path = os.path.join(input_data_dir_path, name)
-                    with open(file_path, "r", encoding="euc-kr") as input_file:
-                        lines = input_file.readlines()
-                        if len(lines) > 0:
-                            # Skip header line for all but the first file
-                            start_index = 1 if name != account_and_file_map[account][0] else 0
-                            for line in lines[start_index:]:
-                                concatenated_file.write(line)
-                    logger.info(f"Processed file: {os.path.basename(file_path)}")
-            logger.info(f"Created concatenated file: {os.path.basename(concatenated_file_path)}")
-            concatenated_file_meta.append((concatenated_file_path, account))
-        return concatenated_file_meta
-
-    def _cleanup_files(self, concatenated_file_meta: list[tuple[str, str]]) -> None:
-        """
-        Subclasses may override this method to implement file cleanup logic.
-        """
-        pass
-
-    def _get_list_of_simple_transactions_from_stream(self, input_stream, account, symbol_config: SymbolConfig):
+            account_and_file_map.setdefault(match.group(2), []).append(name)
+        return account_and_file_map
+
+    def _iter_cleaned_lines(self, input_stream: Iterable[str]) -> Iterable[str]:
         """
-        Subclasses may override this method.
+        Subclasses may override this method to clean up each line before it is parsed.
+        """
+        return input_stream
+
+    def _get_transaction_batch_from_stream(self, input_stream, account, symbol_config: SymbolConfig) -> TransactionBatch:
+        if self.list_of_layouts:
+            import tt.automated_text_importer_columnar
+            text = "".join(input_stream)
+            batch = tt.automated_text_importer_columnar.get_transaction_batch_from_stream(
+                io.StringIO(text, newline=""), self.list_of_layouts, self.securities_firm_id, account, symbol_config
+            )
+            if batch is not None:
+                return batch
+            input_stream = io.StringIO(text, newline="")
+        return TransactionBatch.from_simple_transactions(self._iter_simple_transactions_from_stream(input_stream, account, symbol_config))
+
+    def _get_list_of_simple_transactions_from_stream(self, input_stream, account, symbol_config: SymbolConfig) -> list[SimpleTransaction]:
+        if self.flag_columnar and self.list_of_layouts:
+            import tt.automated_text_importer_columnar
+            text = "".join(input_stream)
+            imported_list = tt.automated_text_importer_columnar.get_list_of_simple_transactions_from_stream(
+                io.StringIO(text, newline=""), self.list_of_layouts, self.securities_firm_id, account, symbol_config
+            )
+            if imported_list is not None:
+                return imported_list
+            input_stream = io.StringIO(text, newline="")
+        return list(self._iter_simple_transactions_from_stream(input_stream, account, symbol_config))
+
+    def _get_encoding(self) -> str:
+        if self.list_of_layouts:
+            return self.list_of_layouts[0].encoding
+        return "euc-kr"
+
+    def _iter_simple_transactions_from_stream(self, input_stream, account, symbol_config: SymbolConfig) -> Iterator[SimpleTransaction]:
+        """
+        Subclasses may override this method. By default, it parses the stream with |self.list_of_layouts|.
+        It yields transactions sorted by date. See |AutomatedTextImporterHelper.sort_transactions_of_current_date| for the order within a day.
         """
-        pass
+        if not self.list_of_layouts:
+            return iter(())
+        return tt.automated_text_importer_layout.iter_simple_transactions_from_stream(
+            input_stream, self.list_of_layouts, self.securities_firm_id, account, symbol_config
+        )
@@ -0,0 +1,243 @@
+"""
+A persistent cache of parsed transaction files.
+
+It keeps a manifest of source files - `year-YYYY-<account>.csv` - keyed by path.
+Each entry holds the size, mtime and content hash of a source file and the name of a payload file.
+A payload file is a compact serialization of parsed `SimpleTransaction` rows - one JSON array per line.
+So, only new or changed files need to be decoded and parsed.
+
+All entries are evicted if the format version, the parser or the symbol configuration changes.
+The parser is fingerprinted by layouts of importers and |PARSER_VERSION|.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+
+from loguru import logger
+
+from tt.automated_text_importer_layout import (PARSER_VERSION,
+                                               AutomatedTextImporterLayout)
+from tt.simple_transaction import SimpleTransaction
+from tt.symbol_config import SymbolConfig
+
+
+class AutomatedTextImporterCache:
+
+    FORMAT_VERSION = 1
+    MANIFEST_FILENAME = "manifest.json"
+    CHUNK_SIZE_FOR_HASH = 1024 * 1024
+
+    def __init__(self, cache_dir_path: str):
+        self.cache_dir_path = cache_dir_path
+        self.entries = {}  # dict[absolute path of a source file, dict]
+        self.parser_fingerprint = None
+        self.symbol_config_fingerprint = None
+        self.count_hit = 0
+        self.count_miss = 0
+        # Fingerprints computed on a miss. They are used by `store` so that a file is hashed once.
+        self._pending_fingerprints = {}
+
+    def open(self, symbol_config: SymbolConfig, parser_fingerprint: str) -> None:
+        """
+        Load the manifest. Evict all entries if it is stale.
+
+        Args:
+            parser_fingerprint: See |get_parser_fingerprint|.
+        """
+        self.parser_fingerprint = parser_fingerprint
+        self.symbol_config_fingerprint = self.get_symbol_config_fingerprint(symbol_config)
+        self.entries = {}
+        self.count_hit = 0
+        self.count_miss = 0
+        self._pending_fingerprints = {}
+        manifest_file_path = os.path.join(self.cache_dir_path, self.MANIFEST_FILENAME)
+        if not os.path.exists(manifest_file_path):
+            return
+        try:
+            with open(manifest_file_path, "r", encoding="utf-8") as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to read the cache manifest. Let's ignore it. ({e})")
+            return
+        if manifest.get("format_version") != self.FORMAT_VERSION:
+            logger.info("The cache format has changed. Evicting all cache entries...")
+            return
+        if manifest.get("parser_fingerprint") != self.parser_fingerprint:
+            logger.info("The parser has changed. Evicting all cache entries...")
+            return
+        if manifest.get("symbol_config_fingerprint") != self.symbol_config_fingerprint:
+            logger.info("The symbol configuration has changed. Evicting all cache entries...")
+            return
+        self.entries = manifest.get("entries", {})
+
+    def load(self, securities_firm_id: str, transaction_filepath: str, account: str) -> list[SimpleTransaction] | None:
+        """
+        Returns:
+            A list of transactions if the file has not changed since it was cached. Otherwise, None.
+        """
+        key = os.path.abspath(transaction_filepath)
+        entry = self.entries.get(key)
+        fingerprint = None
+        if entry is not None and entry["securities_firm_id"] == securities_firm_id and entry["account"] == account:
+            stat_result = os.stat(transaction_filepath)
+            if entry["size"] == stat_result.st_size and entry["mtime_ns"] == stat_result.st_mtime_ns:
+                list_of_simple_transactions = self._read_payload(entry["payload"], account)
+                if list_of_simple_transactions is not None:
+                    self.count_hit += 1
+                    return list_of_simple_transactions
+            else:
+                # The file may have been touched without a change.
+                fingerprint = self._get_file_fingerprint(transaction_filepath)
+                if fingerprint["sha256"] == entry["sha256"]:
+                    list_of_simple_transactions = self._read_payload(entry["payload"], account)
+                    if list_of_simple_transactions is not None:
+                        entry["size"] = fingerprint["size"]
+                        entry["mtime_ns"] = fingerprint["mtime_ns"]
+                        self.count_hit += 1
+                        return list_of_simple_transactions
+        if fingerprint is None:
+            fingerprint = self._get_file_fingerprint(transaction_filepath)
+        self._pending_fingerprints[key] = fingerprint
+        self.count_miss += 1
+        return None
+
+    def store(self, securities_firm_id: str, transaction_filepath: str, account: str, list_of_simple_transactions: list[SimpleTransaction]) -> None:
+        key = os.path.abspath(transaction_filepath)
+        fingerprint = self._pending_fingerprints.pop(key, None)
+        if fingerprint is None:
+            fingerprint = self._get_file_fingerprint(transaction_filepath)
+        payload_filename = f"{securities_firm_id}-{account}-{fingerprint['sha256']}.jsonl"
+        try:
+            os.makedirs(self.cache_dir_path, exist_ok=True)
+            self._write_payload(payload_filename, list_of_simple_transactions)
+        except OSError as e:
+            logger.warning(f"Failed to write a cache payload: {payload_filename} ({e})")
+            return
+        self.entries[key] = {
+            "securities_firm_id": securities_firm_id,
+            "account": account,
+            "size": fingerprint["size"],
+            "mtime_ns": fingerprint["mtime_ns"],
+            "sha256": fingerprint["sha256"],
+            "payload": payload_filename,
+        }
+
+    def save(self) -> bool:
+        """Write the manifest. Entries of deleted source files and unreferenced payloads are removed."""
+        self.entries = {key: entry for (key, entry) in self.entries.items() if os.path.exists(key)}
+        manifest = {
+            "format_version": self.FORMAT_VERSION,
+            "parser_fingerprint": self.parser_fingerprint,
+            "symbol_config_fingerprint": self.symbol_config_fingerprint,
+            "entries": self.entries,
+        }
+        manifest_file_path = os.path.join(self.cache_dir_path, self.MANIFEST_FILENAME)
+        temporary_file_path = manifest_file_path + ".tmp"
+        try:
+            os.makedirs(self.cache_dir_path, exist_ok=True)
+            with open(temporary_file_path, "w", encoding="utf-8") as manifest_file:
+                json.dump(manifest, manifest_file, ensure_ascii=False, indent=1)
+            os.replace(temporary_file_path, manifest_file_path)
+        except OSError as e:
+            logger.warning(f"Failed to write the cache manifest. ({e})")
+            return False
+
+        set_of_referenced_payload = {entry["payload"] for entry in self.entries.values()}
+        for name in os.listdir(self.cache_dir_path):
+            if name.endswith(".jsonl") and name not in set_of_referenced_payload:
+                os.remove(os.path.join(self.cache_dir_path, name))
+        logger.info(f"Cache hits: ({self.count_hit}) Cache misses: ({self.count_miss})")
+        return True
+
+    def clear(self) -> None:
+        """Evict all entries and remove their payloads. See `--refresh-cache` of `tt create auto`."""
+        logger.info("Clearing the cache...")
+        self.entries = {}
+        self._pending_fingerprints = {}
+        if not os.path.exists(self.cache_dir_path):
+            return
+        for name in os.listdir(self.cache_dir_path):
+            if name.endswith(".jsonl") or name == self.MANIFEST_FILENAME:
+                os.remove(os.path.join(self.cache_dir_path, name))
+
+    @staticmethod
+    def get_parser_fingerprint(layouts_by_securities_firm_id: dict[str, list[AutomatedTextImporterLayout]]) -> str:
+        """
+        Args:
+            layouts_by_securities_firm_id: A securities firm id => |list_of_layouts| of its importer
+        """
+        h = hashlib.sha256()
+        h.update(json.dumps(PARSER_VERSION).encode("utf-8"))
+        h.update(b"\n")
+        for securities_firm_id in sorted(layouts_by_securities_firm_id):
+            # The order of layouts matters because the first one is the default.
+            list_of_declarations = [layout.get_declaration() for layout in layouts_by_securities_firm_id[securities_firm_id]]
+            h.update(json.dumps([securities_firm_id, list_of_declarations], ensure_ascii=False, sort_keys=True).encode("utf-8"))
+            h.update(b"\n")
+        return h.hexdigest()
+
+    @staticmethod
+    def get_symbol_config_fingerprint(symbol_config: SymbolConfig) -> str:
+        # The order matters because the first match wins on a lookup.
+        h = hashlib.sha256()
+        for item in symbol_config.symbol_config_elements:
+            fields = (item.original_namespace, item.original_symbol, item.legit_namespace, item.legit_symbol)
+            h.update(json.dumps(fields, ensure_ascii=False).encode("utf-8"))
+            h.update(b"\n")
+        return h.hexdigest()
+
+    def _get_file_fingerprint(self, transaction_filepath: str) -> dict:
+        stat_result = os.stat(transaction_filepath)
+        h = hashlib.sha256()
+        with open(transaction_filepath, "rb") as f:
+            while True:
+                chunk = f.read(self.CHUNK_SIZE_FOR_HASH)
+                if not chunk:
+                    break
+                h.update(chunk)
+        return {
+            "size": stat_result.st_size,
+            "mtime_ns": stat_result.st_mtime_ns,
+            "sha256": h.hexdigest(),
+        }
+
+    def _write_payload(self, payload_filename: str, list_of_simple_transactions: list[SimpleTransaction]) -> None:
+        payload_file_path = os.path.join(self.cache_dir_path, payload_filename)
+        with open(payload_file_path, "w", encoding="utf-8") as payload_file:
+            for t in list_of_simple_transactions:
+                row = [
+                    t.open_date.toordinal(),
+                    t.transaction_type.value,
+                    t.namespace,
+                    t.symbol,
+                    t.amount,
+                    t.open_price,
+                    t.commission,
+                ]
+                payload_file.write(json.dumps(row, ensure_ascii=False))
+                payload_file.write("\n")
+
+    def _read_payload(self, payload_filename: str, account: str) -> list[SimpleTransaction] | None:
+        payload_file_path = os.path.join(self.cache_dir_path, payload_filename)
+        list_of_simple_transactions = []
+        try:
+            with open(payload_file_path, "r", encoding="utf-8") as payload_file:
+                for line in payload_file:
+                    (open_date, transaction_type, namespace, symbol, amount, open_price, commission) = json.loads(line)
+                    transaction = SimpleTransaction(
+                        symbol=symbol,
+                        transaction_type=SimpleTransaction.SimpleTransactionTypeEnum(transaction_type),
+                        amount=amount,
+                        open_price=open_price,
+                        open_date=datetime.date.fromordinal(open_date),
+                        commission=commission,
+                        namespace=namespace,
+                        account=account,
+                    )
+                    list_of_simple_transactions.append(transaction)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to read a cache payload: {payload_filename} ({e})")
+            return None
+        return list_of_simple_transactions
@@ -0,0 +1,209 @@
+"""
+A columnar parse path for large broker exports.
+
+A whole stream is loaded with `pandas.read_csv`. Then, type mapping, date parsing, number cleanup and commission summing are done
+as column operations, driven by the same |AutomatedTextImporterLayout| as the row-wise parser. The result is a |TransactionBatch|.
+It produces the same transactions in the same order as |tt.automated_text_importer_layout.iter_simple_transactions_from_stream|.
+"""
+
+import datetime
+from typing import TextIO
+
+import numpy
+import pandas
+from loguru import logger
+
+from tt.automated_text_importer_converter import round_commission
+from tt.automated_text_importer_helper import AutomatedTextImporterHelper
+from tt.automated_text_importer_layout import AutomatedTextImporterLayout, choose_layout
+from tt.simple_transaction import SimpleTransaction
+from tt.symbol_config import SymbolConfig
+from tt.transaction_batch import TransactionBatch
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def get_list_of_simple_transactions_from_stream(
+    input_stream: TextIO,
+    list_of_layouts: list[AutomatedTextImporterLayout],
+    securities_firm_id: str,
+    account: str,
+    symbol_config: SymbolConfig,
+) -> list[SimpleTransaction] | None:
+    """
+    Returns:
+        A list of transactions sorted by date. None if the stream cannot be loaded as a table.
+        Then, a caller should fall back to the row-wise parser.
+    """
+    batch = get_transaction_batch_from_stream(input_stream, list_of_layouts, securities_firm_id, account, symbol_config)
+    if batch is None:
+        return None
+    return batch.to_simple_transactions()
+
+
+def get_transaction_batch_from_stream(
+    input_stream: TextIO,
+    list_of_layouts: list[AutomatedTextImporterLayout],
+    securities_firm_id: str,
+    account: str,
+    symbol_config: SymbolConfig,
+) -> TransactionBatch | None:
+    """
+    Returns:
+        A batch of transactions sorted by date. None if the stream cannot be loaded as a table - e.g. A malformed quote.
+    """
+    column_length = max(layout.expected_column_length for layout in list_of_layouts)
+    # Load only columns which are read, or, used to choose a layout.
+    set_of_used_columns = {0}
+    for layout in list_of_layouts:
+        set_of_used_columns.update(layout.header_fields.keys())
+        set_of_used_columns.update([layout.date_column, layout.transaction_type_column, layout.symbol_column, layout.amount_column, layout.open_price_column])
+        set_of_used_columns.update(layout.commission_columns)
+    try:
+        df = pandas.read_csv(
+            input_stream,
+            header=None,
+            names=range(column_length),
+            usecols=sorted(set_of_used_columns),
+            dtype=object,
+            keep_default_na=False,
+            skip_blank_lines=True,
+        )
+    except pandas.errors.EmptyDataError:
+        return TransactionBatch.empty()
+    except pandas.errors.ParserError as e:
+        logger.warning(f"Failed to load a stream as a table. Let's fall back to the row-wise parser. ({e})")
+        return None
+
+    first_column = df[0]
+    set_of_header_sentinels = {layout.header_sentinel for layout in list_of_layouts}
+    is_header = first_column.isin(set_of_header_sentinels).to_numpy()
+
+    # Split rows into ranges by header rows. Each range is parsed with the layout chosen from its header.
+    list_of_ranges = []  # list[tuple[start, end, layout]]
+    layout = list_of_layouts[0]
+    start = 0
+    for header_index in numpy.flatnonzero(is_header).tolist():
+        header_row = [""] * column_length
+        for (column, value) in df.iloc[header_index].items():
+            if not pandas.isna(value):
+                header_row[column] = value
+        chosen_layout = choose_layout(list_of_layouts, header_row)
+        if chosen_layout is not layout:
+            list_of_ranges.append((start, header_index, layout))
+            logger.info(f"Layout ({chosen_layout.name}) has been chosen for {securities_firm_id}.")
+            layout = chosen_layout
+            start = header_index
+    list_of_ranges.append((start, len(df), layout))
+
+    list_of_columns = [
+        _convert_range(df.iloc[start:end], is_header[start:end], layout, securities_firm_id, symbol_config)
+        for (start, end, layout) in list_of_ranges
+        if start < end
+    ]
+    if not list_of_columns:
+        return TransactionBatch.empty()
+    (ordinals, type_values, namespaces, symbols, amounts, open_prices, commissions) = (
+        numpy.concatenate([columns[i] for columns in list_of_columns]) for i in range(7)
+    )
+    (symbol_ids, distinct_symbols) = pandas.factorize(symbols)
+    (namespace_ids, distinct_namespaces) = pandas.factorize(namespaces)
+    batch = TransactionBatch(
+        (ordinals - EPOCH_ORDINAL).astype("datetime64[D]"),
+        type_values.astype(numpy.int8),
+        amounts,
+        open_prices,
+        commissions,
+        symbol_ids.astype(numpy.int32),
+        numpy.zeros(len(ordinals), dtype=numpy.int32),
+        namespace_ids.astype(numpy.int32),
+        distinct_symbols.tolist(),
+        [account],
+        distinct_namespaces.tolist(),
+    )
+
+    # Transactions of a run of the same date are ordered by type, as the row-wise parser does.
+    ranks = batch.get_type_ranks()
+    is_ranked = ranks < len(AutomatedTextImporterHelper.SAME_DAY_TRANSACTION_TYPE_ORDER)
+    run_ids = numpy.cumsum(numpy.concatenate(([True], ordinals[1:] != ordinals[:-1])))
+    order = numpy.lexsort((ranks, run_ids))
+    return batch[order[is_ranked[order]]]
+
+
+def _convert_range(
+    df: pandas.DataFrame,
+    is_header: numpy.ndarray,
+    layout: AutomatedTextImporterLayout,
+    securities_firm_id: str,
+    symbol_config: SymbolConfig,
+) -> tuple[numpy.ndarray, ...]:
+    # A column of few distinct values is converted once per distinct value.
+    transaction_type_table = layout.transaction_type_table
+    (codes, distinct_type_values) = _map_distinct_values(
+        df[layout.transaction_type_column],
+        lambda raw: transaction_type_table[raw.strip()].value if isinstance(raw, str) and raw.strip() in transaction_type_table else -1,
+    )
+    type_values = numpy.array(distinct_type_values, dtype=numpy.int64)[codes]
+    # Rows of other types - i.e. Dividend - and header rows are dropped.
+    mask = (type_values >= 0) & ~is_header
+    df = df[mask]
+    type_values = type_values[mask]
+
+    open_dates = pandas.to_datetime(df[layout.date_column], format=layout.date_format, errors="coerce")
+    is_malformed = open_dates.isna().to_numpy()
+    if is_malformed.any():
+        for input_row in df[is_malformed].itertuples(index=False):
+            logger.warning("A malformed date string has been found.")
+            logger.warning("An input was: %s" % str(list(input_row)))
+        df = df[~is_malformed]
+        type_values = type_values[~is_malformed]
+        open_dates = open_dates[~is_malformed]
+
+    # Resolve each distinct symbol once.
+    flag_strip_symbol = layout.flag_strip_symbol
+    (codes, distinct_namespaces_and_symbols) = _map_distinct_values(
+        df[layout.symbol_column],
+        lambda raw: symbol_config.get_namespace_and_symbol_by_raw_input(securities_firm_id, raw.strip() if flag_strip_symbol else raw),
+    )
+    namespaces = numpy.array([namespace for (namespace, _) in distinct_namespaces_and_symbols], dtype=object)[codes]
+    symbols = numpy.array([symbol for (_, symbol) in distinct_namespaces_and_symbols], dtype=object)[codes]
+
+    total_commissions = numpy.zeros(len(df), dtype=numpy.float64)
+    for column in layout.commission_columns:
+        total_commissions = total_commissions + _to_float(df[column])
+
+    return (
+        _to_ordinals(open_dates),
+        type_values,
+        namespaces,
+        symbols,
+        _to_float(df[layout.amount_column].str.replace(",", "", regex=False)),
+        _to_float(df[layout.open_price_column].str.replace(",", "", regex=False)),
+        _round_commissions(total_commissions),
+    )
+
+
+def _map_distinct_values(series: pandas.Series, function) -> tuple[numpy.ndarray, list]:
+    """
+    Returns:
+        (codes, converted distinct values). |converted[codes[i]]| is the converted value of the i-th row.
+    """
+    (codes, distinct_values) = pandas.factorize(series, use_na_sentinel=False)
+    return (codes, [function(value) for value in distinct_values.tolist()])
+
+
+def _to_float(series: pandas.Series) -> numpy.ndarray:
+    # An object array is converted with Python's |float|. So, values are the same as the ones of the row-wise parser.
+    return series.to_numpy(dtype=object).astype(numpy.float64)
+
+
+def _to_ordinals(open_dates: pandas.Series) -> numpy.ndarray:
+    days_since_epoch = open_dates.to_numpy(dtype="datetime64[D]").astype(numpy.int64)
+    return days_since_epoch + EPOCH_ORDINAL
+
+
+def _round_commissions(total_commissions: numpy.ndarray) -> numpy.ndarray:
+    # |numpy.round| scales by 100 and may differ from the row-wise parser on a tie. Round each distinct value as it does.
+    (distinct_values, inverse) = numpy.unique(total_commissions, return_inverse=True)
+    rounded = numpy.array([round_commission(value) for value in distinct_values.tolist()], dtype=numpy.float64)
+    return rounded[inverse.reshape(-1)]
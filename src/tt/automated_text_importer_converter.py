@@ -0,0 +1,74 @@
+"""
+Field converters shared by importers of all securities firms.
+
+    - Dates: A broker file repeats the same date on many rows. So, a date parser is memoized.
+      `YYYY/MM/DD`, `YYYY-MM-DD` and `YYYY.MM.DD` are parsed by slicing fixed-width fields instead of |datetime.strptime|.
+    - Numbers: Comma-grouped numbers - i.e. "1,234.5".
+    - Commissions: Rounding to 2 decimal places. It is the same as `float("%.2f" % x)` without a string.
+"""
+
+import datetime
+import functools
+from typing import Callable
+
+from tt.malformed_date_error import MalformedDateError
+
+# A format of |datetime.strptime| => A separator of a fixed-width date
+FIXED_WIDTH_DATE_FORMAT_TABLE = {
+    "%Y/%m/%d": "/",
+    "%Y-%m-%d": "-",
+    "%Y.%m.%d": ".",
+}
+MAX_CACHED_DATES = 16384  # Per a date format. It is more than 40 years of days.
+
+
+@functools.cache
+def get_date_parser(date_format: str) -> Callable[[str], datetime.date]:
+    """
+    Returns:
+        A memoized function which converts a string into |datetime.date|.
+        It accepts the same strings as |datetime.strptime| with |date_format| does. It raises |MalformedDateError| otherwise.
+        Parsers are shared per |date_format|.
+    """
+    separator = FIXED_WIDTH_DATE_FORMAT_TABLE.get(date_format)
+
+    def parse_with_strptime(date_string: str) -> datetime.date:
+        try:
+            return datetime.datetime.strptime(date_string, date_format).date()
+        except ValueError as e:
+            raise MalformedDateError() from e
+
+    if separator is None:
+        return functools.lru_cache(maxsize=MAX_CACHED_DATES)(parse_with_strptime)
+
+    def parse(date_string: str) -> datetime.date:
+        if (
+            len(date_string) == 10
+            and date_string[4] == separator
+            and date_string[7] == separator
+            and date_string.isascii()
+            and date_string[0:4].isdigit()
+            and date_string[5:7].isdigit()
+            and date_string[8:10].isdigit()
+        ):
+            try:
+                return datetime.date(int(date_string[0:4]), int(date_string[5:7]), int(date_string[8:10]))
+            except ValueError as e:
+                # i.e. 2024/02/30
+                raise MalformedDateError() from e
+        # i.e. 2024/1/5 - It is not fixed-width. But |datetime.strptime| accepts it.
+        return parse_with_strptime(date_string)
+
+    return functools.lru_cache(maxsize=MAX_CACHED_DATES)(parse)
+
+
+def parse_comma_number(number_string: str) -> float:
+    """Converts a comma-grouped number - i.e. "1,234.5" - into a float. A string without a comma is not copied."""
+    if "," in number_string:
+        number_string = number_string.replace(",", "")
+    return float(number_string)
+
+
+def round_commission(commission: float) -> float:
+    # |round| of a float is correctly rounded as "%.2f" is. So, the result is the same as `float("%.2f" % commission)`.
+    return round(commission, 2)
@@ -1,7 +1,10 @@
-import datetime
+import heapq
+import itertools
 import os
 import sys
+from operator import attrgetter
 from pathlib import Path
+from typing import Iterable, Iterator
 
 import yaml
 from loguru import logger
@@ -59,78 +62,95 @@ class AutomatedTextImporterHelper():
             return None
         return config_to_return
 
+
+    # The order of transaction types within the same day.
+    # We know the date of a transaction; We don't know the time of it.
+    # To ensure that, e.g., 'BUY' transactions are listed before 'SELL' transaction(s) on the same day, this order is used.
+    # Transactions of a type which is not listed here are dropped.
+    SAME_DAY_TRANSACTION_TYPE_ORDER = (
+        SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION,
+        SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_INSERTION,
+        SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY,
+        SimpleTransaction.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT,
+        SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM,
+        SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM,
+        SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL,
+    )
+    SAME_DAY_TRANSACTION_TYPE_RANK = {t: rank for (rank, t) in enumerate(SAME_DAY_TRANSACTION_TYPE_ORDER)}
+
+    @staticmethod
+    def iter_concatenated_lines(list_of_filepaths: list[str], encoding: str = "euc-kr") -> Iterator[str]:
+        """
+        Present files as one logical stream of lines.
+        The first line of all but the first file is skipped if it repeats the first line of the first file - the header.
+        A different header is kept so that a parser can choose a layout for it.
+        Each file is opened when it is reached and closed when it is exhausted.
+
+        Raises:
+            OSError: If a file cannot be opened.
+        """
+        first_header = None
+        for filepath in list_of_filepaths:
+            with open(filepath, newline="", encoding=encoding) as input_file:
+                header = next(input_file, None)
+                if header is None:
+                    continue
+                if first_header is None:
+                    first_header = header
+                    yield header
+                elif header.rstrip("\r\n") != first_header.rstrip("\r\n"):
+                    yield header
+                yield from input_file
+
+    @staticmethod
+    def iter_merged_simple_transactions(
+        *sources: Iterable[SimpleTransaction],
+    ) -> Iterator[SimpleTransaction]:
+        """Merge any number of date-sorted sources of |SimpleTransaction| objects in one pass.
+
+        Sources are merged with a heap keyed by `open_date`. Ties are broken by the order of sources,
+        then, transactions of the same day are ordered by `SAME_DAY_TRANSACTION_TYPE_ORDER`.
+        Only transactions of the same day are buffered; Each source is consumed lazily.
+
+        Args:
+            *sources: Iterables of |SimpleTransaction| objects. Each one must be sorted by `open_date`.
+
+        Yields:
+            SimpleTransaction: Merged transactions.
+        """
+        merged_stream = heapq.merge(*sources, key=attrgetter("open_date"))
+        for _, transactions_of_current_date in itertools.groupby(merged_stream, key=attrgetter("open_date")):
+            # The sort is stable. So, the order of sources is kept for the same type.
+            yield from AutomatedTextImporterHelper.sort_transactions_of_current_date(transactions_of_current_date)
+
     @staticmethod
-    # This function merges two lists of |SimpleTransactions| objects. It's based on date-by-date iteration.
-    # Note: Performance-wise, this function can be improved a lot.
     def merge_simple_transactions(
-        first: list[SimpleTransaction], second: list[SimpleTransaction]
+        *sources: Iterable[SimpleTransaction],
     ) -> list[SimpleTransaction]:
-        merged = []
-        len_first = len(first)
-        len_second = len(second)
-        if len_second == 0:
-            return first
-        if len_first == 0:
-            return second
-        if second[0].open_date < first[0].open_date:
-            return AutomatedTextImporterHelper.merge_simple_transactions(second, first)
-        i = 0
-        j = 0
-        current_date = first[0].open_date
-        transactions_of_current_date = None
-        ending_date = datetime.date.today()
-        while current_date <= ending_date:
-            transactions_of_current_date = []
-            while i < len_first:
-                f = first[i]
-                f_date = f.open_date
-                if f_date > current_date:
-                    break
-                transactions_of_current_date.append(f)
-                i += 1
-            while j < len_second:
-                s = second[j]
-                s_date = s.open_date
-                if s_date > current_date:
-                    break
-                transactions_of_current_date.append(s)
-                j += 1
-            AutomatedTextImporterHelper.append_transactions_of_current_date(merged, transactions_of_current_date)
-            current_date += datetime.timedelta(days=1)
-
-        return merged
+        """Merge any number of date-sorted lists of |SimpleTransaction| objects into a new list.
+
+        See |iter_merged_simple_transactions| for details.
+        """
+        return list(AutomatedTextImporterHelper.iter_merged_simple_transactions(*sources))
+
+    @staticmethod
+    def sort_transactions_of_current_date(
+        transactions_of_current_date: Iterable[SimpleTransaction],
+    ) -> list[SimpleTransaction]:
+        """Order transactions of the same day by `SAME_DAY_TRANSACTION_TYPE_ORDER`.
+
+        The sort is stable. Transactions of a type which is not listed there are dropped.
+        """
+        rank = AutomatedTextImporterHelper.SAME_DAY_TRANSACTION_TYPE_RANK
+        return sorted(
+            (t for t in transactions_of_current_date if t.transaction_type in rank),
+            key=lambda t: rank[t.transaction_type],
+        )
 
     @staticmethod
     def append_transactions_of_current_date(
         list_of_simple_transactions: list, transactions_of_current_date: list
     ):
-        for t in transactions_of_current_date:
-            if (
-                t.transaction_type
-                == SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION
-            ):
-                list_of_simple_transactions.append(t)
-        for t in transactions_of_current_date:
-            if (
-                t.transaction_type
-                == SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_INSERTION
-            ):
-                list_of_simple_transactions.append(t)
-        for t in transactions_of_current_date:
-            if t.transaction_type == SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY:
-                list_of_simple_transactions.append(t)
-        for t in transactions_of_current_date:
-            if (
-                t.transaction_type
-                == SimpleTransaction.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT
-            ):
-                list_of_simple_transactions.append(t)
-        for t in transactions_of_current_date:
-            if t.transaction_type == SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM:
-                list_of_simple_transactions.append(t)
-        for t in transactions_of_current_date:
-            if t.transaction_type == SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM:
-                list_of_simple_transactions.append(t)
-        for t in transactions_of_current_date:
-            if t.transaction_type == SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL:
-                list_of_simple_transactions.append(t)
+        list_of_simple_transactions.extend(
+            AutomatedTextImporterHelper.sort_transactions_of_current_date(transactions_of_current_date)
+        )
@@ -0,0 +1,224 @@
+"""
+A declarative layout of a securities firm's CSV export, and an engine which parses rows with it.
+
+Each securities firm declares its column indexes, date format, a table of type strings, a header sentinel and an encoding.
+A layout is compiled into a row converter once per stream. So, the per-row work is a few list lookups and a dict lookup.
+If a securities firm has changed its export over time, it declares versioned layouts. A layout is chosen from the header row.
+"""
+
+import csv
+from typing import Callable, Iterable, Iterator
+
+from loguru import logger
+
+from tt.automated_text_importer_converter import (get_date_parser,
+                                                  parse_comma_number,
+                                                  round_commission)
+from tt.automated_text_importer_helper import AutomatedTextImporterHelper
+from tt.malformed_date_error import MalformedDateError
+from tt.simple_transaction import SimpleTransaction
+from tt.symbol_config import SymbolConfig
+
+# The version of parsing code which layouts do not declare - i.e. |round_commission|, |parse_comma_number| and `_iter_cleaned_lines` of importers.
+# Bump it on a change of such code. So, files parsed by the old code are parsed again. See |AutomatedTextImporterCache|.
+PARSER_VERSION = 1
+
+
+class AutomatedTextImporterLayout:
+
+    def __init__(
+        self,
+        name: str,
+        header_sentinel: str,
+        header_fields: dict[int, str],
+        expected_column_length: int,
+        date_column: int,
+        date_format: str,
+        transaction_type_column: int,
+        transaction_type_table: dict[str, SimpleTransaction.SimpleTransactionTypeEnum],
+        symbol_column: int,
+        amount_column: int,
+        open_price_column: int,
+        commission_columns: list[int],
+        flag_strip_symbol: bool = False,
+        encoding: str = "euc-kr",
+    ):
+        self.name = name
+        self.header_sentinel = header_sentinel  # The first cell of a header row
+        self.header_fields = header_fields  # Known names of columns. They are used to choose a layout.
+        self.expected_column_length = expected_column_length
+        self.date_column = date_column
+        self.date_format = date_format  # A format of |datetime.strptime|. See |tt.automated_text_importer_converter.get_date_parser|.
+        self.transaction_type_column = transaction_type_column
+        self.transaction_type_table = transaction_type_table  # Rows of other types - i.e. Dividend - are skipped.
+        self.symbol_column = symbol_column
+        self.amount_column = amount_column
+        self.open_price_column = open_price_column
+        self.commission_columns = commission_columns  # They are summed up. i.e. Pure commission and tax
+        self.flag_strip_symbol = flag_strip_symbol
+        self.encoding = encoding
+
+    def get_declaration(self) -> dict:
+        """
+        Returns:
+            All fields of the layout as JSON values. Types are their values of |SimpleTransaction.SimpleTransactionTypeEnum|.
+        """
+        return {
+            "name": self.name,
+            "header_sentinel": self.header_sentinel,
+            "header_fields": {str(index): name for (index, name) in self.header_fields.items()},
+            "expected_column_length": self.expected_column_length,
+            "date_column": self.date_column,
+            "date_format": self.date_format,
+            "transaction_type_column": self.transaction_type_column,
+            "transaction_type_table": {type_string: transaction_type.value for (type_string, transaction_type) in self.transaction_type_table.items()},
+            "symbol_column": self.symbol_column,
+            "amount_column": self.amount_column,
+            "open_price_column": self.open_price_column,
+            "commission_columns": self.commission_columns,
+            "flag_strip_symbol": self.flag_strip_symbol,
+            "encoding": self.encoding,
+        }
+
+    def get_score_of_header(self, header_row: list[str]) -> int:
+        """Returns the number of known column names which match the header row."""
+        return sum(
+            1 for (index, name) in self.header_fields.items() if index < len(header_row) and header_row[index].strip() == name
+        )
+
+    def compile(self, securities_firm_id: str, account: str, symbol_config: SymbolConfig) -> Callable[[list[str]], SimpleTransaction | None]:
+        """
+        Returns:
+            A function which converts a row into a |SimpleTransaction|.
+            It returns None if the row is not a transaction of known types, or, its date is malformed.
+        """
+        date_column = self.date_column
+        parse_date = get_date_parser(self.date_format)
+        transaction_type_column = self.transaction_type_column
+        get_transaction_type = self.transaction_type_table.get
+        symbol_column = self.symbol_column
+        amount_column = self.amount_column
+        open_price_column = self.open_price_column
+        commission_columns = self.commission_columns
+        flag_strip_symbol = self.flag_strip_symbol
+        get_namespace_and_symbol_by_raw_input = symbol_config.get_namespace_and_symbol_by_raw_input
+
+        def convert_row(input_row: list[str]) -> SimpleTransaction | None:
+            transaction_type = get_transaction_type(input_row[transaction_type_column].strip())
+            if transaction_type is None:
+                # It means the other transaction except known types.
+                # i.e. Dividend
+                return None
+            try:
+                open_date = parse_date(input_row[date_column])
+            except MalformedDateError:
+                logger.warning("A malformed date string has been found.")
+                logger.warning("An input was: %s" % str(input_row))
+                return None
+
+            raw_symbol_input = input_row[symbol_column]
+            if flag_strip_symbol:
+                raw_symbol_input = raw_symbol_input.strip()
+            (legit_namespace, legit_symbol) = get_namespace_and_symbol_by_raw_input(securities_firm_id, raw_symbol_input)
+
+            total_commission = 0.0
+            for column in commission_columns:
+                total_commission += float(input_row[column])
+
+            transaction = SimpleTransaction(
+                symbol=legit_symbol,
+                transaction_type=transaction_type,
+                amount=parse_comma_number(input_row[amount_column]),
+                open_price=parse_comma_number(input_row[open_price_column]),
+                open_date=open_date,
+                commission=round_commission(total_commission),
+                namespace=legit_namespace,
+                account=account,
+            )
+            return transaction
+
+        return convert_row
+
+
+def choose_layout(list_of_layouts: list[AutomatedTextImporterLayout], header_row: list[str]) -> AutomatedTextImporterLayout:
+    """Choose the layout which matches the header row the best. On a tie, the earlier one wins."""
+    best_layout = list_of_layouts[0]
+    best_score = best_layout.get_score_of_header(header_row)
+    for layout in list_of_layouts[1:]:
+        score = layout.get_score_of_header(header_row)
+        if score > best_score:
+            best_layout = layout
+            best_score = score
+    return best_layout
+
+
+# This function parses a CSV stream with layouts and yields |SimpleTransaction| objects, a day at a time.
+#
+# Note: We know the date of the transaction; We don't know the time of the transaction.
+# See |AutomatedTextImporterHelper.sort_transactions_of_current_date| for the order within a day.
+def iter_simple_transactions_from_stream(
+    input_stream: Iterable[str],
+    list_of_layouts: list[AutomatedTextImporterLayout],
+    securities_firm_id: str,
+    account: str,
+    symbol_config: SymbolConfig,
+) -> Iterator[SimpleTransaction]:
+    set_of_header_sentinels = {layout.header_sentinel for layout in list_of_layouts}
+    layout = list_of_layouts[0]
+    convert_row = layout.compile(securities_firm_id, account, symbol_config)
+    expected_column_length = layout.expected_column_length
+
+    reader = csv.reader(input_stream, delimiter=",")
+    transactions_of_current_date = None
+    current_date = None
+    for input_row in reader:
+        if not input_row:
+            continue
+        if input_row[0] == "Version=1.0":
+            # One can ignore this
+            continue
+        if input_row[0] in set_of_header_sentinels:
+            # Assume that this is the header row. Let's choose a layout and skip the header.
+            chosen_layout = choose_layout(list_of_layouts, input_row)
+            if chosen_layout is not layout:
+                logger.info(f"Layout ({chosen_layout.name}) has been chosen for {securities_firm_id}.")
+                layout = chosen_layout
+                convert_row = layout.compile(securities_firm_id, account, symbol_config)
+                expected_column_length = layout.expected_column_length
+            continue
+        if len(input_row) <= 1:
+            logger.warning(
+                "Tow short row. Expected %d. Got (%s)"
+                % (expected_column_length, input_row)
+            )
+            continue
+        if len(input_row) != expected_column_length:
+            logger.warning(
+                "A number of column in a row is not %d. Got %d. Let's process it."
+                % (expected_column_length, len(input_row))
+            )
+            logger.warning(f"Input was: {input_row}")
+
+        transaction = convert_row(input_row)
+        if transaction is None:
+            continue
+
+        if transactions_of_current_date is None:
+            # Initial condition
+            transactions_of_current_date = []
+            current_date = transaction.open_date
+        elif current_date != transaction.open_date:
+            # Not the same day
+            yield from AutomatedTextImporterHelper.sort_transactions_of_current_date(
+                transactions_of_current_date
+            )
+            transactions_of_current_date = []
+            current_date = transaction.open_date
+
+        transactions_of_current_date.append(transaction)
+
+    # Do this once at the last
+    if transactions_of_current_date is not None:
+        yield from AutomatedTextImporterHelper.sort_transactions_of_current_date(
+            transactions_of_current_date
+        )
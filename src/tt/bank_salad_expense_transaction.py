@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 import datetime
+from typing import Callable, Iterator
 
+import openpyxl
 import pandas
 import sqlalchemy
 from loguru import logger
@@ -8,8 +10,9 @@ from pandas import DataFrame
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
 
+import tt.streaming_pipeline
 from tt.db_connection import DBConnection
-from tt.db_impl_base import DBImplBase
+from tt.db_impl_base import DBImplBase, build_content_hash, iter_row_dicts
 
 Base = declarative_base()  # An sqlalchemy's base class.
 
@@ -17,9 +20,12 @@ Base = declarative_base()  # An sqlalchemy's base class.
 class BankSaladExpenseTransaction(Base):
 
     __tablename__ = "bank_salad_expense_transactions"
-    __table_args__ = {
-        "mysql_charset": "utf8mb4",
-    }
+    __table_args__ = (
+        sqlalchemy.Index("bank_salad_expense_transactions_content_hash", "content_hash", unique=True),
+        {
+            "mysql_charset": "utf8mb4",
+        },
+    )
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True, autoincrement=True)
     account = sqlalchemy.Column(sqlalchemy.String(128))
     amount = sqlalchemy.Column(sqlalchemy.Integer)
@@ -32,8 +38,13 @@ class BankSaladExpenseTransaction(Base):
     memo1 = sqlalchemy.Column(sqlalchemy.String(128))
     user_identifier = sqlalchemy.Column(sqlalchemy.String(128))
     imported_at = sqlalchemy.Column(sqlalchemy.DateTime)  # UTC
+    content_hash = sqlalchemy.Column(sqlalchemy.CHAR(32))  # See |get_content_hash|.
 
     CORE_FIELD_LENGTH = 11  # The length of items - account, amount, etc.
+    # Fields of `__eq__`. They are hashed into `content_hash`.
+    LIST_OF_CONTENT_HASH_COLUMN_NAMES = [
+        "account", "amount", "category0", "category1", "currency", "transaction_datetime", "type", "memo0", "memo1", "user_identifier",
+    ]
 
     def __init__(self):
         self.account = None
@@ -47,6 +58,7 @@ class BankSaladExpenseTransaction(Base):
         self.memo1 = None
         self.user_identifier = None
         self.imported_at = None  # UTC
+        self.content_hash = None
 
     def __eq__(self, other):
         """
@@ -88,6 +100,12 @@ class BankSaladExpenseTransaction(Base):
             )
         )
 
+    def get_content_hash(self) -> str:
+        """
+        A persisted `__hash__`. Equal transactions have the same content hash. So, the unique index of `content_hash` skips them.
+        """
+        return build_content_hash(getattr(self, column_name) for column_name in self.LIST_OF_CONTENT_HASH_COLUMN_NAMES)
+
     def __str__(self):
         return f"transaction_datetime({self.transaction_datetime}) type({self.type}) category0({self.category0}) category1({self.category1}) memo0({self.memo0}) amount({self.amount}) currency({self.currency}) account({self.account}) memo1({self.memo1}) user_identifier({self.user_identifier}) imported_at({self.imported_at})"
 
@@ -102,7 +120,9 @@ class BankSaladExpenseTransactionDBImpl(DBImplBase):
         inspector = sqlalchemy.inspect(self.db_connection.engine)
         table_name = BankSaladExpenseTransaction.__tablename__
         if table_name in inspector.get_table_names():
-            return True
+            return self.add_content_hash_column(
+                BankSaladExpenseTransaction.__table__, BankSaladExpenseTransaction.LIST_OF_CONTENT_HASH_COLUMN_NAMES
+            )
         BankSaladExpenseTransaction.__table__.create(self.db_connection.engine)
         return True
 
@@ -116,100 +136,156 @@ class BankSaladExpenseTransactionDBImpl(DBImplBase):
         return True
 
     def insert_records(
-        self, list_of_transaction: list[BankSaladExpenseTransaction]
-    ) -> bool:
-        session = self._get_session()
-        try:
-            session.add_all(list_of_transaction)
-            session.commit()
-            return True
-        except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Error during record insertion: {e}")
-            return False
-        finally:
-            session.close()
+        self, list_of_transaction: list[BankSaladExpenseTransaction], progress_callback: Callable[[int], None] | None = None
+    ) -> tuple[bool, int]:
+        """
+        Insert records in chunks with a Core `insert()`. See |DBImplBase.bulk_insert|.
+        A record whose content hash is in the table already is skipped by the database.
+
+        Returns:
+            (True if all records have been processed, The number of inserted records)
+        """
+        for t in list_of_transaction:
+            t.content_hash = t.get_content_hash()
+        return self.bulk_insert(
+            BankSaladExpenseTransaction.__table__,
+            iter_row_dicts(list_of_transaction, BankSaladExpenseTransaction.__table__),
+            progress_callback,
+            flag_ignore_duplicates=True,
+        )
 
     def get_all_filtered_by_user_identifier(
-        self, user_identifier: str
+        self, user_identifier: str, after_id: int | None = None
     ) -> list[BankSaladExpenseTransaction]:
+        """
+        Args:
+            after_id: If it is given, records whose id is greater than it are read only. See |ExpenseTransactionWatermark|.
+        """
         try:
             with self._get_session() as session:
-                return (
-                    session.query(BankSaladExpenseTransaction)
-                    .filter(
-                        BankSaladExpenseTransaction.user_identifier == user_identifier
-                    )
-                    .all()
+                query = session.query(BankSaladExpenseTransaction).filter(
+                    BankSaladExpenseTransaction.user_identifier == user_identifier
                 )
+                if after_id is not None:
+                    query = query.filter(BankSaladExpenseTransaction.id > after_id)
+                return query.order_by(BankSaladExpenseTransaction.id).all()
         except SQLAlchemyError as e:
             logger.error(f"Database error while fetching records: {e}")
             return []
 
+    def get_data_frame_filtered_by_user_identifier(self, user_identifier: str, after_id: int | None = None) -> DataFrame | None:
+        """
+        Read records as a DataFrame of columns. No ORM object is built. It is for a batch conversion of a whole history.
+        See |get_all_filtered_by_user_identifier| for |after_id|.
+        """
+        table = BankSaladExpenseTransaction.__table__
+        statement = sqlalchemy.select(table).where(table.c.user_identifier == user_identifier)
+        if after_id is not None:
+            statement = statement.where(table.c.id > after_id)
+        statement = statement.order_by(table.c.id)
+        try:
+            with self.db_connection.engine.connect() as conn:
+                return pandas.read_sql(statement, conn)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while fetching records: {e}")
+            return None
+
+    def get_max_id(self) -> int | None:
+        """
+        Returns:
+            The greatest id of all users. It is read from the primary key index. None if the table is empty or there is an error.
+        """
+        table = BankSaladExpenseTransaction.__table__
+        try:
+            with self.db_connection.engine.connect() as conn:
+                return conn.execute(sqlalchemy.select(sqlalchemy.func.max(table.c.id))).scalar()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while fetching the max id: {e}")
+            return None
+
 
 class BankSaladExpenseTransactionImporter:
 
+    DEFAULT_CHUNK_SIZE = 1000
+    COUNT_COLUMNS = 10  # From the date to `memo1`
+
     def __init__(self):
         pass
 
     def import_from_file(
         self, input_file_path: str, user_identifier: str
     ) -> list[BankSaladExpenseTransaction]:
+        list_of_expense_transaction = []
+        for chunk in self.iter_chunks_from_file(input_file_path, user_identifier):
+            list_of_expense_transaction.extend(chunk)
+        logger.info(
+            f"The length of list_of_expense_transaction is ({len(list_of_expense_transaction)})."
+        )
+        return list_of_expense_transaction
+
+    def iter_chunks_from_file(
+        self, input_file_path: str, user_identifier: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[list[BankSaladExpenseTransaction]]:
+        """
+        Yield lists of up to |chunk_size| transactions. The sheet is read row by row in the read-only mode of openpyxl.
+        So, the memory does not depend on the size of a file. Nothing is yielded if the file cannot be read.
+        """
         logger.info(f"Try to import from a file path ({input_file_path})...")
         try:
-            fp = open(input_file_path, "rb")
-            # One is going to pass it as an integer also as an index 0(0-indexed).
-            # That means the second sheet.
-            # Its original name MAY be '가계부 내역' in Korean.
-            const_sheet_name = 1
-            # Read an Excel file into a pandas DataFrame.
-            # Also, read the row 0(0-indexed) to use for the column labels of the parsed DataFrame.
-            df = pandas.read_excel(fp, sheet_name=const_sheet_name)
-            fp.close()
+            workbook = openpyxl.load_workbook(input_file_path, read_only=True, data_only=True)
         except IOError as e:
             logger.error("An IO error has been occurred.")
             logger.error(e)
-            return None
-        return self._bulid_expense_transaction(df, user_identifier)
+            return
+        try:
+            # One is going to use an index 1(0-indexed). That means the second sheet.
+            # Its original name MAY be '가계부 내역' in Korean.
+            const_sheet_index = 1
+            worksheet = workbook.worksheets[const_sheet_index]
+            # Dimensions which are written by an exporter may be wrong. Then, rows would be cut off.
+            worksheet.reset_dimensions()
+            current_datetime = datetime.datetime.now(datetime.timezone.utc)
+            # The row 1(1-indexed) has column labels.
+            rows = worksheet.iter_rows(min_row=2, max_col=self.COUNT_COLUMNS, values_only=True)
+            transactions = (
+                self._build_expense_transaction(row, user_identifier, current_datetime)
+                for row in rows
+                if any(value is not None for value in row)
+            )
+            yield from tt.streaming_pipeline.iter_chunks(transactions, chunk_size)
+        finally:
+            # A workbook in the read-only mode keeps its file open.
+            workbook.close()
 
-    def _bulid_expense_transaction(
-        self, df: DataFrame, user_identifier: str
-    ) -> list[BankSaladExpenseTransaction]:
-        current_datetime = datetime.datetime.now(datetime.timezone.utc)
-        list_of_expense_transaction = []
-        for row in df.itertuples(index=True, name=None):
-            t = BankSaladExpenseTransaction()
-            # 1-indexed. not 0-indexed.
-            transaction_date = row[1].date()
-            transaction_time = row[2]
-            t.transaction_datetime = datetime.datetime(
-                year=transaction_date.year,
-                month=transaction_date.month,
-                day=transaction_date.day,
-            ) + datetime.timedelta(
-                hours=transaction_time.hour,
-                minutes=transaction_time.minute,
-                seconds=transaction_time.second,
-            )  # Python datetime.datetime
-            t.type = row[3]
-            t.category0 = row[4]
-            t.category1 = row[5]
-            t.memo0 = row[6]
-            t.amount = row[7]
-            t.currency = row[8]
-            t.account = row[9]
-            if pandas.isna(row[10]):
-                t.memo1 = None
-            else:
-                t.memo1 = row[10]
-            t.user_identifier = user_identifier
-            t.imported_at = current_datetime
-            list_of_expense_transaction.append(t)
-
-        logger.info(
-            f"The length of list_of_expense_transaction is ({len(list_of_expense_transaction)})."
-        )
-        return list_of_expense_transaction
+    def _build_expense_transaction(
+        self, row: tuple, user_identifier: str, current_datetime: datetime.datetime
+    ) -> BankSaladExpenseTransaction:
+        t = BankSaladExpenseTransaction()
+        # 0-indexed.
+        transaction_date = row[0]
+        if isinstance(transaction_date, datetime.datetime):
+            transaction_date = transaction_date.date()
+        transaction_time = row[1]
+        t.transaction_datetime = datetime.datetime(
+            year=transaction_date.year,
+            month=transaction_date.month,
+            day=transaction_date.day,
+        ) + datetime.timedelta(
+            hours=transaction_time.hour,
+            minutes=transaction_time.minute,
+            seconds=transaction_time.second,
+        )  # Python datetime.datetime
+        t.type = row[2]
+        t.category0 = row[3]
+        t.category1 = row[4]
+        t.memo0 = row[5]
+        t.amount = row[6]
+        t.currency = row[7]
+        t.account = row[8]
+        t.memo1 = row[9]  # An empty cell is None.
+        t.user_identifier = user_identifier
+        t.imported_at = current_datetime
+        return t
 
 
 class BankSaladExpenseTransactionControl:
@@ -218,52 +294,35 @@ class BankSaladExpenseTransactionControl:
         self.db_impl = BankSaladExpenseTransactionDBImpl(db_connection)
         self.importer = BankSaladExpenseTransactionImporter()
 
-    def _import_from_file(
-        self, input_file_path: str, user_identifier: str
-    ) -> list[BankSaladExpenseTransaction]:
-        return self.importer.import_from_file(input_file_path, user_identifier)
-
-    def _get_list_of_expense_transaction_to_be_appended(
-        self, source_list: list[BankSaladExpenseTransaction], user_identifier: str
-    ) -> list[BankSaladExpenseTransaction]:
-        """
-        Here,
-        `target_list` is a list which was read from a DB;
-        `source_list` is a list which was read from a file.
-        """
-        target_list = self.db_impl.get_all_filtered_by_user_identifier(user_identifier)
-        len_target = len(target_list)
-        len_source = len(source_list)
-        logger.info(f"The length of target_list is ({len_target})")
-        logger.info(f"The length of source_list is ({len_source})")
-        set_target = set(target_list)
-        set_source = set(source_list)
-        # Find element in set_source that are not in set_target
-        difference_set = set_source - set_target
-        list_to_return = list(difference_set)
-        len_of_list_to_return = len(list_to_return)
-        logger.info(f"The length of list_to_return is ({len_of_list_to_return})")
-        return list_to_return
-
     def import_and_append_from_file(
         self, input_file_path: str, user_identifier: str
     ) -> bool:
-        list_of_bank_salad_expense_transaction = self._import_from_file(
-            input_file_path, user_identifier
-        )
-        if not list_of_bank_salad_expense_transaction:
-            return False
+        """
+        Read a file and insert records in chunks of |db_impl.chunk_size_for_bulk_insert| rows.
+        A chunk is inserted before the next one is read. So, the memory does not depend on the size of a file.
+        """
         # Create a table if needed. Insert records.
         if not self.db_impl.create_table():
             return False
-        list_of_expense_transaction_to_be_appended = (
-            self._get_list_of_expense_transaction_to_be_appended(
-                list_of_bank_salad_expense_transaction, user_identifier
-            )
-        )
-        if not self.db_impl.insert_records(list_of_expense_transaction_to_be_appended):
+        count_read = 0
+        count_inserted = 0
+        # Records which are there already are skipped by the unique index of `content_hash`.
+        # So, existing records of |user_identifier| are not read.
+        for chunk in self.importer.iter_chunks_from_file(input_file_path, user_identifier, self.db_impl.chunk_size_for_bulk_insert):
+            (result, count_inserted_of_chunk) = self.db_impl.insert_records(chunk)
+            count_inserted += count_inserted_of_chunk
+            if not result:
+                return False
+            count_read += len(chunk)
+            logger.info(f"Read ({count_read}) rows. Inserted ({count_inserted}) rows into ({BankSaladExpenseTransaction.__tablename__}).")
+        if count_read == 0:
             return False
+        logger.info(f"The number of appended records is ({count_inserted}).")
         return True
 
     def delete(self) -> bool:
+        # Ids start over in a new table. So, watermarks of expense transactions would skip records of it. Reset them.
+        # It is imported here, because `tt.expense_transaction` imports this module.
+        from tt.expense_transaction import ExpenseTransactionWatermarkDBImpl
+        ExpenseTransactionWatermarkDBImpl(self.db_impl.db_connection).drop_table()
         return self.db_impl.drop_table()
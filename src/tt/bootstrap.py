@@ -1,4 +1,3 @@
-import mariadb
 from loguru import logger
 
 
@@ -10,6 +9,6 @@ class BootstrapControl:
     def bootstrap(sel, db_connection) -> None:
         database_name = db_connection.database_name
         cursor = db_connection.conn.cursor()
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database_name} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;")
+        db_connection.backend.create_database(cursor, database_name)
         db_connection.conn.commit()
         cursor.close()
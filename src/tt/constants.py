@@ -7,3 +7,4 @@ class Constants:
     input_data_dir_path = os.path.join(".", "data", "active")
     output_data_dir_path = os.path.join(".", "output")
     config_dir_path = os.path.join(".", "config", "active")
+    cache_dir_path = os.path.join(".", "cache")
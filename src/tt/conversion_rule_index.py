@@ -0,0 +1,134 @@
+"""
+An index of `rules` of `conversion_rule.yaml`.
+
+A rule matches a Bank Salad transaction if every field which it specifies in `source` equals the field of the transaction.
+A field which is missing or empty - i.e. `memo0: ""` - matches anything. The first rule which matches wins.
+
+Rules are grouped by the tuple of fields which they specify. A group is a dictionary of the values of those fields => the first rule.
+So, a lookup probes one dictionary per group, instead of testing every rule.
+Histories are repetitive - i.e. the same merchant recurs thousands of times. So, results are memoized per values of the fields in an LRU cache.
+
+For a whole history, |ConversionRuleIndex.categorize_data_frame| does the same with a join per group instead of a lookup per row.
+"""
+
+import functools
+
+import numpy
+import pandas
+from pandas import DataFrame
+
+from tt.bank_salad_expense_transaction import BankSaladExpenseTransaction
+
+LIST_OF_SOURCE_FIELD_NAMES = ["type", "category0", "category1", "memo0", "account", "memo1"]
+
+
+class ConversionRuleIndex:
+
+    DEFAULT_MAX_CACHED_KEYS = 65536
+
+    def __init__(self, list_of_rules: list[dict], max_cached_keys: int = DEFAULT_MAX_CACHED_KEYS):
+        self.list_of_rules = list_of_rules
+        # (Positions of fields of |LIST_OF_SOURCE_FIELD_NAMES| which rules of a group specify, The position of the first rule of the group,
+        # Values => The position of a rule)
+        # They are sorted by the position of the first rule. So, a lookup stops at a group which cannot have an earlier rule.
+        self.list_of_groups = []
+        # Values of |LIST_OF_SOURCE_FIELD_NAMES| => The position of a rule or None. It lives as long as the index. So, it is invalidated with rules.
+        self._find_position = functools.lru_cache(maxsize=max_cached_keys)(self._find_position_without_cache)
+        self._build()
+
+    def _build(self) -> None:
+        group_table = {}  # Positions of fields => (The position of the first rule, Values => The position of a rule)
+        for (position, rule) in enumerate(self.list_of_rules):
+            source = rule["source"]
+            field_indexes = tuple(index for (index, field_name) in enumerate(LIST_OF_SOURCE_FIELD_NAMES) if source.get(field_name))
+            values = tuple(source[LIST_OF_SOURCE_FIELD_NAMES[index]] for index in field_indexes)
+            if field_indexes not in group_table:
+                group_table[field_indexes] = (position, {})
+            # The first rule of the same values wins.
+            group_table[field_indexes][1].setdefault(values, position)
+        self.list_of_groups = sorted(
+            ((field_indexes, first_position, value_table) for (field_indexes, (first_position, value_table)) in group_table.items()),
+            key=lambda group: group[1],
+        )
+
+    def find(self, s: BankSaladExpenseTransaction) -> dict | None:
+        """
+        Returns:
+            The first rule which matches |s|. None if there is no such a rule.
+        """
+        position = self._find_position(tuple(getattr(s, field_name) for field_name in LIST_OF_SOURCE_FIELD_NAMES))
+        if position is None:
+            return None
+        return self.list_of_rules[position]
+
+    def get_cache_info(self):
+        """
+        Returns:
+            `functools._CacheInfo` - hits, misses, maxsize and currsize - of lookups since the index has been built.
+        """
+        return self._find_position.cache_info()
+
+    def _find_position_without_cache(self, values_of_transaction: tuple) -> int | None:
+        position_found = None
+        for (field_indexes, first_position, value_table) in self.list_of_groups:
+            if position_found is not None and first_position >= position_found:
+                break
+            position = value_table.get(tuple(values_of_transaction[index] for index in field_indexes))
+            if position is not None and (position_found is None or position < position_found):
+                position_found = position
+        return position_found
+
+    def categorize_data_frame(self, df: DataFrame, default_category0: str) -> DataFrame:
+        """
+        Categorize all rows of |df| at once. The result of a row is the same as the one of |find| for the row.
+
+        Args:
+            df: Columns of |LIST_OF_SOURCE_FIELD_NAMES| of Bank Salad transactions
+            default_category0: `category0` of a row which no rule matches
+
+        Returns:
+            `category0`, `category1`, `memo0` and `memo1` of expense transactions, with the index of |df|.
+            `memo0` and `memo1` are None if no rule matches. See |ExpenseTransactionControl._get_category|.
+        """
+        position_of_no_rule = len(self.list_of_rules)
+        # Values are compared as Python objects - i.e. not as strings of pandas - as |find| does.
+        df_of_keys = df[LIST_OF_SOURCE_FIELD_NAMES].astype(object).reset_index(drop=True)
+        positions = numpy.full(len(df), position_of_no_rule, dtype=numpy.int64)
+        for (field_indexes, first_position, value_table) in self.list_of_groups:
+            if not field_indexes:
+                # A rule which specifies no field matches every row.
+                positions = numpy.minimum(positions, first_position)
+                continue
+            field_names = [LIST_OF_SOURCE_FIELD_NAMES[index] for index in field_indexes]
+            df_of_rules = DataFrame(list(value_table.keys()), columns=field_names, dtype=object)
+            df_of_rules["position"] = list(value_table.values())
+            # Values are unique per a group. So, a left join keeps rows and their order.
+            df_joined = df_of_keys[field_names].merge(df_of_rules, how="left", on=field_names)
+            positions = numpy.minimum(positions, df_joined["position"].fillna(position_of_no_rule).to_numpy(dtype=numpy.int64))
+
+        flags_of_match = positions < position_of_no_rule
+        list_of_targets = [rule["target"] for rule in self.list_of_rules]
+        target_category0 = numpy.array([target["category0"] for target in list_of_targets] + [default_category0], dtype=object)
+        target_category1 = numpy.array([target.get("category1") for target in list_of_targets] + [None], dtype=object)
+        # A rule without `category1` keeps `category1` of a row.
+        flags_of_keeping_category1 = numpy.array(["category1" not in target for target in list_of_targets] + [False])[positions]
+        return DataFrame(
+            {
+                "category0": target_category0[positions],
+                "category1": numpy.where(flags_of_keeping_category1, to_objects(df["category1"]), target_category1[positions]),
+                "memo0": numpy.where(flags_of_match, to_objects(df["memo0"]), None),
+                "memo1": numpy.where(flags_of_match, to_objects(df["memo1"]), None),
+            },
+            index=df.index,
+            dtype=object,  # Not strings of pandas. So, None is kept.
+        )
+
+
+def to_objects(series) -> numpy.ndarray:
+    """
+    Returns:
+        Values of |series| as Python objects. A missing value - i.e. NaN of a string column of pandas - is None, as it is NULL in a DB.
+    """
+    values = series.to_numpy(dtype=object, copy=True)
+    values[pandas.isna(values)] = None
+    return values
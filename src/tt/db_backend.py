@@ -0,0 +1,119 @@
+"""
+Storage backends of |DBConnection|. A backend is selected with `database.backend` of `global_config.yaml`.
+
+    - mariadb: A MariaDB server. It is the default. See the `mariadb` section.
+    - sqlite: An embedded SQLite file in WAL mode. See the `sqlite` section. No server is needed.
+
+ORM-based DB impl classes are portable as they are. DB impl classes which run SQL directly take
+dialect-specific pieces - i.e. `INSERT IGNORE`, an auto-increment primary key - from |DBImplBase.backend|.
+Both DBAPI drivers use the `?` parameter style. So, parameterized statements are shared.
+"""
+
+import os
+import sqlite3
+
+import mariadb
+from loguru import logger
+
+from tt.constants import Constants
+
+# Errors of all DBAPI drivers. DB impl classes catch them instead of errors of a single driver.
+DATABASE_ERRORS = (mariadb.Error, sqlite3.Error)
+
+
+class MariaDBBackend:
+
+    name = "mariadb"
+    auto_increment_primary_key = "bigint auto_increment primary key"
+    insert_ignore = "INSERT IGNORE"
+    insert_ignore_prefix = "IGNORE"  # For `sqlalchemy.insert().prefix_with()`
+    start_transaction_sql_string = "START TRANSACTION;"
+    table_options = " CHARACTER SET 'utf8mb4'"
+    flag_supports_load_data = True  # `LOAD DATA LOCAL INFILE`
+
+    def create_database(self, cur, database_name: str) -> None:
+        cur.execute(f"CREATE DATABASE IF NOT EXISTS {database_name} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;")
+
+    def use_database(self, cur, database_name: str) -> None:
+        cur.execute("USE" + " " + database_name)
+
+    def add_column_if_not_exists(self, cur, table_name: str, column_name: str, column_definition: str) -> None:
+        cur.execute(f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {column_name} {column_definition};")
+
+    def set_autocommit(self, driver_connection) -> None:
+        driver_connection.autocommit = True
+
+    def get_unbuffered_cursor(self, connection):
+        return connection.cursor(buffered=False)
+
+
+class SQLiteBackend:
+
+    name = "sqlite"
+    auto_increment_primary_key = "integer primary key autoincrement"
+    insert_ignore = "INSERT OR IGNORE"
+    insert_ignore_prefix = "OR IGNORE"  # For `sqlalchemy.insert().prefix_with()`
+    # The write lock is taken at the start. A deferred transaction which has read first fails with "database is locked"
+    # on its first write if another connection has written in between.
+    start_transaction_sql_string = "BEGIN IMMEDIATE;"
+    table_options = ""
+    flag_supports_load_data = False
+
+    DEFAULT_FILE_PATH = os.path.join(Constants.input_data_dir_path, "finance.sqlite3")
+    # Run on every new connection. WAL lets readers run during a write, and `synchronous=NORMAL` syncs on checkpoints only.
+    # It is safe in WAL mode. A power loss may lose the last commits, but never corrupts the file.
+    LIST_OF_PRAGMA_SQL_STRINGS = [
+        "PRAGMA journal_mode=WAL;",
+        "PRAGMA synchronous=NORMAL;",
+        "PRAGMA temp_store=MEMORY;",
+        "PRAGMA cache_size=-65536;",  # KiB. i.e. 64 MiB
+        "PRAGMA busy_timeout=5000;",  # Milliseconds
+    ]
+
+    def create_database(self, cur, database_name: str) -> None:
+        # The file is the database. It has been created on the connection.
+        pass
+
+    def use_database(self, cur, database_name: str) -> None:
+        pass
+
+    def add_column_if_not_exists(self, cur, table_name: str, column_name: str, column_definition: str) -> None:
+        cur.execute(f"PRAGMA table_info({table_name});")
+        set_of_column_names = {row[1] for row in cur.fetchall()}
+        if column_name not in set_of_column_names:
+            cur.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_definition};")
+
+    def set_autocommit(self, driver_connection) -> None:
+        # No implicit transaction. A transaction is opened with |start_transaction_sql_string| as on MariaDB.
+        driver_connection.isolation_level = None
+
+    def get_unbuffered_cursor(self, connection):
+        # A cursor of `sqlite3` steps through rows on demand already.
+        return connection.cursor()
+
+    def apply_pragmas(self, dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for sql_string in self.LIST_OF_PRAGMA_SQL_STRINGS:
+            cursor.execute(sql_string)
+        cursor.close()
+
+
+# A name in `global_config.yaml` => A backend class
+BACKEND_TABLE = {
+    MariaDBBackend.name: MariaDBBackend,
+    SQLiteBackend.name: SQLiteBackend,
+}
+
+
+def build_backend(global_config_ir: dict):
+    """
+    Returns:
+        A backend of `database.backend` of |global_config_ir|. |MariaDBBackend| if it is not given. None if it is unknown.
+    """
+    database_config = (global_config_ir or {}).get("database") or {}
+    backend_name = database_config.get("backend", MariaDBBackend.name)
+    backend_class = BACKEND_TABLE.get(backend_name)
+    if backend_class is None:
+        logger.error(f"Unknown database backend: ({backend_name}). Expected one of ({', '.join(BACKEND_TABLE.keys())}).")
+        return None
+    return backend_class()
@@ -1,25 +1,116 @@
 import logging
+import os
+import sqlite3
 import sys
+import time
 from enum import Flag
 from urllib.parse import quote
 
 import mariadb
 import sqlalchemy
+import sqlalchemy.pool
 from loguru import logger
+from sqlalchemy import event
 from sqlalchemy.engine.url import URL
+from sqlalchemy.orm import sessionmaker
 
 import tt.log_control
+from tt.db_backend import DATABASE_ERRORS, SQLiteBackend, build_backend
+from tt.sql_profiler import SQLProfiler
+
+
+class DBConnectionPoolMetrics:
+    """Counters of a connection pool. See |DBConnection.get_pool_status|."""
+
+    def __init__(self):
+        self.count_connect = 0  # The number of DBAPI connections which have been opened
+        self.count_checkout = 0
+        self.count_checkin = 0
+        self.total_wait_seconds = 0.0  # Time spent in checkouts. It includes opening a new connection.
+        self.max_wait_seconds = 0.0
+
+    def attach(self, engine: sqlalchemy.engine.Engine) -> None:
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def record_wait(self, seconds: float) -> None:
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.count_connect += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.count_checkout += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        self.count_checkin += 1
+
+
+class MeasuredQueuePool(sqlalchemy.pool.QueuePool):
+    """A |QueuePool| which measures how long each checkout waits."""
+
+    metrics = None  # DBConnectionPoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # A pool is recreated on |Engine.dispose|. Keep counting.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def create_pooled_engine(url, pool_config: dict, metrics: DBConnectionPoolMetrics, **kwargs) -> sqlalchemy.engine.Engine:
+    """
+    Args:
+        pool_config: Optional keys of the `mariadb` or `sqlite` section of `global_config.yaml`.
+            pool_size, max_overflow, pool_timeout (seconds), pool_pre_ping (boolean), pool_recycle (seconds) and echo (boolean)
+    """
+    engine = sqlalchemy.create_engine(
+        url,
+        poolclass=MeasuredQueuePool,
+        pool_size=pool_config.get("pool_size", DBConnection.DEFAULT_POOL_SIZE),
+        max_overflow=pool_config.get("max_overflow", DBConnection.DEFAULT_MAX_OVERFLOW),
+        pool_timeout=pool_config.get("pool_timeout", DBConnection.DEFAULT_POOL_TIMEOUT),
+        pool_pre_ping=pool_config.get("pool_pre_ping", True),
+        pool_recycle=pool_config.get("pool_recycle", DBConnection.DEFAULT_POOL_RECYCLE),
+        echo=pool_config.get("echo", False),
+        **kwargs,
+    )
+    engine.pool.metrics = metrics
+    metrics.attach(engine)
+    return engine
 
 
 class DBConnection:
+    """
+    One pooled SQLAlchemy engine. ORM sessions come from a cached session factory of it.
+    |conn| is a raw DBAPI connection borrowed from the same pool, for DB impl classes which run SQL directly.
+    """
+
+    DEFAULT_POOL_SIZE = 5
+    DEFAULT_MAX_OVERFLOW = 10
+    DEFAULT_POOL_TIMEOUT = 30  # Seconds
+    DEFAULT_POOL_RECYCLE = 3600  # Seconds. It is shorter than `wait_timeout` of MariaDB.
 
     def __init__(self, global_config_ir):
-        self.alchemy_conn = None
-        self.conn = None
+        self.conn = None  # A raw DBAPI connection borrowed from |engine|'s pool
         self.database_name = "finance"
         self.engine = None  # An SQLAlchemy engine.
         self.global_config_ir = global_config_ir
         self.flag_database_exists = True
+        self.pool_metrics = DBConnectionPoolMetrics()
+        self.session_factory = None  # Built on the first use. See |get_session_factory|.
+        self.sql_profiler = SQLProfiler(global_config_ir.get("sql_profiler") if global_config_ir else None)
+        self.backend = build_backend(global_config_ir)  # See |tt.db_backend|.
 
     def do_initial_setup(self):
         self.connect()
@@ -28,29 +119,97 @@ class DBConnection:
 
     def connect(self):
         assert self.global_config_ir is not None
-        host = self.global_config_ir["mariadb"]["host"]
-        port = self.global_config_ir["mariadb"]["port"]  # Integer
-        user = self.global_config_ir["mariadb"]["user"]
-        password = self.global_config_ir["mariadb"]["password"]
+        if self.backend is None:
+            sys.exit(-1)
+        if self.backend.name == SQLiteBackend.name:
+            self._connect_to_sqlite()
+        else:
+            self._connect_to_mariadb()
+
+    def _connect_to_mariadb(self):
+        mariadb_config = self.global_config_ir["mariadb"]
+        host = mariadb_config["host"]
+        port = mariadb_config["port"]  # Integer
+        user = mariadb_config["user"]
+        password = mariadb_config["password"]
+        # It is needed by `LOAD DATA LOCAL INFILE`. See |SimpleTransactionDBImpl.flag_use_load_data|.
+        local_infile = mariadb_config.get("local_infile", False)  # Boolean
+        connect_args = {"local_infile": local_infile}
+        encoded_password = quote(password)
+        connection_string = f"mariadb+mariadbconnector://{user}:{encoded_password}@{host}:{port}"
         try:
-            self.conn = mariadb.connect(
-                host=host, port=port, user=user, password=password
+            # The database may not exist yet. i.e. Before `bootstrap database`
+            self.engine = create_pooled_engine(connection_string, mariadb_config, self.pool_metrics, connect_args=connect_args)
+            self.sql_profiler.attach(self.engine)
+            self._redirect_sqlalchemy_logging_to_loguru()
+            self._borrow_raw_connection()
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME = ?", (self.database_name,))
+            result = cursor.fetchone()
+            cursor.close()
+            if not result:
+                self.flag_database_exists = False
+                return
+            # Bind the engine to the database. So, ORM sessions need no `USE`.
+            self.conn.close()
+            self.engine.dispose()
+            self.engine = create_pooled_engine(
+                f"{connection_string}/{self.database_name}", mariadb_config, self.pool_metrics, connect_args=connect_args
             )
-            self.conn.autocommit = True
-        except mariadb.Error as e:
+            self.sql_profiler.attach(self.engine)
+            self._borrow_raw_connection()
+        except (mariadb.Error, sqlalchemy.exc.DBAPIError) as e:
             logger.error(f"Error connecting to the database system: {e}")
             sys.exit(-1)
-        cursor = self.conn.cursor()
-        cursor.execute(f"SELECT SCHEMA_NAME FROM INFORMATION_SCHEMA.SCHEMATA WHERE SCHEMA_NAME = '{self.database_name}'")
-        result = cursor.fetchone()
-        if not result:
-            self.flag_database_exists = False
-            return
-        encoded_password = quote(password)
-        connection_string = f"mariadb+mariadbconnector://{user}:{encoded_password}@{host}:{port}/{self.database_name}"
-        self.engine = sqlalchemy.create_engine(connection_string, echo=True)
-        self._redirect_sqlalchemy_logging_to_loguru()
-        self.alchemy_conn = self.engine.connect()
+
+    def _connect_to_sqlite(self):
+        sqlite_config = self.global_config_ir.get("sqlite") or {}
+        file_path = sqlite_config.get("file_path", SQLiteBackend.DEFAULT_FILE_PATH)
+        try:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            # `sqlite3` converts `date` columns into |datetime.date| for DB impl classes which run SQL directly.
+            # With `native_datetime`, SQLAlchemy accepts them as they are.
+            self.engine = create_pooled_engine(
+                f"sqlite:///{file_path}",
+                sqlite_config,
+                self.pool_metrics,
+                native_datetime=True,
+                connect_args={"detect_types": sqlite3.PARSE_DECLTYPES},
+            )
+            event.listen(self.engine, "connect", self.backend.apply_pragmas)
+            self.sql_profiler.attach(self.engine)
+            self._redirect_sqlalchemy_logging_to_loguru()
+            self._borrow_raw_connection()
+        except (OSError, sqlite3.Error, sqlalchemy.exc.DBAPIError) as e:
+            logger.error(f"Error opening the database file ({file_path}): {e}")
+            sys.exit(-1)
+
+    def _borrow_raw_connection(self):
+        self.conn = self.engine.raw_connection()
+        self.backend.set_autocommit(self.conn.driver_connection)
+
+    def get_session_factory(self) -> sessionmaker:
+        if self.session_factory is None:
+            self.session_factory = sessionmaker(bind=self.engine)
+        return self.session_factory
+
+    def get_pool_status(self) -> dict:
+        """
+        Returns:
+            The state of the pool and its counters - i.e. {"size": 5, "checked_out": 1, "count_checkout": 12, ...}
+        """
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "count_connect": self.pool_metrics.count_connect,
+            "count_checkout": self.pool_metrics.count_checkout,
+            "count_checkin": self.pool_metrics.count_checkin,
+            "total_wait_seconds": self.pool_metrics.total_wait_seconds,
+            "max_wait_seconds": self.pool_metrics.max_wait_seconds,
+        }
 
     def _redirect_sqlalchemy_logging_to_loguru(self):
         sa_logger = logging.getLogger("sqlalchemy.engine.Engine")
@@ -60,23 +219,39 @@ class DBConnection:
     def use_database(self):
         database_name = self.database_name
         cur = self.cur()
-        sql_string = "USE" + " " + database_name
         try:
-            cur.execute(sql_string)
-        except mariadb.Error as e:
+            self.backend.use_database(cur, database_name)
+        except DATABASE_ERRORS as e:
             logger.error(f"Error: {e}")
             sys.exit(-1)
 
     def commit(self):
         self.conn.commit()
 
+    def rollback(self):
+        self.conn.rollback()
+
     def close(self):
+        # It returns the raw connection to the pool. Then, all pooled connections are closed.
         self.conn.close()
         self.conn = None
+        pool_status = self.get_pool_status()
+        logger.debug(f"Connection pool: {pool_status}")
+        self.sql_profiler.record_pool_status(pool_status)
+        self.engine.dispose()
+        self.sql_profiler.save()
 
     def cur(self):
         assert self.conn is not None
-        return self.conn.cursor()
+        return self.sql_profiler.wrap_cursor(self.conn.cursor())
+
+    def unbuffered_cur(self):
+        """
+        Returns a cursor which fetches rows from the server on demand, instead of transferring a whole result set at once.
+        The connection cannot run another statement until all rows are fetched or the cursor is closed.
+        """
+        assert self.conn is not None
+        return self.sql_profiler.wrap_cursor(self.backend.get_unbuffered_cursor(self.conn))
 
     def is_in_valid_state(self) -> bool:
         return self.flag_database_exists
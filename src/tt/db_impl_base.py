@@ -1,28 +1,128 @@
 import datetime
+import hashlib
 import sys
+import time
+from typing import Callable, Iterable, Iterator
 
 import sqlalchemy
 from loguru import logger
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import SQLAlchemyError
 
+import tt.streaming_pipeline
+from tt.db_backend import DATABASE_ERRORS
 from tt.db_connection import DBConnection
 
 
 class DBImplBase:
 
+    DEFAULT_CHUNK_SIZE_FOR_BULK_INSERT = 1000
+
     def __init__(self, db_connection: DBConnection):
         self.const_default_table_charset = "utf8mb4"
         self.db_connection = db_connection
         self.table_name = None
+        self.chunk_size_for_bulk_insert = self.DEFAULT_CHUNK_SIZE_FOR_BULK_INSERT  # The number of rows per a commit of |bulk_insert|
 
     def handle_general_sql_execution_error(self, exception_object, sql_string):
         logger.error(f"Error executing the SQL. Error was: {exception_object}")
         logger.error(f"Error executing the SQL. SQL was: {sql_string}")
         sys.exit(1)
 
+    @property
+    def backend(self):
+        # Dialect-specific pieces of SQL. See |tt.db_backend|.
+        return self.db_connection.backend
+
     def _get_session(self):
-        Session = sessionmaker(bind=self.db_connection.engine)
-        return Session()
+        # The session factory is cached by |DBConnection|. So, all DB impl classes share one pooled engine.
+        return self.db_connection.get_session_factory()()
+
+    def bulk_insert(
+        self,
+        table: sqlalchemy.Table,
+        rows: Iterable[dict],
+        progress_callback: Callable[[int], None] | None = None,
+        flag_ignore_duplicates: bool = False,
+    ) -> tuple[bool, int]:
+        """
+        Insert rows with a Core `insert()` and `executemany`, |chunk_size_for_bulk_insert| rows at a time.
+        No ORM object is tracked by a session. Each chunk is committed on its own. So, the memory does not depend on the number of rows.
+        If a chunk fails, chunks which have been committed before it are kept.
+
+        Args:
+            rows: Dictionaries of column names => values. See |iter_row_dicts|.
+            progress_callback: It is called with the number of rows which have been committed so far, after each chunk.
+            flag_ignore_duplicates: If it is True, a row which violates a unique index - i.e. the same content hash - is skipped
+                by the database with |backend.insert_ignore|. So, no existing row has to be read to find new rows.
+
+        Returns:
+            (True if all rows have been inserted, The number of inserted rows)
+        """
+        count_processed = 0
+        count_inserted = 0
+        time_started = time.perf_counter()
+        statement = table.insert()
+        if flag_ignore_duplicates:
+            statement = statement.prefix_with(self.backend.insert_ignore_prefix)
+        for chunk in tt.streaming_pipeline.iter_chunks(rows, self.chunk_size_for_bulk_insert):
+            try:
+                with self.db_connection.engine.begin() as conn:
+                    result = conn.execute(statement, chunk)
+            except SQLAlchemyError as e:
+                logger.error(f"Error during record insertion into ({table.name}) after ({count_inserted}) rows: {e}")
+                return (False, count_inserted)
+            count_processed += len(chunk)
+            # Ignored rows are not counted by the driver.
+            count_inserted += result.rowcount if result.rowcount >= 0 else len(chunk)
+            if progress_callback is not None:
+                progress_callback(count_processed)
+        elapsed = time.perf_counter() - time_started
+        rows_per_second = count_processed / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Inserted ({count_inserted}) rows into ({table.name}) in {elapsed:.3f} s. ({rows_per_second:,.0f} rows/s)")
+        if count_processed > count_inserted:
+            logger.info(f"Skipped ({count_processed - count_inserted}) duplicate rows of ({table.name}).")
+        return (True, count_inserted)
+
+    def add_content_hash_column(self, table: sqlalchemy.Table, list_of_column_names: list[str]) -> bool:
+        """
+        Add `content_hash` and its unique index to a table which has been created before them.
+        Existing records are hashed once with |build_content_hash| of |list_of_column_names|.
+        A record whose content is there already keeps a NULL hash. A unique index allows NULLs.
+        """
+        (index,) = [index for index in table.indexes if index.columns.keys() == ["content_hash"]]
+        if "content_hash" in {column["name"] for column in sqlalchemy.inspect(self.db_connection.engine).get_columns(table.name)}:
+            index.create(self.db_connection.engine, checkfirst=True)
+            return True
+        logger.info(f"Add content_hash to ({table.name})...")
+        cur = self.db_connection.cur()
+        try:
+            self.backend.add_column_if_not_exists(cur, table.name, "content_hash", "char(32)")
+        except DATABASE_ERRORS as e:
+            logger.error(f"Error adding content_hash to ({table.name}): {e}")
+            return False
+        set_of_hashes = set()
+        list_of_updates = []
+        statement = (
+            sqlalchemy.update(table)
+            .where(table.c.id == sqlalchemy.bindparam("b_id"))
+            .values(content_hash=sqlalchemy.bindparam("b_content_hash"))
+        )
+        try:
+            with self.db_connection.engine.begin() as conn:
+                columns = [table.c.id] + [table.c[column_name] for column_name in list_of_column_names]
+                for (record_id, *values) in conn.execute(sqlalchemy.select(*columns).order_by(table.c.id)).all():
+                    content_hash = build_content_hash(values)
+                    if content_hash not in set_of_hashes:
+                        set_of_hashes.add(content_hash)
+                        list_of_updates.append({"b_id": record_id, "b_content_hash": content_hash})
+                for chunk in tt.streaming_pipeline.iter_chunks(list_of_updates, self.chunk_size_for_bulk_insert):
+                    conn.execute(statement, chunk)
+            index.create(self.db_connection.engine, checkfirst=True)
+        except SQLAlchemyError as e:
+            logger.error(f"Error hashing records of ({table.name}): {e}")
+            return False
+        logger.info(f"Hashed ({len(list_of_updates)}) records of ({table.name}).")
+        return True
 
     def _is_table_in_database(self, table_name: str) -> bool:
         # Use the inspector
@@ -69,3 +169,38 @@ class DBImplBase:
             return "NULL"
 
         return f"'{dt.strftime('%Y-%m-%d %H:%M:%S')}'"
+
+
+def iter_row_dicts(list_of_objects: Iterable, table: sqlalchemy.Table) -> Iterator[dict]:
+    """
+    Yields column names => values of ORM objects for |DBImplBase.bulk_insert|. An auto-increment primary key is left to the database.
+    """
+    list_of_column_names = [column.key for column in table.columns if not (column.primary_key and column.autoincrement)]
+    for obj in list_of_objects:
+        yield {column_name: getattr(obj, column_name) for column_name in list_of_column_names}
+
+
+def build_content_hash(values: Iterable) -> str:
+    """
+    Returns:
+        A hex digest of |values| for a `content_hash` column. NaN of pandas is hashed as NULL, as it is stored as NULL.
+    """
+    list_of_strings = []
+    for value in values:
+        if value is None or value != value:  # `value != value` is True for NaN only.
+            list_of_strings.append("\\N")
+        else:
+            list_of_strings.append(str(value))
+    key = "\x1f".join(list_of_strings)  # The unit separator does not appear in a field.
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def build_progress_logger(table_name: str, count_total: int) -> Callable[[int], None]:
+    """
+    Returns:
+        A progress callback of |DBImplBase.bulk_insert| which logs i.e. "Inserted (2000/12345) rows into (table_name)."
+    """
+    def log_progress(count_inserted: int) -> None:
+        logger.info(f"Inserted ({count_inserted}/{count_total}) rows into ({table_name}).")
+
+    return log_progress
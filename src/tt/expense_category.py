@@ -1,10 +1,10 @@
 import pprint
 import random
 
-import mariadb
 import yaml
 from loguru import logger
 
+from tt.db_backend import DATABASE_ERRORS
 from tt.db_connection import DBConnection
 from tt.db_impl_base import DBImplBase
 
@@ -71,11 +71,11 @@ class ExpenseCategoryDBImpl(DBImplBase):
             "name varchar(128) not null\n"
             ")\n"
         )
-        sql_string += f"CHARACTER SET '{self.const_default_table_charset}';"
+        sql_string += f"{self.backend.table_options};"
         logger.info(sql_string)
         try:
             cur.execute(sql_string)
-        except mariadb.Error as e:
+        except DATABASE_ERRORS as e:
             self.handle_general_sql_execution_error(e, sql_string)
             return False
         return True
@@ -84,34 +84,31 @@ class ExpenseCategoryDBImpl(DBImplBase):
         self, user_identifier: str
     ) -> list[ExpenseCategory]:
         cur = self.db_connection.cur()
-        escaped_user_identifier = self.escape_sql_string(user_identifier)
-        sql_string = f"SELECT user_identifier, uuid, name FROM {self.table_name} WHERE user_identifier={escaped_user_identifier}"
+        # Values are bound by the driver. So, they need no escaping on either backend.
+        sql_string = f"SELECT user_identifier, uuid, name FROM {self.table_name} WHERE user_identifier = ?"
         logger.info(sql_string)
         list_of_expense_category = []
         try:
-            cur.execute(sql_string)
+            cur.execute(sql_string, (user_identifier,))
             for user_identifier, uuid, name in cur:
                 expense_category = ExpenseCategory()
                 expense_category.user_identifier = user_identifier
                 expense_category.uuid = uuid
                 expense_category.name = name
                 list_of_expense_category.append(expense_category)
-        except mariadb.Error as e:
+        except DATABASE_ERRORS as e:
             self.handle_general_sql_execution_error(e, sql_string)
             return None
         return list_of_expense_category
 
     def insert_records(self, list_of_category: list[ExpenseCategory]) -> bool:
         cur = self.db_connection.cur()
+        sql_string = f"INSERT INTO {self.table_name} (user_identifier, uuid, name) VALUES (?, ?, ?)"
         for item in list_of_category:
-            escaped_user_identifier = self.escape_sql_string(item.user_identifier)
-            escaped_uuid = self.escape_sql_string(item.uuid)
-            escaped_name = self.escape_sql_string(item.name)
-            sql_string = f"INSERT INTO {self.table_name} (user_identifier, uuid, name) VALUES({escaped_user_identifier}, {escaped_uuid}, {escaped_name})"
-            logger.info(sql_string)
+            logger.info(f"{sql_string} {(item.user_identifier, item.uuid, item.name)}")
             try:
-                cur.execute(sql_string)
-            except mariadb.Error as e:
+                cur.execute(sql_string, (item.user_identifier, item.uuid, item.name))
+            except DATABASE_ERRORS as e:
                 self.handle_general_sql_execution_error(e, sql_string)
                 return False
         return True
@@ -122,7 +119,7 @@ class ExpenseCategoryDBImpl(DBImplBase):
         logger.info(sql_string)
         try:
             cur.execute(sql_string)
-        except mariadb.Error as e:
+        except DATABASE_ERRORS as e:
             self.handle_general_sql_execution_error(e, sql_string)
             return False
         return True
@@ -1,17 +1,23 @@
 #!/usr/bin/env python
+import copy
 import datetime
 import os
+from typing import Callable
 
+import pandas
 import sqlalchemy
 import yaml
 from loguru import logger
+from pandas import DataFrame
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
 
 from tt.bank_salad_expense_transaction import (
     BankSaladExpenseTransaction, BankSaladExpenseTransactionDBImpl)
+from tt.conversion_rule_index import ConversionRuleIndex
 from tt.db_connection import DBConnection
-from tt.db_impl_base import DBImplBase
+from tt.db_impl_base import (DBImplBase, build_content_hash,
+                             build_progress_logger, iter_row_dicts)
 
 Base = declarative_base()  # An sqlalchemy's base class.
 
@@ -19,9 +25,12 @@ Base = declarative_base()  # An sqlalchemy's base class.
 class ExpenseTransaction(Base):
 
     __tablename__ = "expense_transactions"
-    __table_args__ = {
-        "mysql_charset": "utf8mb4",
-    }
+    __table_args__ = (
+        sqlalchemy.Index("expense_transactions_content_hash", "content_hash", unique=True),
+        {
+            "mysql_charset": "utf8mb4",
+        },
+    )
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True, autoincrement=True)
     amount = sqlalchemy.Column(sqlalchemy.Integer)
     category0 = sqlalchemy.Column(sqlalchemy.String(128))
@@ -34,8 +43,13 @@ class ExpenseTransaction(Base):
     target_account = sqlalchemy.Column(sqlalchemy.String(128))
     transaction_datetime = sqlalchemy.Column(sqlalchemy.DateTime)  # KST
     user_identifier = sqlalchemy.Column(sqlalchemy.String(128))
+    content_hash = sqlalchemy.Column(sqlalchemy.CHAR(32))  # See |get_content_hash|.
 
     CORE_FIELD_LENGTH = 10  # The length of items - account, amount, etc.
+    # Fields of `__eq__`. They are hashed into `content_hash`.
+    LIST_OF_CONTENT_HASH_COLUMN_NAMES = [
+        "amount", "currency", "source_account", "target_account", "transaction_datetime", "user_identifier",
+    ]
 
     def __init__(self):
         self.amount = 0
@@ -49,6 +63,7 @@ class ExpenseTransaction(Base):
         self.target_account = None
         self.transaction_datetime = None  # datetime.datetime. KST.
         self.user_identifier = None
+        self.content_hash = None
 
     def __str__(self):
         return f"transaction_datetime({self.transaction_datetime}) category0({self.category0}) category1({self.category1}) memo0({self.memo0}) memo1({self.memo1}) amount({self.amount}) currency({self.currency}) source_account({self.source_account}) target_account({self.target_account}) user_identifier({self.user_identifier})"
@@ -85,6 +100,12 @@ class ExpenseTransaction(Base):
             )
         )
 
+    def get_content_hash(self) -> str:
+        """
+        A persisted `__hash__`. Equal transactions have the same content hash. So, the unique index of `content_hash` skips them.
+        """
+        return build_content_hash(getattr(self, column_name) for column_name in self.LIST_OF_CONTENT_HASH_COLUMN_NAMES)
+
 
 class ExpenseTransactionDBImpl(DBImplBase):
 
@@ -93,6 +114,7 @@ class ExpenseTransactionDBImpl(DBImplBase):
 
     def create_table(self) -> bool:
         if self._is_table_in_database(ExpenseTransaction.__tablename__):
+            self.add_content_hash_column(ExpenseTransaction.__table__, ExpenseTransaction.LIST_OF_CONTENT_HASH_COLUMN_NAMES)
             return False
         ExpenseTransaction.__table__.create(self.db_connection.engine)
         return True
@@ -103,18 +125,24 @@ class ExpenseTransactionDBImpl(DBImplBase):
         ExpenseTransaction.__table__.drop(self.db_connection.engine)
         return True
 
-    def insert_records(self, list_of_transaction: list[ExpenseTransaction]) -> bool:
-        session = self._get_session()
-        try:
-            session.add_all(list_of_transaction)
-            session.commit()
-            return True
-        except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Error during record insertion: {e}")
-            return False
-        finally:
-            session.close()
+    def insert_records(
+        self, list_of_transaction: list[ExpenseTransaction], progress_callback: Callable[[int], None] | None = None
+    ) -> tuple[bool, int]:
+        """
+        Insert records in chunks with a Core `insert()`. See |DBImplBase.bulk_insert|.
+        A record whose content hash is in the table already is skipped by the database.
+
+        Returns:
+            (True if all records have been processed, The number of inserted records)
+        """
+        for t in list_of_transaction:
+            t.content_hash = t.get_content_hash()
+        return self.bulk_insert(
+            ExpenseTransaction.__table__,
+            iter_row_dicts(list_of_transaction, ExpenseTransaction.__table__),
+            progress_callback,
+            flag_ignore_duplicates=True,
+        )
 
     def get_all_filtered_by_user_identifier(
         self, user_identifier: str
@@ -130,40 +158,114 @@ class ExpenseTransactionDBImpl(DBImplBase):
             logger.error(f"Database error while fetching records: {e}")
             return []
 
+    def delete_all_filtered_by_user_identifier(self, user_identifier: str) -> bool:
+        table = ExpenseTransaction.__table__
+        try:
+            with self.db_connection.engine.begin() as conn:
+                result = conn.execute(sqlalchemy.delete(table).where(table.c.user_identifier == user_identifier))
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while deleting records: {e}")
+            return False
+        logger.info(f"Deleted ({result.rowcount}) records of ({user_identifier}) from ({table.name}).")
+        return True
+
+
+class ExpenseTransactionWatermark(Base):
+    """
+    The last Bank Salad expense transaction which has been converted for a user.
+    Bank Salad expense transactions after it are converted by the next run. See |ExpenseTransactionControl.import_and_append_from_database|.
+    """
+
+    __tablename__ = "expense_transaction_watermarks"
+    __table_args__ = {
+        "mysql_charset": "utf8mb4",
+    }
+    user_identifier = sqlalchemy.Column(sqlalchemy.String(128), primary_key=True)
+    last_bank_salad_expense_transaction_id = sqlalchemy.Column(sqlalchemy.Integer)
+    updated_at = sqlalchemy.Column(sqlalchemy.DateTime)  # UTC
+
+    def __init__(self):
+        self.user_identifier = None
+        self.last_bank_salad_expense_transaction_id = None
+        self.updated_at = None  # UTC
+
+
+class ExpenseTransactionWatermarkDBImpl(DBImplBase):
+
+    def __init__(self, db_connection):
+        super().__init__(db_connection)
+
+    def create_table(self) -> bool:
+        if self._is_table_in_database(ExpenseTransactionWatermark.__tablename__):
+            return False
+        ExpenseTransactionWatermark.__table__.create(self.db_connection.engine)
+        return True
+
+    def drop_table(self) -> bool:
+        if not self._is_table_in_database(ExpenseTransactionWatermark.__tablename__):
+            return False
+        ExpenseTransactionWatermark.__table__.drop(self.db_connection.engine)
+        return True
+
+    def get_last_id(self, user_identifier: str) -> int | None:
+        """
+        Returns:
+            The id of the last converted Bank Salad expense transaction of |user_identifier|. None if nothing has been converted.
+        """
+        try:
+            with self._get_session() as session:
+                watermark = session.get(ExpenseTransactionWatermark, user_identifier)
+                return None if watermark is None else watermark.last_bank_salad_expense_transaction_id
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while fetching a watermark: {e}")
+            return None
+
+    def set_last_id(self, user_identifier: str, last_id: int | None) -> bool:
+        """
+        Args:
+            last_id: None resets the watermark. Then, the next conversion reads all records.
+        """
+        try:
+            with self._get_session() as session:
+                watermark = session.get(ExpenseTransactionWatermark, user_identifier)
+                if last_id is None:
+                    if watermark is not None:
+                        session.delete(watermark)
+                else:
+                    if watermark is None:
+                        watermark = ExpenseTransactionWatermark()
+                        watermark.user_identifier = user_identifier
+                        session.add(watermark)
+                    watermark.last_bank_salad_expense_transaction_id = last_id
+                    watermark.updated_at = datetime.datetime.now(datetime.timezone.utc)
+                session.commit()
+                return True
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while saving a watermark: {e}")
+            return False
+
 
 class ExpenseTransactionControl:
 
+    DEFAULT_CATEGORY0 = "카테고리 없음"  # `category0` of a transaction which no rule matches
+
     def __init__(self, db_connection: DBConnection):
         self.db_impl = ExpenseTransactionDBImpl(db_connection)
         self.conversion_rule = self._load_conversion_rule()
+        self.rule_index = None  # ConversionRuleIndex of |snapshot_of_rules|. Its cache is kept across conversions.
+        self.snapshot_of_rules = None  # A copy of rules which |rule_index| has been built from
         self.bank_salad_expense_transaction_db_impl = BankSaladExpenseTransactionDBImpl(
             db_connection
         )
+        self.watermark_db_impl = ExpenseTransactionWatermarkDBImpl(db_connection)
 
     def _get_all_records_of_bank_salad_expense_transaction(
-        self, user_identifier: str
+        self, user_identifier: str, after_id: int | None = None
     ) -> list[BankSaladExpenseTransaction]:
         return self.bank_salad_expense_transaction_db_impl.get_all_filtered_by_user_identifier(
-            user_identifier
+            user_identifier, after_id
         )
 
-    def _get_list_of_expense_transaction_to_be_appended(
-        self, source_list: list[ExpenseTransaction], user_identifier: str
-    ) -> list[ExpenseTransaction]:
-        target_list = self.db_impl.get_all_filtered_by_user_identifier(user_identifier)
-        len_target = len(target_list)
-        len_source = len(source_list)
-        logger.info(f"The length of target_list is ({len_target})")
-        logger.info(f"The length of source_list is ({len_source})")
-        set_target = set(target_list)
-        set_source = set(source_list)
-        # Find element in set_source that are not in set_target
-        difference_set = set_source - set_target
-        list_to_return = list(difference_set)
-        len_of_list_to_return = len(list_to_return)
-        logger.info(f"The length of list_to_return is ({len_of_list_to_return})")
-        return list_to_return
-
     def _load_conversion_rule(self) -> dict | None:
         from tt.constants import Constants
         conversion_rule_file_path = os.path.join(
@@ -184,12 +286,14 @@ class ExpenseTransactionControl:
         self, source: list[BankSaladExpenseTransaction], conversion_rule: dict
     ) -> list[ExpenseTransaction]:
         current_datetime = datetime.datetime.now(datetime.timezone.utc)
+        rule_index = self._get_rule_index(conversion_rule)
+        cache_info_before = rule_index.get_cache_info()
         list_of_expense_transaction = []
         for s in source:
             t = ExpenseTransaction()
             t.transaction_datetime = s.transaction_datetime
             (t.category0, t.category1, t.memo0, t.memo1) = self._get_category(
-                conversion_rule, s
+                rule_index, s
             )
             t.amount = s.amount
             t.currency = s.currency
@@ -200,55 +304,62 @@ class ExpenseTransactionControl:
 
             list_of_expense_transaction.append(t)
 
+        cache_info = rule_index.get_cache_info()
+        logger.info(
+            f"Categorization cache: hits ({cache_info.hits - cache_info_before.hits}) misses ({cache_info.misses - cache_info_before.misses}) "
+            f"size ({cache_info.currsize}/{cache_info.maxsize})"
+        )
         return list_of_expense_transaction
 
+    def _convert_data_frame(self, df: DataFrame, conversion_rule: dict) -> list[ExpenseTransaction]:
+        """
+        |_convert| for a DataFrame of Bank Salad transactions. All rows are categorized at once.
+        See |ConversionRuleIndex.categorize_data_frame|.
+        """
+        current_datetime = datetime.datetime.now(datetime.timezone.utc)
+        rule_index = self._get_rule_index(conversion_rule)
+        df_of_categories = rule_index.categorize_data_frame(df, self.DEFAULT_CATEGORY0)
+        logger.info(f"Categorized ({len(df)}) rows in a batch.")
+        list_of_expense_transaction = []
+        # `tolist()` returns Python objects - i.e. int instead of numpy.int64 - which DBAPI drivers take.
+        for (transaction_datetime, category0, category1, memo0, memo1, amount, currency, account, user_identifier) in zip(
+            df["transaction_datetime"].tolist(),
+            df_of_categories["category0"].tolist(),
+            df_of_categories["category1"].tolist(),
+            df_of_categories["memo0"].tolist(),
+            df_of_categories["memo1"].tolist(),
+            df["amount"].tolist(),
+            df["currency"].tolist(),
+            df["account"].tolist(),
+            df["user_identifier"].tolist(),
+        ):
+            t = ExpenseTransaction()
+            t.transaction_datetime = None if pandas.isna(transaction_datetime) else transaction_datetime.to_pydatetime()
+            (t.category0, t.category1, t.memo0, t.memo1) = (category0, category1, memo0, memo1)
+            t.amount = amount
+            t.currency = currency
+            t.source_account = account
+            t.target_account = None
+            t.user_identifier = user_identifier
+            t.converted_at = current_datetime
+            list_of_expense_transaction.append(t)
+        return list_of_expense_transaction
+
+    def _get_rule_index(self, conversion_rule: dict) -> ConversionRuleIndex:
+        """
+        Rules are indexed once, and its cache is reused by later conversions. If rules have changed, they are indexed again.
+        """
+        if self.rule_index is None or conversion_rule["rules"] != self.snapshot_of_rules:
+            self.snapshot_of_rules = copy.deepcopy(conversion_rule["rules"])
+            self.rule_index = ConversionRuleIndex(conversion_rule["rules"])
+        return self.rule_index
+
     def _get_category(
-        self, conversion_rule: dict, s: BankSaladExpenseTransaction
+        self, rule_index: ConversionRuleIndex, s: BankSaladExpenseTransaction
     ) -> tuple[str, str, str, str]:
-        const_default_category = "카테고리 없음"
-        flag_found = False
-        for rule in conversion_rule["rules"]:
-            if (
-                (
-                    ("type" not in rule["source"])
-                    or (
-                        "type" in rule["source"]
-                        and (
-                            not rule["source"]["type"]
-                            or rule["source"]["type"]
-                            and rule["source"]["type"] == s.type
-                        )
-                    )
-                )
-                and (
-                    not rule["source"]["category0"]
-                    or rule["source"]["category0"]
-                    and rule["source"]["category0"] == s.category0
-                )
-                and (
-                    not rule["source"]["category1"]
-                    or rule["source"]["category1"]
-                    and rule["source"]["category1"] == s.category1
-                )
-                and (
-                    not rule["source"]["memo0"]
-                    or rule["source"]["memo0"]
-                    and rule["source"]["memo0"] == s.memo0
-                )
-                and (
-                    not rule["source"]["account"]
-                    or rule["source"]["account"]
-                    and rule["source"]["account"] == s.account
-                )
-                and (
-                    not rule["source"]["memo1"]
-                    or rule["source"]["memo1"]
-                    and rule["source"]["memo1"] == s.memo1
-                )
-            ):
-                flag_found = True
-                break
-        if flag_found:
+        const_default_category = self.DEFAULT_CATEGORY0
+        rule = rule_index.find(s)
+        if rule is not None:
             target_category0 = rule["target"]["category0"]
             if "category1" not in rule["target"]:
                 target_category1 = s.category1
@@ -260,29 +371,73 @@ class ExpenseTransactionControl:
         return (const_default_category, None, None, None)
 
     def delete(self) -> bool:
+        # Watermarks go with records. Otherwise, the next conversion would skip what has been converted before.
+        self.watermark_db_impl.drop_table()
         return self.db_impl.drop_table()
 
-    def import_and_append_from_database(self, user_identifier: str) -> bool:
+    def _get_after_id(self, user_identifier: str, flag_full: bool) -> int | None:
+        """
+        Returns:
+            The watermark of |user_identifier|. None if all Bank Salad expense transactions are to be converted.
+        """
+        if flag_full:
+            return None
+        after_id = self.watermark_db_impl.get_last_id(user_identifier)
+        if after_id is None:
+            return None
+        max_id = self.bank_salad_expense_transaction_db_impl.get_max_id()
+        if max_id is None or max_id < after_id:
+            # The table of Bank Salad expense transactions has been created again. Its ids have started over.
+            logger.warning(f"The watermark ({after_id}) is ahead of the last id ({max_id}). Convert all records.")
+            return None
+        return after_id
+
+    def import_and_append_from_database(self, user_identifier: str, flag_batch: bool = False, flag_full: bool = False) -> bool:
+        """
+        Convert Bank Salad expense transactions which have been imported after the last run. See |ExpenseTransactionWatermark|.
+
+        Args:
+            flag_batch: If it is True, Bank Salad transactions are read and categorized as a DataFrame. It is for a whole history.
+            flag_full: If it is True, expense transactions of |user_identifier| are deleted, and all Bank Salad transactions are converted again.
+                i.e. After rules have been changed.
+        """
         self.db_impl.create_table()
-        # @TODO(dennis.oh) Improve performance.
-        list_of_bank_salad_expense_transaction = (
-            self._get_all_records_of_bank_salad_expense_transaction(user_identifier)
-        )
-        if not list_of_bank_salad_expense_transaction:
-            return False
-        # Convert
+        self.watermark_db_impl.create_table()
         if not self.conversion_rule:
             logger.error("conversion_rule is not loaded.")
             return False
-        list_of_expense_transaction = self._convert(
-            list_of_bank_salad_expense_transaction, self.conversion_rule
-        )
-        if not list_of_expense_transaction:
-            return False
-        list_of_expense_transaction_to_be_appended = (
-            self._get_list_of_expense_transaction_to_be_appended(
-                list_of_expense_transaction, user_identifier
+        if flag_full:
+            # The watermark is reset first. So, if a step fails, the next run converts all records again.
+            if not self.watermark_db_impl.set_last_id(user_identifier, None):
+                return False
+            if not self.db_impl.delete_all_filtered_by_user_identifier(user_identifier):
+                return False
+        after_id = self._get_after_id(user_identifier, flag_full)
+        if flag_batch:
+            df = self.bank_salad_expense_transaction_db_impl.get_data_frame_filtered_by_user_identifier(user_identifier, after_id)
+            if df is None:
+                return False
+            list_of_ids = df["id"].tolist()
+            list_of_expense_transaction = self._convert_data_frame(df, self.conversion_rule) if list_of_ids else []
+        else:
+            list_of_bank_salad_expense_transaction = (
+                self._get_all_records_of_bank_salad_expense_transaction(user_identifier, after_id)
+            )
+            list_of_ids = [s.id for s in list_of_bank_salad_expense_transaction]
+            list_of_expense_transaction = self._convert(
+                list_of_bank_salad_expense_transaction, self.conversion_rule
             )
+        if not list_of_expense_transaction:
+            if after_id is None:
+                return False
+            logger.info(f"There is no Bank Salad expense transaction after the watermark ({after_id}).")
+            return True
+        # Records which are there already are skipped by the unique index of `content_hash`.
+        progress_callback = build_progress_logger(
+            ExpenseTransaction.__tablename__, len(list_of_expense_transaction)
         )
-        self.db_impl.insert_records(list_of_expense_transaction_to_be_appended)
-        return True
+        (result, count_inserted) = self.db_impl.insert_records(list_of_expense_transaction, progress_callback)
+        if not result:
+            return False
+        logger.info(f"The number of appended records is ({count_inserted}).")
+        return self.watermark_db_impl.set_last_id(user_identifier, max(list_of_ids))
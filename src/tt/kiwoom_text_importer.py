@@ -34,23 +34,49 @@
 
 """
 
-import csv
 import datetime
-import os
 import re
-import sys
-from typing import List, Tuple
+from typing import Iterable, Iterator
 
 import yaml
 from loguru import logger
 
+import tt.automated_text_importer_layout
 from tt.automated_text_importer_base_impl import AutomatedTextImporterBaseImpl
+from tt.automated_text_importer_converter import get_date_parser
 from tt.automated_text_importer_helper import AutomatedTextImporterHelper
-from tt.malformed_date_error import MalformedDateError
+from tt.automated_text_importer_layout import AutomatedTextImporterLayout
 from tt.simple_transaction import SimpleTransaction
 from tt.symbol_config import SymbolConfig
 
 
+KIWOOM_LAYOUT = AutomatedTextImporterLayout(
+    name="kiwoom",
+    header_sentinel="거래일자",
+    header_fields={0: "거래일자", 1: "종목코드", 4: "적요명", 7: "거래수량", 8: "거래단가/환율", 16: "수수료(외)", 17: "인지세"},
+    expected_column_length=27,
+    date_column=0,
+    date_format="%Y/%m/%d",
+    transaction_type_column=4,
+    transaction_type_table={
+        "매도": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL,
+        "매수": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY,
+        "액면분할병합입고": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_INSERTION,
+        "액면분할병합출고": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION,
+        # "대체입고"
+        # "대체출고"
+        "이벤트입고": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT,
+        "타사대체입고": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM,
+        "타사대체출고": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM,
+    },
+    symbol_column=1,
+    amount_column=7,
+    open_price_column=8,
+    commission_columns=[16, 17],  # Commission and stamp tax
+)
+KIWOOM_LAYOUTS = [KIWOOM_LAYOUT]
+
+
 def get_correct_line_for_pattern_0000(
     prefix: str, postfix: str, match_object: re.Match
 ) -> str:
@@ -121,53 +147,40 @@ def get_corrected_line_for_pattern_0001(line: str, match_object: re.Match) -> st
     return get_correct_line_for_pattern_0001(prefix, postfix, match_object)
 
 
-def cleanup_with_filepath(filepath):
-    # Read
-    f = open(filepath, "r", encoding="cp949")
-    lines = f.readlines()
-    f.close()
-
-    lines_read = len(lines)
-    logger.info(f"Lines read: ({lines_read})")
-
-    # Write
-    f = open(filepath, "w", encoding="cp949")
-    pattern_0000 = re.compile(r"(\"[0-9,\.]+\"),(1,000),(\"[0-9,\.]+\")")
-    pattern_0001 = re.compile(r"(\"[0-9,\.]+\"),(1,000),([0-9\.]+)")
-    count_matched = 0
-    for line in lines:
-        match_object_0000 = re.search(pattern_0000, line)
-        match_object_0001 = re.search(pattern_0001, line)
-        if match_object_0000:
-            count_matched += 1
-            logger.info("Problematic line:")
-            logger.info(line)
-            line = get_corrected_line_for_pattern_0000(line, match_object_0000)
-            logger.info("Fixed line:")
-            logger.info(line)
-        elif match_object_0001:
-            count_matched += 1
-            logger.info("Problematic line:")
-            logger.info(line)
-            line = get_corrected_line_for_pattern_0001(line, match_object_0001)
-            logger.info("Fixed line:")
-            logger.info(line)
-        f.write(line)
-
-    f.close()
-
-    logger.info(f"The count of matched lines: ({count_matched})")
-
-
-def convert_kr_date_string_to_date(src):
-    pattern = re.compile(r"([0-9]{4})/([0-9]{2})/([0-9]{2})")
-    result = pattern.match(src)
-    if not result:
-        raise MalformedDateError()
-    yyyy = int(result.group(1))
-    mm = int(result.group(2))
-    dd = int(result.group(3))
-    return datetime.date(year=yyyy, month=mm, day=dd)
+PATTERN_0000 = re.compile(r"(\"[0-9,\.]+\"),(1,000),(\"[0-9,\.]+\")")
+PATTERN_0001 = re.compile(r"(\"[0-9,\.]+\"),(1,000),([0-9\.]+)")
+
+
+def cleanup_line(line: str) -> tuple[bool, str]:
+    """
+    Returns:
+        (True, fixed line) if the line is problematic. Otherwise, (False, line).
+    """
+    match_object_0000 = re.search(PATTERN_0000, line)
+    if match_object_0000:
+        logger.info("Problematic line:")
+        logger.info(line)
+        line = get_corrected_line_for_pattern_0000(line, match_object_0000)
+        logger.info("Fixed line:")
+        logger.info(line)
+        return (True, line)
+    match_object_0001 = re.search(PATTERN_0001, line)
+    if match_object_0001:
+        logger.info("Problematic line:")
+        logger.info(line)
+        line = get_corrected_line_for_pattern_0001(line, match_object_0001)
+        logger.info("Fixed line:")
+        logger.info(line)
+        return (True, line)
+    return (False, line)
+
+
+def convert_kr_date_string_to_date(src: str) -> datetime.date:
+    """
+    Raises:
+        MalformedDateError: If |src| is not a date of `YYYY/MM/DD`.
+    """
+    return get_date_parser(KIWOOM_LAYOUT.date_format)(src)
 
 
 def build_list_of_simple_transactions(config_filepath: str, symbol_config: SymbolConfig) -> list[SimpleTransaction]:
@@ -189,7 +202,7 @@ def build_list_of_simple_transactions(config_filepath: str, symbol_config: Symbo
             logger.error("Transaction filepath was: %s" % transaction_filepath)
             return None
 
-        merged = primary_list.copy()
+        list_of_sources = [primary_list]
 
         added = config["added"]
         for item in added:
@@ -204,12 +217,13 @@ def build_list_of_simple_transactions(config_filepath: str, symbol_config: Symbo
                     added_transaction_file, account, symbol_config
                 )
                 logger.info(f"Length of added was ({len(added_transactions)})")
-                merged = AutomatedTextImporterHelper.merge_simple_transactions(merged, added_transactions)
-                logger.info(f"Length of merged was ({len(merged)})")
+                list_of_sources.append(added_transactions)
                 added_transaction_file.close()
             except IOError as e:
                 logger.error(f"IOError: {e}")
                 logger.error("Transaction filepath was: %s" % transaction_filepath)
+        merged = AutomatedTextImporterHelper.merge_simple_transactions(*list_of_sources)
+        logger.info(f"Length of merged was ({len(merged)})")
         config_file.close()
     except IOError as e:
         logger.error(f"IOError: {e}")
@@ -219,175 +233,30 @@ def build_list_of_simple_transactions(config_filepath: str, symbol_config: Symbo
 
 
 # This function parses a 'Kiwoom' CSV file and returns the Python list of |SimpleTransaction| objects.
+def get_list_of_simple_transactions_from_stream(input_stream, account, symbol_config: SymbolConfig) -> list[SimpleTransaction]:
+    return list(iter_simple_transactions_from_stream(input_stream, account, symbol_config))
+
+
+# This function parses a 'Kiwoom' CSV file and yields |SimpleTransaction| objects, a day at a time.
 #
 # Note: We know the date of the transaction; We don't know the time of the transaction.
 # Because of that, a heuristic has been implemented. That means:
 # To ensure that 'BUY' transactions are listed before 'SELL' transaction(s) on the same day,
-# additional logic is implemented. See |append_transactions_of_current_date| for details.
-def get_list_of_simple_transactions_from_stream(input_stream, account, symbol_config: SymbolConfig) -> list[SimpleTransaction]:
-    list_of_simple_transactions = []
-    EXPECTED_COLUMN_LENGTH = 27
-    STRING_FOR_TYPE_BUY = "매수"
-    STRING_FOR_TYPE_SELL = "매도"
-    STRING_FOR_TYPE_STOCK_SPLIT_MERGE_INSERTION = "액면분할병합입고"
-    STRING_FOR_TYPE_STOCK_SPLIT_MERGE_DELETION = "액면분할병합출고"
-    # STRING_FOR_TYPE_STOCK_INSERTION = '대체입고'
-    # STRING_FOR_TYPE_STOCK_DELETION = '대체출고'
-    STRING_FOR_TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT = "이벤트입고"
-    STRING_FOR_TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM = "타사대체입고"
-    STRING_FOR_TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM = "타사대체출고"
-    reader = csv.reader(input_stream, delimiter=",")
-    # FIELDNAMES = ['Open Date', 'Symbol/ISIN', 'Type', 'Amount', 'Open Price', 'Commission']
-    num_row_read = 0
-    transactions_of_current_date = None
-    current_date = None
-    for input_row in reader:
-        num_row_read += 1
-        if input_row[0] == "Version=1.0":
-            # One can ignore this
-            continue
-        if input_row[0] == "거래일자":
-            # Assume that this is the header row. Let's skip the header.
-            continue
-        if len(input_row) <= 1:
-            logger.warning(
-                "Tow short row. Expected %d. Got (%s)"
-                % (EXPECTED_COLUMN_LENGTH, input_row)
-            )
-            continue
-        if len(input_row) != EXPECTED_COLUMN_LENGTH:
-            logger.warning(
-                "A number of column in a row is not %d. Got %d. Let's process it."
-                % (EXPECTED_COLUMN_LENGTH, len(input_row))
-            )
-            logger.warning(f"Input was: {input_row}")
-        try:
-            open_date = convert_kr_date_string_to_date(input_row[0])
-        except MalformedDateError:
-            logger.warning("A malformed date string has been found.")
-            logger.warning("An input was: %s" % str(input_row))
-            continue
-        if transactions_of_current_date is None:
-            # Initial condition
-            transactions_of_current_date = []
-            current_date = open_date
-        elif current_date != open_date:
-            # Not the same day
-            AutomatedTextImporterHelper.append_transactions_of_current_date(
-                list_of_simple_transactions, transactions_of_current_date
-            )
-            transactions_of_current_date = []
-            current_date = open_date
-        elif current_date > open_date:
-            logger.error("The input file is not sorted by date.")
-            sys.exit(-1)
-        else:
-            # It means the same day.
-            pass
-
-        transaction = SimpleTransaction()
-
-        input_row[4] = input_row[4].strip()
-
-        if input_row[4] == STRING_FOR_TYPE_SELL:
-            transaction.transaction_type = (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL
-            )
-        elif input_row[4] == STRING_FOR_TYPE_BUY:
-            transaction.transaction_type = (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY
-            )
-        elif input_row[4] == STRING_FOR_TYPE_STOCK_SPLIT_MERGE_INSERTION:
-            transaction.transaction_type = (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_INSERTION
-            )
-        elif input_row[4] == STRING_FOR_TYPE_STOCK_SPLIT_MERGE_DELETION:
-            transaction.transaction_type = (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION
-            )
-        elif input_row[4] == STRING_FOR_TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT:
-            transaction.transaction_type = (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT
-            )
-        elif input_row[4] == STRING_FOR_TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT:
-            transaction.transaction_type = (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT
-            )
-        elif input_row[4] == STRING_FOR_TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM:
-            transaction.transaction_type = (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM
-            )
-        elif input_row[4] == STRING_FOR_TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM:
-            transaction.transaction_type = (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM
-            )
-        else:
-            # Continue with the for loop, It means the other transaction except types above.
-            # i.e. Dividend
-            # i.e. A header line
-            continue
-
-        transaction.account = account
-        transaction.open_date = open_date
-
-        original_namespace = "kiwoom"
-        raw_symbol_input = input_row[1]
-        (legit_namespace, legit_symbol) = symbol_config.get_namespace_and_symbol_by_raw_input(original_namespace, raw_symbol_input)
-        transaction.namespace = legit_namespace
-        transaction.symbol = legit_symbol
-
-        transaction.amount = float(input_row[7].replace(",", ""))
-        transaction.open_price = float(input_row[8].replace(",", ""))
-
-        pure_commission = input_row[16]
-        tax = input_row[17]
-        total_commission = float(pure_commission) + float(tax)
-        transaction.commission = float("%.2f" % total_commission)
-
-
-        transactions_of_current_date.append(transaction)
-
-    # Do this once at the last
-    AutomatedTextImporterHelper.append_transactions_of_current_date(
-        list_of_simple_transactions, transactions_of_current_date
+# additional logic is implemented. See |sort_transactions_of_current_date| for details.
+def iter_simple_transactions_from_stream(input_stream, account, symbol_config: SymbolConfig) -> Iterator[SimpleTransaction]:
+    return tt.automated_text_importer_layout.iter_simple_transactions_from_stream(
+        input_stream, KIWOOM_LAYOUTS, "kiwoom", account, symbol_config
     )
 
-    return list_of_simple_transactions
-
 
 class KiwoomTextImporter(AutomatedTextImporterBaseImpl):
 
     def __init__(self):
         super().__init__()
         self.securities_firm_id = "kiwoom" # securities firm id
+        self.list_of_layouts = KIWOOM_LAYOUTS
 
-    def import_transactions(self, concatenated_file_meta: list[tuple[str, str]], symbol_config: SymbolConfig) -> Tuple[bool, List[SimpleTransaction]]:
-        # Implementation for Kiwoom
-        logger.info("Importing transactions for Kiwoom...")
-        if not concatenated_file_meta or len(concatenated_file_meta) <= 0:
-            return (False, [])
-
-        index = 0
-        merged = []
-        for meta in concatenated_file_meta:
-            (transaction_filepath, account) = meta
-            transaction_file = open(transaction_filepath, newline="", encoding="euc-kr")
-            imported_list = get_list_of_simple_transactions_from_stream(
-                transaction_file, account, symbol_config
-            )
-            transaction_file.close()
-            if index == 0:
-                merged = imported_list.copy()
-            else:
-                merged = AutomatedTextImporterHelper.merge_simple_transactions(merged, imported_list)
-            index += 1
-
-        logger.info(f"Total imported transactions: {len(merged)}")
-
-        return (True, merged)
-
-    def _cleanup_files(self, concatenated_file_meta: tuple[str, str]) -> None:
-        # Implementation for Kiwoom
-        for (filepath, account) in concatenated_file_meta:
-            logger.info(f"Cleaning up file: {os.path.basename(filepath)}")
-            cleanup_with_filepath(filepath)
+    def _iter_cleaned_lines(self, input_stream: Iterable[str]) -> Iterator[str]:
+        for line in input_stream:
+            (_, line) = cleanup_line(line)
+            yield line
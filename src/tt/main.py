@@ -3,44 +3,87 @@
 """
 This module interprets command from a user, then do the job.
 It uses `click` package to build a command line interface.
+
+Each command declares what it needs by calling |GlobalObjectControl.get_db_connection| or |GlobalObjectControl.get_fact_data_control|.
+They are initialized on the first call. Modules which load pandas, SQLAlchemy, MariaDB or Selenium are imported in a command, too.
+So, i.e. `--help` and `show auto` neither import them nor connect to the database.
 """
 
 import datetime
 import os
 import sys
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import click
 import yaml
 from loguru import logger
 
+import tt.streaming_pipeline
 from tt.constants import Constants
-import tt.kiwoom_text_importer
-from tt.automated_text_importer import AutomatedTextImporterControl
-from tt.bank_salad_expense_transaction import \
-    BankSaladExpenseTransactionControl
-from tt.bootstrap import BootstrapControl
-from tt.db_connection import DBConnection
-from tt.expense_category import (ExpenseCategoryControl,
-                                 ExpenseCategoryTextPrinterImpl)
-from tt.expense_transaction import ExpenseTransactionControl
-from tt.fact_data_control import FactDataControl
-from tt.simple_portfolio import SimplePortfolio
-from tt.simple_portfolio_control import SimplePortfolioControl
 from tt.simple_transaction import SimpleTransaction
-from tt.simple_transaction_db_impl import SimpleTransactionDBImpl
-from tt.simple_transaction_text_printer_impl import \
-    SimpleTransactionTextPrinterImpl
-from tt.symbol_config import SymbolConfig, SymbolConfigControl
+
+if TYPE_CHECKING:
+    from tt.automated_text_importer import AutomatedTextImporterControl
+    from tt.db_connection import DBConnection
+    from tt.fact_data_control import FactDataControl
+    from tt.simple_transaction_db_impl import SimpleTransactionDBImpl
+    from tt.symbol_config import SymbolConfig
 
 
 class GlobalObjectControl:
 
     def __init__(self):
-        self.global_flag_initialized_global_objects = False
-        self.global_db_connection = None  # `tt.db_connection.DBConnection`
-        self.global_config_ir = None
-        self.fact_data_control = None
+        self.global_db_connection = None  # `tt.db_connection.DBConnection`. See |get_db_connection|.
+        self.global_config_ir = None  # See |get_global_config_ir|.
+        self.fact_data_control = None  # See |get_fact_data_control|.
+        self.flag_fact_data_initialized = False
+
+    def get_global_config_ir(self) -> dict:
+        if self.global_config_ir is None:
+            global_config_file_path = os.path.join(Constants.config_dir_path, "global_config.yaml")
+            self.global_config_ir = build_global_config(global_config_file_path)
+            if self.global_config_ir is None:
+                logger.error("Global configuration is malformed.")
+                sys.exit(-1)
+        return self.global_config_ir
+
+    def get_db_connection(self) -> "DBConnection":
+        """
+        Returns:
+            A connection which is made on the first call. It may not be in a valid state before `bootstrap database`.
+        """
+        if self.global_db_connection is None:
+            from tt.db_connection import DBConnection
+            db_connection = DBConnection(self.get_global_config_ir())
+            db_connection.do_initial_setup()
+            self.global_db_connection = db_connection
+        return self.global_db_connection
+
+    def get_valid_db_connection(self) -> "DBConnection":
+        db_connection = self.get_db_connection()
+        if not db_connection.is_in_valid_state():
+            logger.error("DB Connection is not valid. Please bootstrap first.")
+            sys.exit(-1)
+        return db_connection
+
+    def get_fact_data_control(self) -> Optional["FactDataControl"]:
+        """
+        Returns:
+            Fact data - i.e. stock splits - which are bootstrapped on the first call. None if the database does not exist.
+        """
+        if not self.flag_fact_data_initialized:
+            self.flag_fact_data_initialized = True
+            db_connection = self.get_db_connection()
+            if db_connection.is_in_valid_state():
+                from tt.fact_data_control import FactDataControl
+                self.fact_data_control = FactDataControl(db_connection)
+                self.fact_data_control.bootstrap()
+        return self.fact_data_control
+
+    def cleanup(self) -> None:
+        if self.global_db_connection is not None:
+            self.global_db_connection.close()
+            self.global_db_connection = None
 
 
 # Global variable
@@ -53,7 +96,8 @@ def cli():
     """
     This program manages financial transactions.
     """
-    pass
+    # A command opens the database connection lazily. Close it when the command finishes, even with `sys.exit`.
+    click.get_current_context().call_on_close(global_object_control.cleanup)
 
 
 @cli.group()
@@ -105,14 +149,88 @@ def show():
 
 # <program> create auto
 @create.command()
-def auto():
+@click.option(
+    "--stream",
+    is_flag=True,
+    default=False,
+    help="Stream transactions from files to the database and the portfolio with bounded buffers.",
+)
+@click.option(
+    "--buffer-size",
+    type=click.IntRange(min=1),
+    default=tt.streaming_pipeline.DEFAULT_BUFFER_SIZE,
+    show_default=True,
+    help="The number of transactions buffered between stages in the streaming mode.",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of worker processes which parse transaction files. It is ignored in the streaming mode.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Parse all transaction files again instead of loading unchanged ones from the cache. The cache is left as it is.",
+)
+@click.option(
+    "--refresh-cache",
+    is_flag=True,
+    default=False,
+    help="Clear the cache. Then, parse all transaction files again and cache them. Use it if cached results are stale.",
+)
+@click.option(
+    "--columnar",
+    is_flag=True,
+    default=False,
+    help="Parse transaction files with column operations. It is faster for large exports. It is ignored in the streaming mode.",
+)
+@click.option(
+    "--batch",
+    is_flag=True,
+    default=False,
+    help="Pass transactions to the database and the portfolio as a columnar batch, without an object per transaction. "
+    "Files are parsed with column operations in a single process. The cache is not used. "
+    "It cannot be used with `--stream`, `--jobs` greater than 1 or `--refresh-cache`.",
+)
+@click.option(
+    "--insert-chunk-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="The number of rows per a bulk insert statement. The default is 1000.",
+)
+@click.option(
+    "--load-data",
+    is_flag=True,
+    default=False,
+    help="Write transactions to the database with `LOAD DATA LOCAL INFILE`. It needs `local_infile: true` in the `mariadb` section of the global configuration. "
+    "It is ignored in the streaming mode.",
+)
+def auto(
+    stream: bool, buffer_size: int, jobs: int, no_cache: bool, refresh_cache: bool, columnar: bool, batch: bool, insert_chunk_size: Optional[int], load_data: bool
+):
     """
     Import all transactions using automated text importer.
     """
-    global global_object_control
-    if not global_object_control.global_db_connection.is_in_valid_state():
-        logger.error("DB Connection is not valid. Please bootstrap first.")
+    from tt.automated_text_importer import AutomatedTextImporterControl
+    from tt.simple_portfolio_control import SimplePortfolioControl
+    from tt.simple_transaction_db_impl import SimpleTransactionDBImpl
+    from tt.symbol_config import SymbolConfigControl
+
+    if no_cache and refresh_cache:
+        logger.error("`--no-cache` and `--refresh-cache` cannot be used together.")
         sys.exit(-1)
+    if stream and refresh_cache:
+        logger.error("`--refresh-cache` cannot be used in the streaming mode. It does not use the cache.")
+        sys.exit(-1)
+    if batch and (stream or jobs > 1 or refresh_cache):
+        logger.error("`--batch` cannot be used with `--stream`, `--jobs` greater than 1 or `--refresh-cache`.")
+        sys.exit(-1)
+
+    global global_object_control
+    db_connection = global_object_control.get_valid_db_connection()
 
     symbol_config_file_path = os.path.join(Constants.config_dir_path, "symbol_config.yaml")
     symbol_config_control = SymbolConfigControl()
@@ -123,15 +241,28 @@ def auto():
 
     control = AutomatedTextImporterControl()
     control.load_module_config()
-    (result, list_of_simple_transactions) = control.import_all_transactions(symbol_config)
+    db_impl = SimpleTransactionDBImpl(db_connection)
+    if insert_chunk_size is not None:
+        db_impl.chunk_size_for_insert = insert_chunk_size
+    db_impl.flag_use_load_data = load_data
+    if stream:
+        if jobs > 1:
+            logger.warning("`--jobs` is ignored in the streaming mode.")
+        if load_data:
+            logger.warning("`--load-data` is ignored in the streaming mode.")
+        create_auto_in_streaming_mode(control, db_impl, symbol_config, buffer_size)
+        return
+    if batch:
+        create_auto_with_transaction_batch(control, db_impl, symbol_config)
+        return
+    (result, list_of_simple_transactions) = control.import_all_transactions(symbol_config, jobs, not no_cache, columnar, refresh_cache)
     if not result or not list_of_simple_transactions:
         sys.exit(-1)
 
-    db_impl = SimpleTransactionDBImpl(global_object_control.global_db_connection)
     db_impl.export_all(list_of_simple_transactions)
 
     simple_portfolio_control = SimplePortfolioControl(
-        global_object_control.fact_data_control
+        global_object_control.get_fact_data_control()
     )
     # @FIXME(dennis.oh) Instead of None, read portfolio snapshot date from config.
     portfolio = simple_portfolio_control.build_portfolio(
@@ -140,6 +271,65 @@ def auto():
     simple_portfolio_control.do_investing_dot_com_portfolio_export(portfolio, symbol_config)
 
 
+def create_auto_with_transaction_batch(control: "AutomatedTextImporterControl", db_impl: "SimpleTransactionDBImpl", symbol_config: "SymbolConfig") -> None:
+    """
+    Import, write to the database and fold into a portfolio with a |TransactionBatch|.
+    No |SimpleTransaction| object is built per transaction.
+    """
+    from tt.simple_portfolio_control import SimplePortfolioControl
+
+    global global_object_control
+    (result, batch) = control.import_all_transaction_batch(symbol_config)
+    if not result or len(batch) == 0:
+        sys.exit(-1)
+
+    db_impl.export_transaction_batch(batch)
+
+    simple_portfolio_control = SimplePortfolioControl(
+        global_object_control.get_fact_data_control()
+    )
+    # @FIXME(dennis.oh) Instead of None, read portfolio snapshot date from config.
+    portfolio = simple_portfolio_control.build_portfolio(batch, None)
+    simple_portfolio_control.do_investing_dot_com_portfolio_export(portfolio, symbol_config)
+
+
+def create_auto_in_streaming_mode(control: "AutomatedTextImporterControl", db_impl: "SimpleTransactionDBImpl", symbol_config: "SymbolConfig", buffer_size: int) -> None:
+    """
+    Parse, resolve symbols, merge, write to the database and fold into a portfolio, in a single pass.
+    Each stage consumes and yields an iterator. So, the peak memory does not depend on the length of the history.
+    """
+    from tt.simple_portfolio_control import SimplePortfolioControl
+
+    global global_object_control
+    try:
+        (first, stream_of_simple_transactions) = tt.streaming_pipeline.peek(
+            control.iter_all_transactions(symbol_config)
+        )
+        if first is None:
+            sys.exit(-1)
+
+        # Fact data are bootstrapped - i.e. `stock_splits` is written - before the export opens its transaction.
+        # Otherwise, on SQLite, the transaction could not write after the other connection has written.
+        simple_portfolio_control = SimplePortfolioControl(
+            global_object_control.get_fact_data_control()
+        )
+
+        db_impl.prepare_export()
+        stream_of_simple_transactions = tt.streaming_pipeline.tap(
+            stream_of_simple_transactions, db_impl.export_chunk, buffer_size
+        )
+
+        portfolio = simple_portfolio_control.build_portfolio(
+            stream_of_simple_transactions, None
+        )
+        # All chunks have been written. Commit them at once.
+        db_impl.finish_export()
+    except OSError as e:
+        logger.error(f"Failed to read transaction files: {e}")
+        sys.exit(-1)
+    simple_portfolio_control.do_investing_dot_com_portfolio_export(portfolio, symbol_config)
+
+
 # <program> create kiwoom-transaction
 @create.command()
 @click.option("--kiwoom-config", required=True, help="Kiwoom configuration file path.")
@@ -152,6 +342,9 @@ def kiwoom_transaction(kiwoom_config, portfolio_snapshot_date: Optional[str]):
     """
     Import Kiwoom Securities transaction file and create transaction records in a database.
     """
+    import tt.kiwoom_text_importer
+    from tt.simple_portfolio_control import SimplePortfolioControl
+    from tt.simple_transaction_db_impl import SimpleTransactionDBImpl
 
     flag_read_input_from_kiwoom = False
     if kiwoom_config is not None:
@@ -195,14 +388,11 @@ def kiwoom_transaction(kiwoom_config, portfolio_snapshot_date: Optional[str]):
         sys.exit(-1)
 
     global global_object_control
-    if not global_object_control.global_db_connection.is_in_valid_state():
-        logger.error("DB Connection is not valid. Please bootstrap first.")
-        sys.exit(-1)
-    db_impl = SimpleTransactionDBImpl(global_object_control.global_db_connection)
+    db_impl = SimpleTransactionDBImpl(global_object_control.get_valid_db_connection())
     db_impl.export_all(list_of_simple_transactions)
 
     simple_portfolio_control = SimplePortfolioControl(
-        global_object_control.fact_data_control
+        global_object_control.get_fact_data_control()
     )
     portfolio = simple_portfolio_control.build_portfolio(
         list_of_simple_transactions, portfolio_snapshot_date_obj
@@ -219,15 +409,21 @@ def kiwoom_transaction(kiwoom_config, portfolio_snapshot_date: Optional[str]):
     help="A file exported from Bank Salad which contains expense transactions.",
 )
 @click.option("-u", "--user-identifier", required=True, help="A user identifier.")
-def bank_salad_expense_transaction(file: str, user_identifier: str):
+@click.option("--chunk-size", type=click.IntRange(min=1), default=None, help="The number of rows per a commit. The default is 1000.")
+def bank_salad_expense_transaction(file: str, user_identifier: str, chunk_size: Optional[int]):
     """
     Import a file generated from Bank Salad service which contains expense transactions.
     """
+    from tt.bank_salad_expense_transaction import \
+        BankSaladExpenseTransactionControl
+
     global global_object_control
 
     control = BankSaladExpenseTransactionControl(
-        global_object_control.global_db_connection
+        global_object_control.get_db_connection()
     )
+    if chunk_size is not None:
+        control.db_impl.chunk_size_for_bulk_insert = chunk_size
     result = control.import_and_append_from_file(file, user_identifier)
     if result:
         logger.info("Succeeded.")
@@ -238,14 +434,22 @@ def bank_salad_expense_transaction(file: str, user_identifier: str):
 # <program> create expense-transaction
 @create.command()
 @click.option("-u", "--user-identifier", required=True, help="A user identifier.")
-def expense_transaction(user_identifier: str):
+@click.option("--chunk-size", type=click.IntRange(min=1), default=None, help="The number of rows per a commit. The default is 1000.")
+@click.option("--batch", is_flag=True, default=False, help="Categorize all rows at once with DataFrame joins. It is faster for a whole history.")
+@click.option("--full", is_flag=True, default=False, help="Delete expense transactions of the user, and convert all Bank Salad expense transactions again. i.e. After rules have been changed.")
+def expense_transaction(user_identifier: str, chunk_size: Optional[int], batch: bool, full: bool):
     """
     Create general expense transaction data from "Bank Salad expense transaction data in the database."
+    Bank Salad expense transactions which have been imported after the last run are converted only, unless `--full` is given.
     """
+    from tt.expense_transaction import ExpenseTransactionControl
+
     global global_object_control
 
-    control = ExpenseTransactionControl(global_object_control.global_db_connection)
-    result = control.import_and_append_from_database(user_identifier)
+    control = ExpenseTransactionControl(global_object_control.get_db_connection())
+    if chunk_size is not None:
+        control.db_impl.chunk_size_for_bulk_insert = chunk_size
+    result = control.import_and_append_from_database(user_identifier, flag_batch=batch, flag_full=full)
     if result:
         logger.info("Succeeded.")
     else:
@@ -264,9 +468,11 @@ def expense_category(file):
     """
     Create or update records of expense category based on a given file.
     """
+    from tt.expense_category import ExpenseCategoryControl
+
     global global_object_control
 
-    control = ExpenseCategoryControl(global_object_control.global_db_connection)
+    control = ExpenseCategoryControl(global_object_control.get_db_connection())
     result = control.import_and_append_from_file(file)
     if result:
         logger.info("Succeeded.")
@@ -276,9 +482,11 @@ def expense_category(file):
 
 @bootstrap.command()
 def database():
+    from tt.bootstrap import BootstrapControl
+
     global global_object_control
     bootstrap_control = BootstrapControl()
-    bootstrap_control.bootstrap(global_object_control.global_db_connection)
+    bootstrap_control.bootstrap(global_object_control.get_db_connection())
 
 
 # <program> delete bank-salad-expense-transaction
@@ -287,10 +495,13 @@ def bank_salad_expense_transaction():
     """
     Delete data or drop a table w.r.t. bank salad expense transactions.
     """
+    from tt.bank_salad_expense_transaction import \
+        BankSaladExpenseTransactionControl
+
     global global_object_control
 
     control = BankSaladExpenseTransactionControl(
-        global_object_control.global_db_connection
+        global_object_control.get_db_connection()
     )
     result = control.delete()
     if result:
@@ -305,9 +516,11 @@ def expense_category():
     """
     Create or update records of expense category based on a given file.
     """
+    from tt.expense_category import ExpenseCategoryControl
+
     global global_object_control
 
-    control = ExpenseCategoryControl(global_object_control.global_db_connection)
+    control = ExpenseCategoryControl(global_object_control.get_db_connection())
     result = control.delete()
     if result:
         logger.info("Succeeded.")
@@ -321,9 +534,11 @@ def expense_transaction():
     """
     Delete data or drop a table w.r.t. expense transactions.
     """
+    from tt.expense_transaction import ExpenseTransactionControl
+
     global global_object_control
 
-    control = ExpenseTransactionControl(global_object_control.global_db_connection)
+    control = ExpenseTransactionControl(global_object_control.get_db_connection())
     result = control.delete()
     if result:
         logger.info("Succeeded.")
@@ -344,29 +559,57 @@ def yahoo_finance():
 
 # <program> get simple-transaction
 @get.command()
-@click.option("--symbol", help="Stock symbol to match.")
-def simple_transaction(symbol):
-    """
-    List simple transactions.
-    """
+@click.option("--symbol", multiple=True, help="Stock symbol to match. It can be given multiple times.")
+@click.option(
+    "--transaction-type",
+    multiple=True,
+    type=click.Choice(list(SimpleTransaction.TRANSACTION_TYPE_TABLE.keys())),
+    help="Transaction type to match. It can be given multiple times.",
+)
+@click.option("--account", help="Account to match.")
+@click.option("--open-date-from", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="The first open date. Inclusive. i.e. 2024-01-01")
+@click.option("--open-date-to", type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help="The last open date. Inclusive. i.e. 2024-12-31")
+@click.option("--after-id", type=click.IntRange(min=0), default=None, help="List records of which id is greater than it. It is for the next page.")
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="The maximum number of records. i.e. A page size")
+def simple_transaction(
+    symbol: tuple[str, ...],
+    transaction_type: tuple[str, ...],
+    account: Optional[str],
+    open_date_from: Optional[datetime.datetime],
+    open_date_to: Optional[datetime.datetime],
+    after_id: Optional[int],
+    limit: Optional[int],
+):
+    """
+    List simple transactions in the order of id.
+    Records are streamed from the database. So, the first record is printed without reading the whole table.
+    """
+    from tt.simple_transaction_db_impl import SimpleTransactionDBImpl
+    from tt.simple_transaction_text_printer_impl import \
+        SimpleTransactionTextPrinterImpl
+
     global global_object_control
 
     # Get records from the database.
-    db_impl = SimpleTransactionDBImpl(global_object_control.global_db_connection)
+    db_impl = SimpleTransactionDBImpl(global_object_control.get_db_connection())
 
+    simple_transaction_filter = SimpleTransactionDBImpl.SimpleTransactionFilter()
     if symbol:
-        simple_transaction_filter = SimpleTransactionDBImpl.SimpleTransactionFilter()
-        simple_transaction_filter.flag_filter_by["symbol"] = True
-        simple_transaction_filter.value_dict["symbol"] = symbol
-        simple_transaction_records = db_impl.get_records_with_filter(
-            simple_transaction_filter
-        )
-        printer_impl = SimpleTransactionTextPrinterImpl()
-        printer_impl.print_all(simple_transaction_records)
-    else:
-        simple_transaction_records = db_impl.get_all_records()
-        printer_impl = SimpleTransactionTextPrinterImpl()
-        printer_impl.print_all(simple_transaction_records)
+        simple_transaction_filter.set_of_symbols = set(symbol)
+    if transaction_type:
+        simple_transaction_filter.set_of_transaction_types = {
+            SimpleTransaction.get_transaction_type_from_string(transaction_type_string) for transaction_type_string in transaction_type
+        }
+    simple_transaction_filter.account = account
+    if open_date_from:
+        simple_transaction_filter.open_date_from = open_date_from.date()
+    if open_date_to:
+        simple_transaction_filter.open_date_to = open_date_to.date()
+    simple_transaction_records = db_impl.iter_records(simple_transaction_filter, after_id=after_id, limit=limit)
+    printer_impl = SimpleTransactionTextPrinterImpl()
+    printer_impl.print_all(simple_transaction_records)
+    if limit is not None and db_impl.last_record_id is not None:
+        logger.info(f"For the next page, use: --after-id {db_impl.last_record_id}")
 
 
 # <program> get expense-category --user-identifier <USER IDENTIFIER>
@@ -377,10 +620,13 @@ def expense_category(user_identifier):
     List expense categories.
     """
 
+    from tt.expense_category import (ExpenseCategoryControl,
+                                     ExpenseCategoryTextPrinterImpl)
+
     global global_object_control
 
     # Get records from the database
-    control = ExpenseCategoryControl(global_object_control.global_db_connection)
+    control = ExpenseCategoryControl(global_object_control.get_db_connection())
     if user_identifier:
         list_of_expense_category = control.get_all_filtered_by_user_identifier(
             user_identifier
@@ -399,6 +645,33 @@ def auto():
     AutomatedTextImporterHelper.show_all_candidate_files()
 
 
+# <program> show db-stats
+@show.command()
+@click.option("--reset", is_flag=True, default=False, help="Clear statistics after printing them.")
+def db_stats(reset: bool):
+    """
+    Show statistics of SQL statements per a statement shape, and checkouts of the connection pool and their waits.
+    They are recorded when `sql_profiler.enabled` is true in the global configuration.
+    """
+    from tt.sql_profiler import (SQLProfiler,
+                                 SQLStatementStatisticsTextPrinterImpl,
+                                 load_profile)
+
+    global global_object_control
+    sql_profiler = SQLProfiler(global_object_control.get_global_config_ir().get("sql_profiler"))
+    (statistics_table, pool_statistics) = load_profile(sql_profiler.profile_file_path)
+    if not statistics_table and pool_statistics is None:
+        logger.info(f"No SQL statistics in {sql_profiler.profile_file_path}. Set `enabled: true` in the `sql_profiler` section of the global configuration.")
+        return
+    printer_impl = SQLStatementStatisticsTextPrinterImpl()
+    printer_impl.print_all(list(statistics_table.values()))
+    if pool_statistics is not None:
+        print()
+        printer_impl.print_pool_statistics(pool_statistics)
+    if reset:
+        os.remove(sql_profiler.profile_file_path)
+
+
 def build_global_config(global_config_file_path: str) -> dict:
     global_config_to_return = {}
     try:
@@ -413,43 +686,8 @@ def build_global_config(global_config_file_path: str) -> dict:
     return global_config_to_return
 
 
-def lazy_init_global_objects(global_config_ir):
-    global global_object_control
-    if global_object_control.global_flag_initialized_global_objects is True:
-        return
-    global_object_control.global_flag_initialized_global_objects = True
-    global_object_control.global_db_connection = DBConnection(global_config_ir)
-    global_object_control.global_db_connection.do_initial_setup()
-    if global_object_control.global_db_connection.is_in_valid_state():
-        global_object_control.fact_data_control = FactDataControl(
-            global_object_control.global_db_connection
-        )
-        global_object_control.fact_data_control.bootstrap()
-
-
-def initialize_global_objects():
-    global global_object_control
-    from tt.constants import Constants
-    const_global_config_file_path = os.path.join(Constants.config_dir_path, "global_config.yaml")
-    global_object_control.global_config_ir = build_global_config(
-        const_global_config_file_path
-    )
-
-    if global_object_control.global_config_ir is None:
-        logger.error("Global configuration is malformed.")
-        sys.exit(-1)
-    lazy_init_global_objects(global_object_control.global_config_ir)
-
-
-def cleanup_global_objects():
-    if global_object_control.global_db_connection:
-        global_object_control.global_db_connection.close()
-
-
 def main():
-    initialize_global_objects()
     cli()
-    cleanup_global_objects()
 
 
 if __name__ == "__main__":
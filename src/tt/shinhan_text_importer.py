@@ -9,143 +9,39 @@ The exported file is expected to be in CSV format with euc-kr encoding.
 # As of 2025-11-27. Fields are as follows:
 # 주문일자,매매구분,구분,종목코드,종목명,주문수량,주문단가,체결수량,체결단가,상태,거래금액,수수료,주문유형,주문번호,원주문,주문시간,GMT주문시간,체결시간,GMT체결시간,국가구분,시장구분,기준통화,주문자,신용대출일자
 
-import csv
-import sys
-from datetime import date, datetime
-from typing import List, Tuple
-
-from loguru import logger
-
-from tt import symbol_config
 from tt.automated_text_importer_base_impl import AutomatedTextImporterBaseImpl
-from tt.automated_text_importer_helper import AutomatedTextImporterHelper
+from tt.automated_text_importer_layout import AutomatedTextImporterLayout
 from tt.simple_transaction import SimpleTransaction
 
+SHINHAN_LAYOUT = AutomatedTextImporterLayout(
+    name="shinhan",
+    header_sentinel="주문일자",
+    header_fields={0: "주문일자", 1: "매매구분", 3: "종목코드", 7: "체결수량", 8: "체결단가", 11: "수수료"},
+    expected_column_length=24,
+    date_column=0,
+    date_format="%Y.%m.%d",
+    transaction_type_column=1,
+    transaction_type_table={
+        "매수": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY,
+        "매도": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL,
+        "액면분할병합입고": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_INSERTION,  # @FIXME(dennis.oh) Confirm this string is used or not.
+        "액면분할병합출고": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION,  # @FIXME(dennis.oh) Confirm this string is used or not.
+        # "대체입고"  # @FIXME(dennis.oh) Confirm this string is used or not.
+        # "대체출고"  # @FIXME(dennis.oh) Confirm this string is used or not.
+        "이벤트입고": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT,  # @FIXME(dennis.oh) Confirm this string is used or not.
+    },
+    symbol_column=3,
+    amount_column=7,
+    open_price_column=8,
+    commission_columns=[11],  # Shinhan does not provide tax info separately.
+    flag_strip_symbol=True,
+)
+SHINHAN_LAYOUTS = [SHINHAN_LAYOUT]
+
 
 class ShinhanTextImporter(AutomatedTextImporterBaseImpl):
 
     def __init__(self):
         super().__init__()
         self.securities_firm_id = "shinhan"
-
-    def concat_and_cleanup_local_files_if_needed(self) -> bool:
-        return super().concat_and_cleanup_local_files_if_needed()
-
-    def _get_list_of_simple_transactions_from_stream(self, input_stream, account, symbol_config: symbol_config.SymbolConfig) -> list[SimpleTransaction]:
-        list_of_simple_transactions = []
-        EXPECTED_COLUMN_LENGTH = 24
-        STRING_FOR_TYPE_BUY = "매수"
-        STRING_FOR_TYPE_SELL = "매도"
-        STRING_FOR_TYPE_STOCK_SPLIT_MERGE_INSERTION = "액면분할병합입고"  # @FIXME(dennis.oh) Confirm this string is used or not.
-        STRING_FOR_TYPE_STOCK_SPLIT_MERGE_DELETION = "액면분할병합출고"  # @FIXME(dennis.oh) Confirm this string is used or not.
-        # STRING_FOR_TYPE_STOCK_INSERTION = "대체입고"  # @FIXME(dennis.oh) Confirm this string is used or not.
-        # STRING_FOR_TYPE_STOCK_DELETION = "대체출고"  # @FIXME(dennis.oh) Confirm this string is used or not.
-        STRING_FOR_TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT = "이벤트입고"  # @FIXME(dennis.oh) Confirm this string is used or not.
-        reader = csv.reader(input_stream, delimiter=",")
-        # FIELDNAMES = ['Open Date', 'Symbol/ISIN', 'Type', 'Amount', 'Open Price', 'Commission']
-        num_row_read = 0
-        transactions_of_current_date = None
-        current_date = None
-        for input_row in reader:
-            num_row_read += 1
-            if input_row[0] == "Version=1.0":
-                # One can ignore this
-                continue
-            if input_row[0] == "주문일자":
-                # Assume that this is the header row. Let's skip the header.
-                continue
-            if len(input_row) <= 1:
-                logger.warning(
-                    "Tow short row. Expected %d. Got (%s)"
-                    % (EXPECTED_COLUMN_LENGTH, input_row)
-                )
-                continue
-            if len(input_row) != EXPECTED_COLUMN_LENGTH:
-                logger.warning(
-                    "A number of column in a row is not %d. Got %d. Let's process it."
-                    % (EXPECTED_COLUMN_LENGTH, len(input_row))
-                )
-                logger.warning(f"Input was: {input_row}")
-            try:
-                open_date = datetime.strptime(input_row[0], "%Y.%m.%d").date()
-            except ValueError:
-                logger.warning("A malformed date string has been found.")
-                logger.warning("An input was: %s" % str(input_row))
-                continue
-            if transactions_of_current_date is None:
-                # Initial condition
-                transactions_of_current_date = []
-                current_date = open_date
-            elif current_date != open_date:
-                # Not the same day
-                AutomatedTextImporterHelper.append_transactions_of_current_date(
-                    list_of_simple_transactions, transactions_of_current_date
-                )
-                transactions_of_current_date = []
-                current_date = open_date
-            elif current_date > open_date:
-                logger.error("The input file is not sorted by date.")
-                sys.exit(-1)
-            else:
-                # It means the same day.
-                pass
-
-            transaction = SimpleTransaction()
-
-            transaction_type = input_row[1].strip()
-
-            if transaction_type == STRING_FOR_TYPE_SELL:
-                transaction.transaction_type = (
-                    SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL
-                )
-            elif transaction_type== STRING_FOR_TYPE_BUY:
-                transaction.transaction_type = (
-                    SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY
-                )
-            elif transaction_type == STRING_FOR_TYPE_STOCK_SPLIT_MERGE_INSERTION:
-                transaction.transaction_type = (
-                    SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_INSERTION
-                )
-            elif transaction_type == STRING_FOR_TYPE_STOCK_SPLIT_MERGE_DELETION:
-                transaction.transaction_type = (
-                    SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION
-                )
-            elif transaction_type == STRING_FOR_TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT:
-                transaction.transaction_type = (
-                    SimpleTransaction.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT
-                )
-            else:
-                # Continue with the for loop, It means the other transaction except types above.
-                # i.e. Dividend
-                # i.e. A header line
-                continue
-
-            transaction.account = account
-            transaction.open_date = open_date
-
-            CONST_SYMBOL_COLUMN = 3
-            raw_symbol_input = input_row[CONST_SYMBOL_COLUMN].strip()
-            original_namespace = self.securities_firm_id
-            (legit_namespace, legit_symbol) = symbol_config.get_namespace_and_symbol_by_raw_input(original_namespace, raw_symbol_input)
-            transaction.namespace = legit_namespace
-            transaction.symbol = legit_symbol
-
-            transaction.amount = float(input_row[7].replace(",", ""))
-            transaction.open_price = float(input_row[8].replace(",", ""))
-
-            pure_commission = input_row[11]
-            tax = 0.0  # Shinhan does not provide tax info separately.
-            total_commission = float(pure_commission) + float(tax)
-            transaction.commission = float("%.2f" % total_commission)
-
-
-
-            transactions_of_current_date.append(transaction)
-
-        # Do this once at the last
-        if transactions_of_current_date is not None:
-            AutomatedTextImporterHelper.append_transactions_of_current_date(
-                list_of_simple_transactions, transactions_of_current_date
-            )
-
-        return list_of_simple_transactions
+        self.list_of_layouts = SHINHAN_LAYOUTS
@@ -155,3 +155,20 @@ class SimplePortfolio:
             == SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM
         ):
             self.record_stock_deletion_caused_by_other_securities_firm(transaction)
+
+    def record_batch(self, batch) -> None:
+        """
+        Record all transactions of a |TransactionBatch| in order.
+        A single |SimpleTransaction| is reused as a cursor. So, no object is built per transaction.
+        """
+        transaction = SimpleTransaction()
+        for (open_date, transaction_type, namespace, symbol, account, amount, open_price, commission) in batch.iter_values():
+            transaction.open_date = open_date
+            transaction.transaction_type = transaction_type
+            transaction.namespace = namespace
+            transaction.symbol = symbol
+            transaction.account = account
+            transaction.amount = amount
+            transaction.open_price = open_price
+            transaction.commission = commission
+            self.record(transaction)
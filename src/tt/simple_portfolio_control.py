@@ -1,6 +1,6 @@
 import datetime
 import os
-from typing import Optional
+from typing import Iterable, Optional
 
 from loguru import logger
 
@@ -9,6 +9,7 @@ from tt.fact_data_control import FactDataControl
 from tt.simple_portfolio import SimplePortfolio
 from tt.simple_transaction import SimpleTransaction
 from tt.symbol_config import SymbolConfig
+from tt.transaction_batch import TransactionBatch
 from tt.yahoo_finance_web_exporter import YahooFinanceWebExporter
 
 
@@ -46,16 +47,23 @@ class SimplePortfolioControl:
 
     def build_portfolio(
         self,
-        list_of_simple_transactions: list[SimpleTransaction],
+        list_of_simple_transactions: Iterable[SimpleTransaction] | TransactionBatch,
         portfolio_snapshot_date: Optional[datetime.date],
     ):
         p = SimplePortfolio()
-        for transaction in list_of_simple_transactions:
-            # If `portfolio_snapshot_date` is given.
+        if isinstance(list_of_simple_transactions, TransactionBatch):
+            # A batch is filtered as a whole. No |SimpleTransaction| object is built per transaction.
+            batch = list_of_simple_transactions
             if portfolio_snapshot_date:
-                if transaction.open_date > portfolio_snapshot_date:
-                    continue
-            p.record(transaction)
+                batch = batch.filter_by_open_date(portfolio_snapshot_date)
+            p.record_batch(batch)
+        else:
+            for transaction in list_of_simple_transactions:
+                # If `portfolio_snapshot_date` is given.
+                if portfolio_snapshot_date:
+                    if transaction.open_date > portfolio_snapshot_date:
+                        continue
+                p.record(transaction)
 
         if portfolio_snapshot_date:
             self._apply_stock_split(portfolio_snapshot_date, p)
@@ -1,5 +1,6 @@
 import datetime
 from enum import Enum
+from sys import intern
 
 
 class SimpleTransaction:
@@ -18,6 +19,32 @@ class SimpleTransaction:
         TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM = 6
         TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM = 7
 
+    # Strings of types. They are stored in the DB.
+    TRANSACTION_TYPE_STRING_TABLE = {
+        SimpleTransactionTypeEnum.TYPE_SELL: "SELL",
+        SimpleTransactionTypeEnum.TYPE_BUY: "BUY",
+        SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_INSERTION: "STOCK_SPLIT_MERGE_INSERTION",
+        SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION: "STOCK_SPLIT_MERGE_DELETION",
+        SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT: "INBOUND_TRANSFER_RESULTED_FROM_EVENT",
+        SimpleTransactionTypeEnum.TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM: "STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM",
+        SimpleTransactionTypeEnum.TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM: "STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM",
+    }
+    # The reverse of |TRANSACTION_TYPE_STRING_TABLE|. An unknown string is |TYPE_OTHER|.
+    TRANSACTION_TYPE_TABLE = {value: key for (key, value) in TRANSACTION_TYPE_STRING_TABLE.items()}
+    TRANSACTION_TYPE_TABLE["OTHER"] = SimpleTransactionTypeEnum.TYPE_OTHER
+
+    # There are millions of transactions in a long history. So, no |__dict__| per transaction.
+    __slots__ = (
+        "namespace",
+        "account",
+        "amount",
+        "commission",
+        "open_date",
+        "open_price",
+        "symbol",
+        "transaction_type",
+    )
+
     def __init__(
         self,
         symbol="",
@@ -26,78 +53,30 @@ class SimpleTransaction:
         open_price=0.0,
         open_date=datetime.date(1970, 1, 1),
         commission=0.0,
+        namespace="",
+        account="",
     ):
-        self.namespace = "" # string
-        self.account = ""  # string
+        # Strings are interned. So, transactions of the same symbol share one string - i.e. ones read from the DB.
+        self.namespace = intern(namespace)  # string
+        self.account = intern(account)  # string
         self.amount = amount  # float
         self.commission = commission  # float
         self.open_date = open_date  # Python datetime.date
         self.open_price = open_price  # float
-        self.symbol = symbol  # string
+        self.symbol = intern(symbol)  # string
         self.transaction_type = transaction_type  # SimpleTransactionTypeEnum
 
     def __str__(self):
         transaction_type_as_string = self.get_transaction_type_string()
         return f"symbol({self.symbol}) transaction_type({transaction_type_as_string}) open_price({self.open_price}) amount({self.amount}) commission({self.commission}) open_date({self.open_date})"
 
-    def get_transaction_type_string(self):
-        array_of_transaction_type = [
-            self.SimpleTransactionTypeEnum.TYPE_SELL,
-            self.SimpleTransactionTypeEnum.TYPE_BUY,
-            self.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_INSERTION,
-            self.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION,
-            self.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT,
-            self.SimpleTransactionTypeEnum.TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM,
-            self.SimpleTransactionTypeEnum.TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM,
-        ]
-        array_of_transaction_type_string = [
-            "SELL",
-            "BUY",
-            "STOCK_SPLIT_MERGE_INSERTION",
-            "STOCK_SPLIT_MERGE_DELETION",
-            "INBOUND_TRANSFER_RESULTED_FROM_EVENT",
-            "STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM",
-            "STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM",
-        ]
-        assert SimpleTransaction.NUMBER_OF_TYPES - 1 == len(array_of_transaction_type)
-        assert len(array_of_transaction_type) == len(array_of_transaction_type_string)
-
-        try:
-            targetIndex = array_of_transaction_type.index(self.transaction_type)
-            type_as_string = array_of_transaction_type_string[targetIndex]
-        except ValueError:
-            type_as_string = "OTHER"
-        return type_as_string
+    def get_transaction_type_string(self) -> str:
+        return SimpleTransaction.TRANSACTION_TYPE_STRING_TABLE.get(self.transaction_type, "OTHER")
 
     @staticmethod
     def get_transaction_type_from_string(
         transaction_type_string: str,
     ) -> SimpleTransactionTypeEnum:
-        if transaction_type_string == "SELL":
-            return SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL
-        elif transaction_type_string == "BUY":
-            return SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY
-        elif transaction_type_string == "STOCK_SPLIT_MERGE_INSERTION":
-            return (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_INSERTION
-            )
-        elif transaction_type_string == "STOCK_SPLIT_MERGE_DELETION":
-            return (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION
-            )
-        elif transaction_type_string == "INBOUND_TRANSFER_RESULTED_FROM_EVENT":
-            return (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT
-            )
-        elif transaction_type_string == "STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM":
-            return (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM
-            )
-        elif transaction_type_string == "STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM":
-            return (
-                SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM
-            )
-        elif transaction_type_string == "OTHER":
-            return SimpleTransaction.SimpleTransactionTypeEnum.TYPE_OTHER
-        else:
-            return SimpleTransaction.SimpleTransactionTypeEnum.TYPE_OTHER
+        return SimpleTransaction.TRANSACTION_TYPE_TABLE.get(
+            transaction_type_string, SimpleTransaction.SimpleTransactionTypeEnum.TYPE_OTHER
+        )
@@ -1,11 +1,18 @@
 import datetime
+import hashlib
+import os
+import tempfile
+import time
+from typing import Iterable, Iterator
 
-import mariadb
 from loguru import logger
 
+import tt.streaming_pipeline
+from tt.db_backend import DATABASE_ERRORS
 from tt.db_connection import DBConnection
 from tt.db_impl_base import DBImplBase
 from tt.simple_transaction import SimpleTransaction
+from tt.transaction_batch import TransactionBatch
 
 
 class SimpleTransactionDBImpl(DBImplBase):
@@ -40,17 +47,90 @@ class SimpleTransactionDBImpl(DBImplBase):
                 == SimpleTransaction.CORE_FIELD_LENGTH
             )
 
+            # Range and set filters. None means no condition.
+            self.open_date_from = None  # datetime.date. Inclusive.
+            self.open_date_to = None  # datetime.date. Inclusive.
+            self.set_of_symbols = None  # set[str]
+            self.set_of_transaction_types = None  # set[SimpleTransaction.SimpleTransactionTypeEnum]
+            self.account = None  # string
+
+        def get_where_clause_and_parameters(self) -> tuple[str, list]:
+            """
+            Returns:
+                (A where clause with `?` placeholders, parameters) - i.e. ("WHERE symbol IN (?, ?) AND open_date >= ?", ["A", "B", date])
+                ("", []) if there is no condition.
+                Column names are fixed keys and values are bound. So, filters of the same shape share one statement.
+            """
+            list_of_conditions = []
+            list_of_parameters = []
+            for key, value in self.flag_filter_by.items():
+                if value is True:
+                    list_of_conditions.append(f"{key} = ?")
+                    list_of_parameters.append(self.value_dict[key])
+            if self.account is not None:
+                list_of_conditions.append("account = ?")
+                list_of_parameters.append(self.account)
+            if self.set_of_symbols is not None:
+                list_of_symbols = sorted(self.set_of_symbols)
+                list_of_conditions.append(get_in_condition("symbol", len(list_of_symbols)))
+                list_of_parameters.extend(list_of_symbols)
+            if self.set_of_transaction_types is not None:
+                list_of_type_strings = sorted(
+                    SimpleTransaction.TRANSACTION_TYPE_STRING_TABLE.get(transaction_type, "OTHER")
+                    for transaction_type in self.set_of_transaction_types
+                )
+                list_of_conditions.append(get_in_condition("transaction_type", len(list_of_type_strings)))
+                list_of_parameters.extend(list_of_type_strings)
+            if self.open_date_from is not None:
+                list_of_conditions.append("open_date >= ?")
+                list_of_parameters.append(self.open_date_from)
+            if self.open_date_to is not None:
+                list_of_conditions.append("open_date <= ?")
+                list_of_parameters.append(self.open_date_to)
+            if not list_of_conditions:
+                return ("", [])
+            return ("WHERE " + " AND ".join(list_of_conditions), list_of_parameters)
+
+    # A record of the same content hash is there already. Then, it is ignored.
+    # `{insert_ignore}` is |DBImplBase.backend.insert_ignore|. See |insert_sql_string|.
+    INSERT_SQL_STRING_FORMAT = (
+        "{insert_ignore} INTO simple_transactions "
+        "(amount, commission, open_date, open_price, symbol, transaction_type, account, content_hash) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    DELETE_SQL_STRING = "DELETE FROM simple_transactions WHERE content_hash = ?"
+    DEFAULT_CHUNK_SIZE_FOR_INSERT = 1000
+    DEFAULT_BATCH_SIZE_FOR_FETCH = 1000
+    # Indexes for lookups of a symbol's or an account's history. A range of dates is an index range scan.
+    LIST_OF_INDEX_SQL_STRINGS = [
+        "CREATE UNIQUE INDEX IF NOT EXISTS simple_transactions_content_hash ON simple_transactions(content_hash);",
+        "CREATE INDEX IF NOT EXISTS simple_transactions_symbol_open_date ON simple_transactions(symbol, open_date);",
+        "CREATE INDEX IF NOT EXISTS simple_transactions_account_open_date ON simple_transactions(account, open_date);",
+    ]
+
     def __init__(self, db_connection):
-        self.db_connection = db_connection
+        super().__init__(db_connection)
+        self.table_name = "simple_transactions"
+        self.insert_sql_string = self.INSERT_SQL_STRING_FORMAT.format(insert_ignore=self.backend.insert_ignore)
+        self.chunk_size_for_insert = self.DEFAULT_CHUNK_SIZE_FOR_INSERT  # The number of rows per `executemany`
+        self.flag_use_load_data = False  # If it is True, |export_all| uses `LOAD DATA LOCAL INFILE`.
+        self.set_of_existing_hashes = set()  # Content hashes of records in the table
+        self.set_of_incoming_hashes = set()  # Content hashes of exported transactions
+        self.occurrence_table = {}  # dict[row, int] of rows of |occurrence_date|. See |_get_content_hash|.
+        self.occurrence_date = None  # `open_date` of rows in |occurrence_table|
+        self.count_inserted = 0
+        self.count_unchanged = 0
+        self.count_removed = 0
+        self.time_export_started = None
+        self.last_record_id = None  # The id of the last record yielded by |iter_records|. It is for |after_id| of the next page.
 
     def get_all_records(self) -> list[SimpleTransaction]:
         list_of_simple_transaction_records = []
         cur = self.db_connection.cur()
-        sql_string = "USE finance"
-        cur.execute(sql_string)
-        sql_string = "SELECT amount, commission, open_date, open_price, symbol, transaction_type FROM simple_transactions"
+        sql_string = "SELECT account, amount, commission, open_date, open_price, symbol, transaction_type FROM simple_transactions"
         cur.execute(sql_string)
         for (
+            account,
             amount,
             commission,
             open_date,
@@ -62,26 +142,80 @@ class SimpleTransactionDBImpl(DBImplBase):
                 transaction_type_as_str
             )
             t = SimpleTransaction(
-                symbol, transaction_type, amount, open_price, open_date, commission
+                symbol, transaction_type, amount, open_price, open_date, commission, account=account
             )
             list_of_simple_transaction_records.append(t)
 
         return list_of_simple_transaction_records
 
+    def iter_records(
+        self,
+        simple_transaction_filter: SimpleTransactionFilter | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE_FOR_FETCH,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> Iterator[SimpleTransaction]:
+        """
+        Yield records in the order of id, |batch_size| rows at a time, with an unbuffered cursor.
+        So, the memory and the time to the first record do not depend on the size of the table.
+
+        Args:
+            after_id: Keyset pagination. Only records of which id is greater than it are yielded.
+                      Pass |last_record_id| of the previous page.
+            limit: The maximum number of records
+        """
+        assert batch_size > 0
+        if simple_transaction_filter is None:
+            simple_transaction_filter = SimpleTransactionDBImpl.SimpleTransactionFilter()
+        (where_clause_str, list_of_parameters) = simple_transaction_filter.get_where_clause_and_parameters()
+        sql_string = "SELECT id, account, amount, commission, open_date, open_price, symbol, transaction_type FROM simple_transactions"
+        if after_id is not None:
+            where_clause_str = (where_clause_str + " AND id > ?") if where_clause_str else "WHERE id > ?"
+            list_of_parameters.append(after_id)
+        if where_clause_str:
+            sql_string += " " + where_clause_str
+        sql_string += " ORDER BY id"
+        if limit is not None:
+            sql_string += " LIMIT ?"
+            list_of_parameters.append(limit)
+
+        self.last_record_id = None
+        cur = self.db_connection.unbuffered_cur()
+        try:
+            try:
+                cur.execute(sql_string, tuple(list_of_parameters))
+            except DATABASE_ERRORS as e:
+                self.handle_general_sql_execution_error(e, sql_string)
+            get_transaction_type_from_string = SimpleTransaction.get_transaction_type_from_string
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    return
+                for (record_id, account, amount, commission, open_date, open_price, symbol, transaction_type_as_str) in rows:
+                    self.last_record_id = record_id
+                    yield SimpleTransaction(
+                        symbol, get_transaction_type_from_string(transaction_type_as_str), amount, open_price, open_date, commission, account=account
+                    )
+        finally:
+            # If a caller stops early, the rest of the result set is discarded here.
+            cur.close()
+
     def get_records_with_filter(
         self, simple_transaction_filter: SimpleTransactionFilter
     ) -> list[SimpleTransaction]:
-        where_clause_str = self._get_where_clause(simple_transaction_filter)
+        (where_clause_str, list_of_parameters) = simple_transaction_filter.get_where_clause_and_parameters()
         list_of_simple_transaction_records = []
         cur = self.db_connection.cur()
-        sql_string = "USE finance"
-        cur.execute(sql_string)
-        sql_string = "SELECT amount, commission, open_date, open_price, symbol, transaction_type FROM simple_transactions"
+        sql_string = "SELECT account, amount, commission, open_date, open_price, symbol, transaction_type FROM simple_transactions"
         if len(where_clause_str) > 0:
             sql_string += " " + where_clause_str
         sql_string += " " + "ORDER BY open_date"
-        cur.execute(sql_string)
+        try:
+            cur.execute(sql_string, tuple(list_of_parameters))
+        except DATABASE_ERRORS as e:
+            self.handle_general_sql_execution_error(e, sql_string)
         for (
+            account,
             amount,
             commission,
             open_date,
@@ -93,92 +227,248 @@ class SimpleTransactionDBImpl(DBImplBase):
                 transaction_type_as_str
             )
             t = SimpleTransaction(
-                symbol, transaction_type, amount, open_price, open_date, commission
+                symbol, transaction_type, amount, open_price, open_date, commission, account=account
             )
             list_of_simple_transaction_records.append(t)
 
         return list_of_simple_transaction_records
 
-    def _get_where_clause(
-        self, simple_transaction_filter: SimpleTransactionFilter
-    ) -> str:
-        flag_is_there_any_true_flag = False
-        len_filters = 0
-        for key, value in simple_transaction_filter.flag_filter_by.items():
-            if value is True:
-                flag_is_there_any_true_flag = True
-                len_filters += 1
-
-        if not flag_is_there_any_true_flag:
-            return ""
-
-        str_to_return = "WHERE"
-        index = 0
-        for key, value in simple_transaction_filter.flag_filter_by.items():
-            if value is True:
-                str_to_return += " "
-                str_to_return += key
-                str_to_return += "="
-                value_given = simple_transaction_filter.value_dict[key]
-                if simple_transaction_filter.flag_sql_escaping_needed[key] is True:
-                    str_to_return += self.escape_sql_string(value_given)
-                else:
-                    str_to_return += value_given
-                if index != len_filters - 1:
-                    str_to_return += " AND"
-                index += 1
-        return str_to_return
-
     def delete_all_records_from_simple_transactions_table(self):
         cur = self.db_connection.cur()
         try:
             sql_string = "DELETE FROM simple_transactions;"
             cur.execute(sql_string)
-        except mariadb.Error as e:
+        except DATABASE_ERRORS as e:
             self.handle_general_sql_execution_error(e, sql_string)
 
-    def export_all(self, list_of_simple_transactions):
+    def export_all(self, list_of_simple_transactions: Iterable[SimpleTransaction]) -> None:
+        """
+        Synchronize records with |list_of_simple_transactions| in a single transaction.
+        Only new records are inserted. Only records which have disappeared are deleted.
+        """
+        self.prepare_export()
+        if self.flag_use_load_data:
+            self._export_rows(self._iter_rows(list_of_simple_transactions))
+        else:
+            for chunk in tt.streaming_pipeline.iter_chunks(list_of_simple_transactions, self.chunk_size_for_insert):
+                self.export_chunk(chunk)
+        self.finish_export()
 
+    def prepare_export(self) -> None:
+        """
+        Create or migrate the table if needed. Then, start a transaction and read content hashes of existing records.
+        Call this before |export_chunk|. Call |finish_export| after the last chunk.
+        """
+        if self.flag_use_load_data and not self.backend.flag_supports_load_data:
+            logger.warning(f"`LOAD DATA` is not supported by the ({self.backend.name}) backend. Rows are inserted with `executemany`.")
+            self.flag_use_load_data = False
         cur = self.db_connection.cur()
 
+        database_name = self.db_connection.database_name
         try:
-            sql_string = "CREATE DATABASE IF NOT EXISTS finance CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;"
-            cur.execute(sql_string)
-            sql_string = "USE finance;"
-            cur.execute(sql_string)
+            sql_string = f"CREATE DATABASE {database_name}"
+            self.backend.create_database(cur, database_name)
+            sql_string = f"USE {database_name}"
+            self.backend.use_database(cur, database_name)
             sql_string = (
                 "CREATE TABLE IF NOT EXISTS simple_transactions(\n"
-                "id bigint auto_increment,\n"
+                f"id {self.backend.auto_increment_primary_key},\n"
                 "amount float,\n"
                 "commission float,\n"
                 "open_date date,\n"
                 "open_price float,\n"
                 "symbol varchar(512) not null,\n"
                 "transaction_type varchar(512) not null,\n"
-                "primary key(id)\n"
+                "account varchar(512) not null default '',\n"
+                "content_hash char(32)\n"
                 ");\n"
             )
             cur.execute(sql_string)
-        except mariadb.Error as e:
+            # A table which has been created before these columns.
+            sql_string = "ALTER TABLE simple_transactions ADD COLUMN account"
+            self.backend.add_column_if_not_exists(cur, self.table_name, "account", "varchar(512) not null default ''")
+            sql_string = "ALTER TABLE simple_transactions ADD COLUMN content_hash"
+            self.backend.add_column_if_not_exists(cur, self.table_name, "content_hash", "char(32)")
+            for sql_string in self.LIST_OF_INDEX_SQL_STRINGS:
+                cur.execute(sql_string)
+            # The connection is in the autocommit mode. Group all changes into one transaction.
+            # So, there is one commit per export instead of one per row, and readers never see a half-written table.
+            sql_string = self.backend.start_transaction_sql_string
+            cur.execute(sql_string)
+            sql_string = "SELECT content_hash FROM simple_transactions WHERE content_hash IS NOT NULL;"
+            cur.execute(sql_string)
+            self.set_of_existing_hashes = {content_hash for (content_hash,) in cur}
+        except DATABASE_ERRORS as e:
+            self.handle_general_sql_execution_error(e, sql_string)
+
+        self.set_of_incoming_hashes = set()
+        self.occurrence_table = {}
+        self.occurrence_date = None
+        self.count_inserted = 0
+        self.count_unchanged = 0
+        self.count_removed = 0
+        self.time_export_started = time.perf_counter()
+
+    def export_chunk(self, chunk_of_simple_transactions: list[SimpleTransaction]) -> None:
+        self._export_rows(self._iter_rows(chunk_of_simple_transactions))
+
+    def finish_export(self) -> tuple[int, int, int]:
+        """
+        Delete records which have disappeared. Then, commit the transaction started by |prepare_export|.
+
+        Returns:
+            (The number of inserted records, the number of unchanged records, the number of removed records)
+        """
+        list_of_removed_hashes = [(content_hash,) for content_hash in self.set_of_existing_hashes - self.set_of_incoming_hashes]
+        cur = self.db_connection.cur()
+        try:
+            sql_string = self.DELETE_SQL_STRING
+            for chunk in tt.streaming_pipeline.iter_chunks(list_of_removed_hashes, self.chunk_size_for_insert):
+                cur.executemany(sql_string, chunk)
+            self.count_removed = len(list_of_removed_hashes)
+            # Records which have been written before content hashes.
+            sql_string = "DELETE FROM simple_transactions WHERE content_hash IS NULL;"
+            cur.execute(sql_string)
+            self.count_removed += max(cur.rowcount, 0)
+            sql_string = "COMMIT"
+            self.db_connection.commit()
+        except DATABASE_ERRORS as e:
+            self.db_connection.rollback()
             self.handle_general_sql_execution_error(e, sql_string)
+        elapsed = time.perf_counter() - self.time_export_started
+        count_rows = self.count_inserted + self.count_unchanged
+        rows_per_second = count_rows / elapsed if elapsed > 0 else 0.0
+        logger.info(
+            f"Exported ({count_rows}) transactions in {elapsed:.3f} s. ({rows_per_second:,.0f} rows/s) "
+            f"Inserted ({self.count_inserted}) Unchanged ({self.count_unchanged}) Removed ({self.count_removed})"
+        )
+        return (self.count_inserted, self.count_unchanged, self.count_removed)
 
-        self.delete_all_records_from_simple_transactions_table()
+    def export_transaction_batch(self, batch: TransactionBatch) -> None:
+        """
+        Export a batch without building |SimpleTransaction| objects.
+        It synchronizes records as |export_all| does.
+        """
+        self.prepare_export()
+        transaction_type_string_table = SimpleTransaction.TRANSACTION_TYPE_STRING_TABLE
+        rows = (
+            (amount, commission, open_date, open_price, symbol, transaction_type_string_table.get(transaction_type, "OTHER"), account)
+            for (open_date, transaction_type, _, symbol, account, amount, open_price, commission) in batch.iter_values()
+        )
+        if self.flag_use_load_data:
+            self._export_rows(rows)
+        else:
+            for chunk in tt.streaming_pipeline.iter_chunks(rows, self.chunk_size_for_insert):
+                self._export_rows(chunk)
+        self.finish_export()
 
+    @staticmethod
+    def _iter_rows(list_of_simple_transactions: Iterable[SimpleTransaction]) -> Iterator[tuple]:
         for transaction in list_of_simple_transactions:
-            try:
-                open_date = self.escape_sql_string(
-                    transaction.open_date.strftime("%Y-%m-%d")
-                )
-                symbol = self.escape_sql_string(transaction.symbol)
-                transaction_type = self.escape_sql_string(
-                    transaction.get_transaction_type_string()
-                )
-                sql_string = (
-                    f"INSERT INTO simple_transactions \n"
-                    f"(amount, commission, open_date, open_price, symbol, transaction_type) \n"
-                    f"VALUES \n"
-                    f"({transaction.amount}, {transaction.commission}, {open_date}, {transaction.open_price}, {symbol}, {transaction_type}) \n"
+            yield (
+                transaction.amount,
+                transaction.commission,
+                transaction.open_date,
+                transaction.open_price,
+                transaction.symbol,
+                transaction.get_transaction_type_string(),
+                transaction.account,
+            )
+
+    def _get_content_hash(self, row: tuple) -> str:
+        """
+        A natural key of a record. Identical transactions - i.e. Two buys of the same amount and price on a day - are told apart
+        by their occurrence. So, the n-th of them gets the same key on every run.
+        Transactions come in the order of `open_date`. So, occurrences of the current date are kept only, and the memory is bounded by a day.
+        """
+        (amount, commission, open_date, open_price, symbol, transaction_type_string, account) = row
+        if open_date != self.occurrence_date:
+            if self.occurrence_date is not None and open_date < self.occurrence_date:
+                logger.warning(f"Transactions are not sorted by open_date: ({open_date}) after ({self.occurrence_date}).")
+            self.occurrence_table = {}
+            self.occurrence_date = open_date
+        occurrence = self.occurrence_table.get(row, 0)
+        self.occurrence_table[row] = occurrence + 1
+        key = f"{open_date.isoformat()}|{transaction_type_string}|{symbol}|{account}|{amount!r}|{commission!r}|{open_price!r}|{occurrence}"
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _export_rows(self, rows: Iterable[tuple]) -> None:
+        """
+        Args:
+            rows: Tuples of (amount, commission, open_date, open_price, symbol, transaction_type_string, account)
+        """
+        list_of_new_rows = []
+        for row in rows:
+            content_hash = self._get_content_hash(row)
+            self.set_of_incoming_hashes.add(content_hash)
+            if content_hash in self.set_of_existing_hashes:
+                self.count_unchanged += 1
+            else:
+                list_of_new_rows.append(row + (content_hash,))
+        if self.flag_use_load_data:
+            self._load_rows(list_of_new_rows)
+        else:
+            for chunk in tt.streaming_pipeline.iter_chunks(list_of_new_rows, self.chunk_size_for_insert):
+                self._insert_rows(chunk)
+
+    def _insert_rows(self, rows: list[tuple]) -> None:
+        """
+        Insert rows with one parameterized statement. Values are bound by the driver. So, they need no escaping.
+
+        Args:
+            rows: Tuples of (amount, commission, open_date, open_price, symbol, transaction_type_string, account, content_hash)
+        """
+        if not rows:
+            return
+        cur = self.db_connection.cur()
+        try:
+            cur.executemany(self.insert_sql_string, rows)
+        except DATABASE_ERRORS as e:
+            self.db_connection.rollback()
+            self.handle_general_sql_execution_error(e, self.insert_sql_string)
+        self.count_inserted += len(rows)
+
+    def _load_rows(self, rows: list[tuple]) -> None:
+        """
+        Write rows into a temporary tab-separated file. Then, load it with `LOAD DATA LOCAL INFILE`.
+        It is faster than |_insert_rows| for a very large history.
+        It needs `local_infile: true` in the `mariadb` section of the global configuration.
+        """
+        if not rows:
+            return
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="\n", suffix=".tsv", delete=False) as f:
+            temporary_file_path = f.name
+            for (amount, commission, open_date, open_price, symbol, transaction_type_string, account, content_hash) in rows:
+                f.write(
+                    f"{amount}\t{commission}\t{open_date.isoformat()}\t{open_price}\t"
+                    f"{escape_load_data_field(symbol)}\t{escape_load_data_field(transaction_type_string)}\t"
+                    f"{escape_load_data_field(account)}\t{content_hash}\n"
                 )
-                cur.execute(sql_string)
-            except mariadb.Error as e:
-                self.handle_general_sql_execution_error(e, sql_string)
+        cur = self.db_connection.cur()
+        sql_string = (
+            f"LOAD DATA LOCAL INFILE {self.escape_sql_string(temporary_file_path)} \n"
+            f"IGNORE INTO TABLE simple_transactions CHARACTER SET utf8mb4 \n"
+            f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' \n"
+            f"(amount, commission, open_date, open_price, symbol, transaction_type, account, content_hash)"
+        )
+        try:
+            cur.execute(sql_string)
+        except DATABASE_ERRORS as e:
+            self.db_connection.rollback()
+            self.handle_general_sql_execution_error(e, sql_string)
+        finally:
+            os.remove(temporary_file_path)
+        self.count_inserted += len(rows)
+
+
+def get_in_condition(column_name: str, count: int) -> str:
+    # i.e. "symbol IN (?, ?, ?)"
+    if count <= 0:
+        # An empty set matches nothing.
+        return "FALSE"
+    return f"{column_name} IN ({', '.join(['?'] * count)})"
+
+
+def escape_load_data_field(value: str) -> str:
+    # The default escape character of `LOAD DATA` is a backslash.
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
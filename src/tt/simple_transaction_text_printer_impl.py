@@ -1,3 +1,5 @@
+from typing import Iterable
+
 from tt.simple_transaction import SimpleTransaction
 from tt.text_printer_impl_base import TextPrinterImplBase
 
@@ -7,6 +9,6 @@ class SimpleTransactionTextPrinterImpl(TextPrinterImplBase):
     def __init__(self):
         pass
 
-    def print_all(self, list_of_simple_transaction: list[SimpleTransaction]) -> None:
+    def print_all(self, list_of_simple_transaction: Iterable[SimpleTransaction]) -> None:
         for t in list_of_simple_transaction:
             print(t)
@@ -0,0 +1,394 @@
+"""
+A profiler of SQL statements.
+
+Statements are grouped by their shapes - i.e. literals are replaced with `?` and `IN (?, ?, ?)` becomes `IN (...)`.
+Per a shape, it records the number of calls, rows, the total and maximum latency and a latency histogram.
+A statement slower than a threshold is logged as a slow query.
+
+It hooks SQLAlchemy engine events for ORM sessions, and wraps raw DBAPI cursors of |DBConnection.cur|.
+When it is disabled, neither a hook nor a wrapper is installed. So, nothing is paid.
+
+Checkouts of the connection pool and their waits are recorded, too. See |DBConnection.get_pool_status|.
+
+Statistics are accumulated in a file across runs. See `tt show db-stats`.
+"""
+
+import bisect
+import functools
+import json
+import os
+import re
+import time
+
+from loguru import logger
+
+from tt.constants import Constants
+from tt.text_printer_impl_base import TextPrinterImplBase
+
+# Upper bounds of histogram buckets in milliseconds. The last bucket has no upper bound.
+HISTOGRAM_BUCKET_BOUNDS_IN_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+DEFAULT_SLOW_QUERY_THRESHOLD_IN_MS = 500
+DEFAULT_PROFILE_FILE_PATH = os.path.join(Constants.cache_dir_path, "sql_profile.json")
+MAX_CACHED_SHAPES = 1024
+
+STRING_LITERAL_PATTERN = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+NUMBER_LITERAL_PATTERN = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b")
+PARAMETER_PATTERN = re.compile(r"%\(\w+\)s|%s|:\w+\b")
+IN_LIST_PATTERN = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+VALUES_LIST_PATTERN = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=MAX_CACHED_SHAPES)
+def get_statement_shape(sql_string: str) -> str:
+    """
+    Returns:
+        i.e. "SELECT id FROM t WHERE symbol IN (...) AND amount > ?" for "SELECT id FROM t WHERE symbol IN ('A', 'B') AND amount > 1.5;"
+    """
+    shape = STRING_LITERAL_PATTERN.sub("?", sql_string)
+    shape = NUMBER_LITERAL_PATTERN.sub("?", shape)
+    shape = PARAMETER_PATTERN.sub("?", shape)
+    shape = WHITESPACE_PATTERN.sub(" ", shape).strip().rstrip(";").rstrip()
+    shape = IN_LIST_PATTERN.sub("IN (...)", shape)
+    shape = VALUES_LIST_PATTERN.sub(r"\1", shape)
+    return shape
+
+
+class SQLStatementStatistics:
+
+    def __init__(self, shape: str):
+        self.shape = shape
+        self.count_calls = 0
+        self.count_rows = 0  # Rows which are affected or returned, when they are known.
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKET_BOUNDS_IN_MS) + 1)  # The number of calls per a bucket of |HISTOGRAM_BUCKET_BOUNDS_IN_MS|
+
+    def record(self, seconds: float, count_rows: int) -> None:
+        self.count_calls += 1
+        self.count_rows += max(count_rows, 0)
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.histogram[bisect.bisect_left(HISTOGRAM_BUCKET_BOUNDS_IN_MS, seconds * 1000)] += 1
+
+    def merge(self, other: "SQLStatementStatistics") -> None:
+        self.count_calls += other.count_calls
+        self.count_rows += other.count_rows
+        self.total_seconds += other.total_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.histogram = [a + b for (a, b) in zip(self.histogram, other.histogram)]
+
+    def get_percentile_upper_bound_in_ms(self, percentile: float) -> float:
+        """
+        Returns:
+            The upper bound of the bucket which holds the |percentile|. It is |max_seconds| for the last bucket.
+        """
+        rank = percentile / 100 * self.count_calls
+        cumulative = 0
+        for (index, count) in enumerate(self.histogram):
+            cumulative += count
+            if cumulative >= rank and count > 0:
+                if index < len(HISTOGRAM_BUCKET_BOUNDS_IN_MS):
+                    return min(HISTOGRAM_BUCKET_BOUNDS_IN_MS[index], self.max_seconds * 1000)
+                break
+        return self.max_seconds * 1000
+
+    def to_dict(self) -> dict:
+        return {
+            "shape": self.shape,
+            "count_calls": self.count_calls,
+            "count_rows": self.count_rows,
+            "total_seconds": self.total_seconds,
+            "max_seconds": self.max_seconds,
+            "histogram": self.histogram,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "SQLStatementStatistics":
+        statistics = cls(d["shape"])
+        statistics.count_calls = d["count_calls"]
+        statistics.count_rows = d["count_rows"]
+        statistics.total_seconds = d["total_seconds"]
+        statistics.max_seconds = d["max_seconds"]
+        if len(d["histogram"]) == len(statistics.histogram):
+            statistics.histogram = list(d["histogram"])
+        return statistics
+
+
+class ConnectionPoolStatistics:
+    """Counters of |DBConnectionPoolMetrics|, accumulated across runs."""
+
+    def __init__(self):
+        self.count_runs = 0  # The number of connections - i.e. runs of `tt` - which have been closed
+        self.count_connect = 0
+        self.count_checkout = 0
+        self.count_checkin = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, pool_status: dict) -> None:
+        """
+        Args:
+            pool_status: See |DBConnection.get_pool_status|.
+        """
+        self.count_runs += 1
+        self.count_connect += pool_status["count_connect"]
+        self.count_checkout += pool_status["count_checkout"]
+        self.count_checkin += pool_status["count_checkin"]
+        self.total_wait_seconds += pool_status["total_wait_seconds"]
+        self.max_wait_seconds = max(self.max_wait_seconds, pool_status["max_wait_seconds"])
+
+    def merge(self, other: "ConnectionPoolStatistics") -> None:
+        self.count_runs += other.count_runs
+        self.count_connect += other.count_connect
+        self.count_checkout += other.count_checkout
+        self.count_checkin += other.count_checkin
+        self.total_wait_seconds += other.total_wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, other.max_wait_seconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "count_runs": self.count_runs,
+            "count_connect": self.count_connect,
+            "count_checkout": self.count_checkout,
+            "count_checkin": self.count_checkin,
+            "total_wait_seconds": self.total_wait_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "ConnectionPoolStatistics":
+        statistics = cls()
+        statistics.count_runs = d["count_runs"]
+        statistics.count_connect = d["count_connect"]
+        statistics.count_checkout = d["count_checkout"]
+        statistics.count_checkin = d["count_checkin"]
+        statistics.total_wait_seconds = d["total_wait_seconds"]
+        statistics.max_wait_seconds = d["max_wait_seconds"]
+        return statistics
+
+
+class ProfiledCursor:
+    """
+    A DBAPI cursor which reports its statements to |SQLProfiler|. Other attributes are those of the cursor.
+    Rows of a result set are counted as they are fetched. So, an unbuffered cursor is not buffered by it.
+    """
+
+    def __init__(self, cursor, sql_profiler: "SQLProfiler"):
+        self.cursor = cursor
+        self.sql_profiler = sql_profiler
+        self.statistics = None  # SQLStatementStatistics of the last statement. Fetched rows are added to it.
+
+    def execute(self, sql_string, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.cursor.execute(sql_string, *args, **kwargs)
+        finally:
+            self.statistics = self.sql_profiler.record(sql_string, time.perf_counter() - start, self._get_count_affected_rows())
+
+    def executemany(self, sql_string, seq_of_parameters, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.cursor.executemany(sql_string, seq_of_parameters, *args, **kwargs)
+        finally:
+            self.statistics = self.sql_profiler.record(sql_string, time.perf_counter() - start, self._get_count_affected_rows())
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is not None:
+            self._add_fetched_rows(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self.cursor.fetchmany(*args, **kwargs)
+        self._add_fetched_rows(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self._add_fetched_rows(len(rows))
+        return rows
+
+    def __iter__(self):
+        for row in self.cursor:
+            self._add_fetched_rows(1)
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def _get_count_affected_rows(self) -> int:
+        # Rows of a result set are counted when they are fetched.
+        if getattr(self.cursor, "description", None) is not None:
+            return 0
+        return getattr(self.cursor, "rowcount", -1)
+
+    def _add_fetched_rows(self, count: int) -> None:
+        if self.statistics is not None:
+            self.statistics.count_rows += count
+
+
+class SQLProfiler:
+
+    def __init__(self, profiler_config: dict = None):
+        """
+        Args:
+            profiler_config: The `sql_profiler` section of `global_config.yaml`. All keys are optional.
+                enabled (boolean), slow_query_threshold_ms (milliseconds) and profile_file_path
+        """
+        profiler_config = profiler_config or {}
+        self.flag_enabled = profiler_config.get("enabled", False)
+        self.slow_query_threshold_seconds = profiler_config.get("slow_query_threshold_ms", DEFAULT_SLOW_QUERY_THRESHOLD_IN_MS) / 1000
+        self.profile_file_path = profiler_config.get("profile_file_path", DEFAULT_PROFILE_FILE_PATH)
+        self.statistics_table = {}  # A shape => SQLStatementStatistics
+        self.pool_statistics = None  # ConnectionPoolStatistics of this run. It is recorded on |DBConnection.close|.
+
+    def record(self, sql_string: str, seconds: float, count_rows: int) -> SQLStatementStatistics:
+        shape = get_statement_shape(sql_string)
+        statistics = self.statistics_table.get(shape)
+        if statistics is None:
+            statistics = SQLStatementStatistics(shape)
+            self.statistics_table[shape] = statistics
+        statistics.record(seconds, count_rows)
+        if seconds >= self.slow_query_threshold_seconds:
+            logger.warning(f"Slow query: {seconds * 1000:.1f} ms: {shape}")
+        return statistics
+
+    def record_pool_status(self, pool_status: dict) -> None:
+        """
+        Args:
+            pool_status: See |DBConnection.get_pool_status|.
+        """
+        if not self.flag_enabled:
+            return
+        if self.pool_statistics is None:
+            self.pool_statistics = ConnectionPoolStatistics()
+        self.pool_statistics.record(pool_status)
+
+    def wrap_cursor(self, cursor):
+        if not self.flag_enabled:
+            return cursor
+        return ProfiledCursor(cursor, self)
+
+    def attach(self, engine) -> None:
+        if not self.flag_enabled:
+            return
+        # SQLAlchemy is imported here. So, `tt show db-stats` does not load it.
+        from sqlalchemy import event
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        # `after_cursor_execute` is not fired for a statement which raises. It is recorded here, as |ProfiledCursor| does.
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("sql_profiler_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        start = conn.info["sql_profiler_start"].pop()
+        self.record(statement, time.perf_counter() - start, getattr(cursor, "rowcount", -1))
+
+    def _handle_error(self, exception_context) -> None:
+        conn = exception_context.connection
+        if conn is None or exception_context.statement is None:
+            # i.e. An error on a connect. No statement has been started.
+            return
+        list_of_starts = conn.info.get("sql_profiler_start")
+        if not list_of_starts:
+            return
+        start = list_of_starts.pop()
+        self.record(exception_context.statement, time.perf_counter() - start, -1)
+
+    def save(self) -> None:
+        """Merges statistics into |profile_file_path|."""
+        if not self.flag_enabled or (not self.statistics_table and self.pool_statistics is None):
+            return
+        (statistics_table, pool_statistics) = load_profile(self.profile_file_path)
+        for (shape, statistics) in self.statistics_table.items():
+            if shape in statistics_table:
+                statistics_table[shape].merge(statistics)
+            else:
+                statistics_table[shape] = statistics
+        if pool_statistics is None:
+            pool_statistics = self.pool_statistics
+        elif self.pool_statistics is not None:
+            pool_statistics.merge(self.pool_statistics)
+        profile = {
+            "statements": [statistics.to_dict() for statistics in statistics_table.values()],
+            "pool": pool_statistics.to_dict() if pool_statistics is not None else None,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.profile_file_path) or ".", exist_ok=True)
+            with open(self.profile_file_path, "w", encoding="utf-8") as f:
+                json.dump(profile, f)
+        except OSError as e:
+            logger.warning(f"Failed to save SQL statistics: {e}")
+            return
+        self.statistics_table = {}
+        self.pool_statistics = None
+
+
+def load_profile(profile_file_path: str) -> tuple[dict, ConnectionPoolStatistics | None]:
+    """
+    Returns:
+        (A shape => SQLStatementStatistics, ConnectionPoolStatistics). They are empty and None if there is no file.
+    """
+    try:
+        with open(profile_file_path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except FileNotFoundError:
+        return ({}, None)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Failed to load SQL statistics: {e}")
+        return ({}, None)
+    if isinstance(profile, list):
+        # A file of an older version has statements only.
+        profile = {"statements": profile, "pool": None}
+    statistics_table = {}
+    for d in profile.get("statements", []):
+        statistics = SQLStatementStatistics.from_dict(d)
+        statistics_table[statistics.shape] = statistics
+    pool_statistics = None
+    if profile.get("pool") is not None:
+        pool_statistics = ConnectionPoolStatistics.from_dict(profile["pool"])
+    return (statistics_table, pool_statistics)
+
+
+def load_statistics_table(profile_file_path: str) -> dict:
+    """
+    Returns:
+        A shape => SQLStatementStatistics. It is empty if there is no file.
+    """
+    return load_profile(profile_file_path)[0]
+
+
+class SQLStatementStatisticsTextPrinterImpl(TextPrinterImplBase):
+
+    MAX_SHAPE_LENGTH = 160
+
+    def __init__(self):
+        pass
+
+    def print_all(self, list_of_statistics: list[SQLStatementStatistics]) -> None:
+        # The most expensive shape comes first.
+        list_of_statistics = sorted(list_of_statistics, key=lambda statistics: statistics.total_seconds, reverse=True)
+        print(f"{'calls':>8} {'rows':>10} {'total ms':>10} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>9}  statement")
+        for statistics in list_of_statistics:
+            total_ms = statistics.total_seconds * 1000
+            mean_ms = total_ms / statistics.count_calls if statistics.count_calls else 0.0
+            shape = statistics.shape
+            if len(shape) > self.MAX_SHAPE_LENGTH:
+                shape = shape[:self.MAX_SHAPE_LENGTH - 3] + "..."
+            print(
+                f"{statistics.count_calls:>8} {statistics.count_rows:>10} {total_ms:>10.1f} {mean_ms:>9.2f} "
+                f"{statistics.get_percentile_upper_bound_in_ms(50):>8.1f} {statistics.get_percentile_upper_bound_in_ms(95):>8.1f} "
+                f"{statistics.max_seconds * 1000:>9.1f}  {shape}"
+            )
+
+    def print_pool_statistics(self, pool_statistics: ConnectionPoolStatistics) -> None:
+        total_wait_ms = pool_statistics.total_wait_seconds * 1000
+        mean_wait_ms = total_wait_ms / pool_statistics.count_checkout if pool_statistics.count_checkout else 0.0
+        print(f"{'runs':>8} {'connects':>10} {'checkouts':>10} {'checkins':>10} {'total wait ms':>14} {'mean wait ms':>13} {'max wait ms':>12}")
+        print(
+            f"{pool_statistics.count_runs:>8} {pool_statistics.count_connect:>10} {pool_statistics.count_checkout:>10} "
+            f"{pool_statistics.count_checkin:>10} {total_wait_ms:>14.1f} {mean_wait_ms:>13.3f} {pool_statistics.max_wait_seconds * 1000:>12.1f}"
+        )
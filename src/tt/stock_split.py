@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 import os
+from typing import Callable
 
 import pandas
 import sqlalchemy
@@ -10,7 +11,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
 
 from tt.db_connection import DBConnection
-from tt.db_impl_base import DBImplBase
+from tt.db_impl_base import DBImplBase, iter_row_dicts
 
 Base = declarative_base()  # An sqlalchemy's base class.
 
@@ -88,20 +89,16 @@ class StockSplitDBImpl(DBImplBase):
         StockSplit.__table__.drop(self.db_connection.engine)
         return True
 
-    def insert_records(self, list_of_stock_split: list[StockSplit]) -> bool:
-        session = self._get_session()
-        try:
-            session.add_all(list_of_stock_split)
-            session.commit()
-            return True
-        except SQLAlchemyError as e:
-            session.rollback()
-            logger.error(f"Error during record insertion: {e}")
-            return False
-        finally:
-            # The finally block still executes before the function actually returns.
-            # The finally block still executes, even if return is called inside the except.
-            session.close()
+    def insert_records(
+        self, list_of_stock_split: list[StockSplit], progress_callback: Callable[[int], None] | None = None
+    ) -> bool:
+        """
+        Insert records in chunks with a Core `insert()`. See |DBImplBase.bulk_insert|.
+        """
+        (result, _) = self.bulk_insert(
+            StockSplit.__table__, iter_row_dicts(list_of_stock_split, StockSplit.__table__), progress_callback
+        )
+        return result
 
     def get_all_filtered_by_symbol_and_symbol_namespace(
         self, symbol: str, symbol_namespace
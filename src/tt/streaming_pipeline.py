@@ -0,0 +1,47 @@
+"""
+This module provides stages to build a streaming pipeline over iterators.
+
+Each stage consumes an iterator and yields items. A stage holds, at most, a buffer of a given size.
+So, the peak memory of a pipeline does not depend on the number of items which flow through it.
+"""
+
+import itertools
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_BUFFER_SIZE = 1000
+
+
+def iter_chunks(iterable: Iterable[T], buffer_size: int = DEFAULT_BUFFER_SIZE) -> Iterator[list[T]]:
+    """
+    Yield lists of up to `buffer_size` items.
+    """
+    assert buffer_size > 0
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, buffer_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def tap(iterable: Iterable[T], sink: Callable[[list[T]], None], buffer_size: int = DEFAULT_BUFFER_SIZE) -> Iterator[T]:
+    """
+    Pass items through to the next stage. On the way, hand them over to `sink` in chunks of up to `buffer_size` items.
+    A chunk is handed over to `sink` before its items are yielded.
+    """
+    for chunk in iter_chunks(iterable, buffer_size):
+        sink(chunk)
+        yield from chunk
+
+
+def peek(iterable: Iterable[T]) -> tuple[T | None, Iterator[T]]:
+    """
+    Return the first item, or None if there is no item, along with an iterator which still yields all items.
+    """
+    iterator = iter(iterable)
+    first = next(iterator, None)
+    if first is None:
+        return (None, iterator)
+    return (first, itertools.chain([first], iterator))
@@ -0,0 +1,235 @@
+"""
+A columnar container of transactions backed by NumPy arrays.
+
+A list of |SimpleTransaction| holds a heap object with 8 attributes per transaction.
+A |TransactionBatch| holds a few arrays instead:
+    - open dates as `datetime64[D]`
+    - transaction types as `int8` codes - |SimpleTransactionTypeEnum| values
+    - amounts, open prices and commissions as `float64`
+    - symbols, accounts and namespaces as `int32` ids into small dictionaries of distinct strings
+"""
+
+import datetime
+from typing import Iterable, Iterator
+
+import numpy
+
+from tt.automated_text_importer_helper import AutomatedTextImporterHelper
+from tt.simple_transaction import SimpleTransaction
+
+
+class TransactionBatch:
+
+    def __init__(
+        self,
+        open_dates: numpy.ndarray,
+        transaction_types: numpy.ndarray,
+        amounts: numpy.ndarray,
+        open_prices: numpy.ndarray,
+        commissions: numpy.ndarray,
+        symbol_ids: numpy.ndarray,
+        account_ids: numpy.ndarray,
+        namespace_ids: numpy.ndarray,
+        symbols: list[str],
+        accounts: list[str],
+        namespaces: list[str],
+    ):
+        self.open_dates = open_dates  # numpy.ndarray of datetime64[D]
+        self.transaction_types = transaction_types  # numpy.ndarray of int8
+        self.amounts = amounts  # numpy.ndarray of float64
+        self.open_prices = open_prices  # numpy.ndarray of float64
+        self.commissions = commissions  # numpy.ndarray of float64
+        self.symbol_ids = symbol_ids  # numpy.ndarray of int32. An index of |symbols|.
+        self.account_ids = account_ids  # numpy.ndarray of int32. An index of |accounts|.
+        self.namespace_ids = namespace_ids  # numpy.ndarray of int32. An index of |namespaces|.
+        self.symbols = symbols  # Distinct symbols
+        self.accounts = accounts  # Distinct accounts
+        self.namespaces = namespaces  # Distinct namespaces
+
+    def __len__(self) -> int:
+        return len(self.open_dates)
+
+    def __getitem__(self, key) -> "TransactionBatch":
+        """
+        Slice a batch with a slice, a boolean mask or an array of indexes. Dictionaries are shared.
+        A slice is a view; It does not copy arrays.
+        """
+        if isinstance(key, int):
+            key = slice(key, key + 1 if key != -1 else None)
+        return TransactionBatch(
+            self.open_dates[key],
+            self.transaction_types[key],
+            self.amounts[key],
+            self.open_prices[key],
+            self.commissions[key],
+            self.symbol_ids[key],
+            self.account_ids[key],
+            self.namespace_ids[key],
+            self.symbols,
+            self.accounts,
+            self.namespaces,
+        )
+
+    def __iter__(self) -> Iterator[SimpleTransaction]:
+        return self.iter_simple_transactions()
+
+    @staticmethod
+    def empty() -> "TransactionBatch":
+        return TransactionBatch(
+            numpy.empty(0, dtype="datetime64[D]"),
+            numpy.empty(0, dtype=numpy.int8),
+            numpy.empty(0, dtype=numpy.float64),
+            numpy.empty(0, dtype=numpy.float64),
+            numpy.empty(0, dtype=numpy.float64),
+            numpy.empty(0, dtype=numpy.int32),
+            numpy.empty(0, dtype=numpy.int32),
+            numpy.empty(0, dtype=numpy.int32),
+            [],
+            [],
+            [],
+        )
+
+    @staticmethod
+    def from_simple_transactions(list_of_simple_transactions: Iterable[SimpleTransaction]) -> "TransactionBatch":
+        list_of_open_dates = []
+        list_of_transaction_types = []
+        list_of_amounts = []
+        list_of_open_prices = []
+        list_of_commissions = []
+        list_of_symbol_ids = []
+        list_of_account_ids = []
+        list_of_namespace_ids = []
+        symbol_id_table = {}
+        account_id_table = {}
+        namespace_id_table = {}
+        for t in list_of_simple_transactions:
+            list_of_open_dates.append(t.open_date)
+            list_of_transaction_types.append(t.transaction_type.value)
+            list_of_amounts.append(t.amount)
+            list_of_open_prices.append(t.open_price)
+            list_of_commissions.append(t.commission)
+            list_of_symbol_ids.append(symbol_id_table.setdefault(t.symbol, len(symbol_id_table)))
+            list_of_account_ids.append(account_id_table.setdefault(t.account, len(account_id_table)))
+            list_of_namespace_ids.append(namespace_id_table.setdefault(t.namespace, len(namespace_id_table)))
+        return TransactionBatch(
+            numpy.array(list_of_open_dates, dtype="datetime64[D]"),
+            numpy.array(list_of_transaction_types, dtype=numpy.int8),
+            numpy.array(list_of_amounts, dtype=numpy.float64),
+            numpy.array(list_of_open_prices, dtype=numpy.float64),
+            numpy.array(list_of_commissions, dtype=numpy.float64),
+            numpy.array(list_of_symbol_ids, dtype=numpy.int32),
+            numpy.array(list_of_account_ids, dtype=numpy.int32),
+            numpy.array(list_of_namespace_ids, dtype=numpy.int32),
+            list(symbol_id_table),
+            list(account_id_table),
+            list(namespace_id_table),
+        )
+
+    @staticmethod
+    def concatenate(list_of_batches: list["TransactionBatch"]) -> "TransactionBatch":
+        """Concatenate batches in order. Dictionaries are merged and ids are remapped."""
+        list_of_batches = [batch for batch in list_of_batches if len(batch) > 0]
+        if not list_of_batches:
+            return TransactionBatch.empty()
+        if len(list_of_batches) == 1:
+            return list_of_batches[0]
+
+        def merge_dictionaries(list_of_dictionaries: list[list[str]], list_of_ids: list[numpy.ndarray]) -> tuple[numpy.ndarray, list[str]]:
+            id_table = {}
+            list_of_remapped_ids = []
+            for (dictionary, ids) in zip(list_of_dictionaries, list_of_ids):
+                remap = numpy.array([id_table.setdefault(value, len(id_table)) for value in dictionary], dtype=numpy.int32)
+                list_of_remapped_ids.append(remap[ids])
+            return (numpy.concatenate(list_of_remapped_ids), list(id_table))
+
+        (symbol_ids, symbols) = merge_dictionaries([b.symbols for b in list_of_batches], [b.symbol_ids for b in list_of_batches])
+        (account_ids, accounts) = merge_dictionaries([b.accounts for b in list_of_batches], [b.account_ids for b in list_of_batches])
+        (namespace_ids, namespaces) = merge_dictionaries([b.namespaces for b in list_of_batches], [b.namespace_ids for b in list_of_batches])
+        return TransactionBatch(
+            numpy.concatenate([b.open_dates for b in list_of_batches]),
+            numpy.concatenate([b.transaction_types for b in list_of_batches]),
+            numpy.concatenate([b.amounts for b in list_of_batches]),
+            numpy.concatenate([b.open_prices for b in list_of_batches]),
+            numpy.concatenate([b.commissions for b in list_of_batches]),
+            symbol_ids,
+            account_ids,
+            namespace_ids,
+            symbols,
+            accounts,
+            namespaces,
+        )
+
+    def get_type_ranks(self) -> numpy.ndarray:
+        """
+        Returns:
+            Ranks of transaction types within the same day. See |AutomatedTextImporterHelper.SAME_DAY_TRANSACTION_TYPE_ORDER|.
+            A type which is not listed there gets a rank larger than any other rank.
+        """
+        rank_of_unranked_type = len(AutomatedTextImporterHelper.SAME_DAY_TRANSACTION_TYPE_ORDER)
+        rank_table = numpy.full(SimpleTransaction.NUMBER_OF_TYPES, rank_of_unranked_type, dtype=numpy.int8)
+        for (transaction_type, rank) in AutomatedTextImporterHelper.SAME_DAY_TRANSACTION_TYPE_RANK.items():
+            rank_table[transaction_type.value] = rank
+        return rank_table[self.transaction_types]
+
+    def sort_by_date_and_type_rank(self, flag_drop_unranked: bool = True) -> "TransactionBatch":
+        """
+        Sort by (open date, type rank). The sort is stable.
+        If batches of date-sorted sources are concatenated in order and sorted, the result is the same as the one of
+        |AutomatedTextImporterHelper.merge_simple_transactions|.
+        """
+        ranks = self.get_type_ranks()
+        order = numpy.lexsort((ranks, self.open_dates))
+        if flag_drop_unranked:
+            order = order[ranks[order] < len(AutomatedTextImporterHelper.SAME_DAY_TRANSACTION_TYPE_ORDER)]
+        return self[order]
+
+    def iter_values(self) -> Iterator[tuple]:
+        """
+        Yields:
+            (open_date, transaction_type, namespace, symbol, account, amount, open_price, commission) with Python values.
+        """
+        enum_by_value = {t.value: t for t in SimpleTransaction.SimpleTransactionTypeEnum}
+        symbols = self.symbols
+        accounts = self.accounts
+        namespaces = self.namespaces
+        for (open_date, transaction_type, namespace_id, symbol_id, account_id, amount, open_price, commission) in zip(
+            self.open_dates.astype(object).tolist(),
+            self.transaction_types.tolist(),
+            self.namespace_ids.tolist(),
+            self.symbol_ids.tolist(),
+            self.account_ids.tolist(),
+            self.amounts.tolist(),
+            self.open_prices.tolist(),
+            self.commissions.tolist(),
+        ):
+            yield (
+                open_date,
+                enum_by_value[transaction_type],
+                namespaces[namespace_id],
+                symbols[symbol_id],
+                accounts[account_id],
+                amount,
+                open_price,
+                commission,
+            )
+
+    def iter_simple_transactions(self) -> Iterator[SimpleTransaction]:
+        for (open_date, transaction_type, namespace, symbol, account, amount, open_price, commission) in self.iter_values():
+            transaction = SimpleTransaction(
+                symbol=symbol,
+                transaction_type=transaction_type,
+                amount=amount,
+                open_price=open_price,
+                open_date=open_date,
+                commission=commission,
+                namespace=namespace,
+                account=account,
+            )
+            yield transaction
+
+    def to_simple_transactions(self) -> list[SimpleTransaction]:
+        return list(self.iter_simple_transactions())
+
+    def filter_by_open_date(self, last_open_date: datetime.date) -> "TransactionBatch":
+        """Returns transactions of which open date is not later than |last_open_date|."""
+        return self[self.open_dates <= numpy.datetime64(last_open_date, "D")]
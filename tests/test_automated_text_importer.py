@@ -0,0 +1,192 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from tests.test_text_importers import (as_tuples, build_kiwoom_csv_text,
+                                       build_meritz_csv_text,
+                                       build_shinhan_csv_text,
+                                       build_symbol_config)
+from tt.automated_text_importer import AutomatedTextImporterControl
+from tt.automated_text_importer_cache import AutomatedTextImporterCache
+from tt.constants import Constants
+from tt.kiwoom_text_importer import KIWOOM_LAYOUT, KiwoomTextImporter
+
+
+class TestAutomatedTextImporterControl(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.input_data_dir_path = temp_dir.name
+        csv_text_builders = {
+            "kiwoom": build_kiwoom_csv_text,
+            "meritz": build_meritz_csv_text,
+            "shinhan": build_shinhan_csv_text,
+        }
+        for securities_firm_id, build_csv_text in csv_text_builders.items():
+            directory_path = os.path.join(self.input_data_dir_path, f"{securities_firm_id}-exported-transactions")
+            os.makedirs(directory_path)
+            for account in ["account0", "account1"]:
+                for year in [2023, 2024]:
+                    file_path = os.path.join(directory_path, f"year-{year}-{account}.csv")
+                    with open(file_path, "w", encoding="euc-kr", newline="") as f:
+                        # Transactions of a year file are of the year.
+                        f.write(build_csv_text().replace("2024", str(year)))
+
+        patcher = patch.object(Constants, "input_data_dir_path", self.input_data_dir_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir_path = cache_dir.name
+        patcher = patch.object(Constants, "cache_dir_path", self.cache_dir_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.control = AutomatedTextImporterControl()
+        self.control.module_config = {"securities_firm_id": ["kiwoom", "shinhan", "meritz"]}
+
+    def test_import_all_transactions_in_parallel_is_the_same_as_serial(self):
+        symbol_config = build_symbol_config()
+        (result_serial, list_serial) = self.control.import_all_transactions(symbol_config)
+        (result_parallel, list_parallel) = self.control.import_all_transactions(symbol_config, jobs=2)
+        self.assertTrue(result_serial)
+        self.assertTrue(result_parallel)
+        self.assertGreater(len(list_serial), 0)
+        self.assertEqual(as_tuples(list_serial), as_tuples(list_parallel))
+        # Nothing is written next to input files.
+        for (_, _, filenames) in os.walk(self.input_data_dir_path):
+            self.assertTrue(all(name.startswith("year-") for name in filenames))
+
+    def test_iter_all_transactions_is_the_same_as_import_all_transactions(self):
+        symbol_config = build_symbol_config()
+        (result, list_of_simple_transactions) = self.control.import_all_transactions(symbol_config)
+        self.assertTrue(result)
+        self.assertEqual(
+            as_tuples(list_of_simple_transactions),
+            as_tuples(self.control.iter_all_transactions(symbol_config)),
+        )
+
+    def test_import_all_transaction_batch_is_the_same_as_import_all_transactions(self):
+        symbol_config = build_symbol_config()
+        (result, list_of_simple_transactions) = self.control.import_all_transactions(symbol_config)
+        (result_batch, batch) = self.control.import_all_transaction_batch(symbol_config)
+        self.assertTrue(result)
+        self.assertTrue(result_batch)
+        self.assertEqual(as_tuples(list_of_simple_transactions), as_tuples(batch))
+
+    def test_import_all_transactions_with_cache_is_the_same_as_without_cache(self):
+        symbol_config = build_symbol_config()
+        (_, list_without_cache) = self.control.import_all_transactions(symbol_config)
+        (result_cold, list_cold) = self.control.import_all_transactions(symbol_config, flag_use_cache=True)
+        (result_warm, list_warm) = self.control.import_all_transactions(symbol_config, jobs=2, flag_use_cache=True)
+        self.assertTrue(result_cold)
+        self.assertTrue(result_warm)
+        self.assertEqual(as_tuples(list_without_cache), as_tuples(list_cold))
+        self.assertEqual(as_tuples(list_without_cache), as_tuples(list_warm))
+
+    def test_import_all_transactions_with_refreshed_cache(self):
+        symbol_config = build_symbol_config()
+        (_, list_without_cache) = self.control.import_all_transactions(symbol_config)
+        self.control.import_all_transactions(symbol_config, flag_use_cache=True)
+        # Stale payloads - i.e. parsed by an old parser - are served until the cache is refreshed.
+        for name in os.listdir(self.cache_dir_path):
+            if name.endswith(".jsonl"):
+                open(os.path.join(self.cache_dir_path, name), "w").close()
+        (_, list_stale) = self.control.import_all_transactions(symbol_config, flag_use_cache=True)
+        self.assertEqual(list_stale, [])
+        (result, list_refreshed) = self.control.import_all_transactions(symbol_config, flag_use_cache=True, flag_refresh_cache=True)
+        self.assertTrue(result)
+        self.assertEqual(as_tuples(list_without_cache), as_tuples(list_refreshed))
+        (_, list_warm) = self.control.import_all_transactions(symbol_config, flag_use_cache=True)
+        self.assertEqual(as_tuples(list_without_cache), as_tuples(list_warm))
+
+    def test_find_local_files_by_account(self):
+        directory_path = os.path.join(self.input_data_dir_path, "kiwoom-exported-transactions")
+        # An account of which name ends with another account's name.
+        with open(os.path.join(directory_path, "year-2024-main-account0.csv"), "w", encoding="euc-kr", newline="") as f:
+            f.write(build_kiwoom_csv_text())
+        (result, file_meta_by_account) = KiwoomTextImporter().find_local_files_by_account()
+        self.assertTrue(result)
+        self.assertEqual(
+            [([os.path.basename(path) for path in list_of_filepaths], account) for (list_of_filepaths, account) in file_meta_by_account],
+            [
+                (["year-2023-account0.csv", "year-2024-account0.csv"], "account0"),
+                (["year-2023-account1.csv", "year-2024-account1.csv"], "account1"),
+                (["year-2024-main-account0.csv"], "main-account0"),
+            ],
+        )
+
+
+class TestAutomatedTextImporterCache(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.transaction_filepath = os.path.join(temp_dir.name, "year-2024-account0.csv")
+        with open(self.transaction_filepath, "w", encoding="euc-kr", newline="") as f:
+            f.write(build_kiwoom_csv_text())
+        self.cache_dir_path = os.path.join(temp_dir.name, "cache")
+        self.symbol_config = build_symbol_config()
+        self.list_of_simple_transactions = KiwoomTextImporter().import_transactions_from_file(
+            self.transaction_filepath, "account0", self.symbol_config
+        )[1]
+        self.parser_fingerprint = AutomatedTextImporterCache.get_parser_fingerprint({"kiwoom": KiwoomTextImporter().list_of_layouts})
+
+    def _store_and_save(self):
+        cache = AutomatedTextImporterCache(self.cache_dir_path)
+        cache.open(self.symbol_config, self.parser_fingerprint)
+        self.assertIsNone(cache.load("kiwoom", self.transaction_filepath, "account0"))
+        cache.store("kiwoom", self.transaction_filepath, "account0", self.list_of_simple_transactions)
+        self.assertTrue(cache.save())
+
+    def test_hit(self):
+        self._store_and_save()
+        cache = AutomatedTextImporterCache(self.cache_dir_path)
+        cache.open(self.symbol_config, self.parser_fingerprint)
+        loaded = cache.load("kiwoom", self.transaction_filepath, "account0")
+        self.assertEqual(as_tuples(loaded), as_tuples(self.list_of_simple_transactions))
+        self.assertEqual((cache.count_hit, cache.count_miss), (1, 0))
+
+    def test_hit_if_only_mtime_has_changed(self):
+        self._store_and_save()
+        stat_result = os.stat(self.transaction_filepath)
+        os.utime(self.transaction_filepath, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+        cache = AutomatedTextImporterCache(self.cache_dir_path)
+        cache.open(self.symbol_config, self.parser_fingerprint)
+        self.assertIsNotNone(cache.load("kiwoom", self.transaction_filepath, "account0"))
+
+    def test_miss_if_content_has_changed(self):
+        self._store_and_save()
+        with open(self.transaction_filepath, "a", encoding="euc-kr", newline="") as f:
+            f.write(build_kiwoom_csv_text())
+        cache = AutomatedTextImporterCache(self.cache_dir_path)
+        cache.open(self.symbol_config, self.parser_fingerprint)
+        self.assertIsNone(cache.load("kiwoom", self.transaction_filepath, "account0"))
+
+    def test_eviction_if_symbol_config_has_changed(self):
+        self._store_and_save()
+        self.symbol_config.symbol_config_elements[0].legit_namespace = "NASDAQ"
+        cache = AutomatedTextImporterCache(self.cache_dir_path)
+        cache.open(self.symbol_config, self.parser_fingerprint)
+        self.assertEqual(cache.entries, {})
+        self.assertIsNone(cache.load("kiwoom", self.transaction_filepath, "account0"))
+
+    def test_eviction_if_parser_has_changed(self):
+        self._store_and_save()
+        with patch.dict(KIWOOM_LAYOUT.transaction_type_table, {"배당": KIWOOM_LAYOUT.transaction_type_table["매수"]}):
+            parser_fingerprint = AutomatedTextImporterCache.get_parser_fingerprint({"kiwoom": KiwoomTextImporter().list_of_layouts})
+        with patch("tt.automated_text_importer_cache.PARSER_VERSION", -1):
+            self.assertNotEqual(
+                AutomatedTextImporterCache.get_parser_fingerprint({"kiwoom": KiwoomTextImporter().list_of_layouts}), self.parser_fingerprint
+            )
+        self.assertNotEqual(parser_fingerprint, self.parser_fingerprint)
+        cache = AutomatedTextImporterCache(self.cache_dir_path)
+        cache.open(self.symbol_config, parser_fingerprint)
+        self.assertEqual(cache.entries, {})
+        self.assertIsNone(cache.load("kiwoom", self.transaction_filepath, "account0"))
+
+
+if __name__ == "__main__":
+    unittest.main()
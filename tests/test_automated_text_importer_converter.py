@@ -0,0 +1,52 @@
+import datetime
+import random
+import unittest
+
+from tt.automated_text_importer_converter import (get_date_parser,
+                                                  parse_comma_number,
+                                                  round_commission)
+from tt.malformed_date_error import MalformedDateError
+
+
+class TestDateParser(unittest.TestCase):
+
+    def test_fixed_width_formats(self):
+        for (date_format, date_string) in [("%Y/%m/%d", "2024/03/09"), ("%Y-%m-%d", "2024-03-09"), ("%Y.%m.%d", "2024.03.09")]:
+            with self.subTest(date_format=date_format):
+                self.assertEqual(get_date_parser(date_format)(date_string), datetime.date(2024, 3, 9))
+
+    def test_same_as_strptime(self):
+        parse = get_date_parser("%Y/%m/%d")
+        for date_string in ["2024/1/5", "2024/02/29", "2023/02/29", "2024/13/01", "2024-01-05", "2024/01/05 ", "", "abcd/ef/gh", "2024/+1/05"]:
+            with self.subTest(date_string=date_string):
+                try:
+                    expected = datetime.datetime.strptime(date_string, "%Y/%m/%d").date()
+                except ValueError:
+                    expected = None
+                if expected is None:
+                    with self.assertRaises(MalformedDateError):
+                        parse(date_string)
+                else:
+                    self.assertEqual(parse(date_string), expected)
+
+    def test_parser_is_shared_per_format(self):
+        self.assertIs(get_date_parser("%Y/%m/%d"), get_date_parser("%Y/%m/%d"))
+
+
+class TestNumberConverters(unittest.TestCase):
+
+    def test_parse_comma_number(self):
+        self.assertEqual(parse_comma_number("1,234,567.25"), 1234567.25)
+        self.assertEqual(parse_comma_number("12.5"), 12.5)
+        with self.assertRaises(ValueError):
+            parse_comma_number("")
+
+    def test_round_commission_is_the_same_as_string_formatting(self):
+        rng = random.Random(0)
+        for _ in range(10000):
+            commission = rng.randint(0, 100000) / 1000 + rng.choice([0.0, 0.005, rng.uniform(0, 0.01)])
+            self.assertEqual(round_commission(commission), float("%.2f" % commission))
+
+
+if __name__ == "__main__":
+    unittest.main()
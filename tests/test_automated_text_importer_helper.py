@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+import datetime
+
+from tt.automated_text_importer_helper import AutomatedTextImporterHelper
+from tt.simple_transaction import SimpleTransaction
+
+
+def build_transaction(symbol, transaction_type, open_date):
+    return SimpleTransaction(
+        symbol=symbol,
+        transaction_type=transaction_type,
+        amount=1.0,
+        open_price=1.0,
+        open_date=open_date,
+        commission=0.0,
+    )
+
+
+class TestMergeSimpleTransactions(unittest.TestCase):
+
+    def setUp(self):
+        self.day0 = datetime.date(2010, 1, 4)
+        self.day1 = datetime.date(2010, 1, 5)
+        self.day2 = datetime.date(2024, 12, 31)
+
+    def test_merge_keeps_date_order(self):
+        first = [
+            build_transaction("A", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, self.day0),
+            build_transaction("A", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, self.day2),
+        ]
+        second = [
+            build_transaction("B", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, self.day1),
+        ]
+        merged = AutomatedTextImporterHelper.merge_simple_transactions(first, second)
+        self.assertEqual([t.open_date for t in merged], [self.day0, self.day1, self.day2])
+
+    def test_merge_orders_same_day_by_type(self):
+        first = [
+            build_transaction("A", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL, self.day0),
+        ]
+        second = [
+            build_transaction("B", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, self.day0),
+        ]
+        third = [
+            build_transaction("C", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION, self.day0),
+            build_transaction("C", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, self.day0),
+        ]
+        merged = AutomatedTextImporterHelper.merge_simple_transactions(first, second, third)
+        self.assertEqual(
+            [(t.symbol, t.transaction_type) for t in merged],
+            [
+                ("C", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION),
+                ("B", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY),
+                ("C", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY),
+                ("A", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL),
+            ],
+        )
+
+    def test_merge_is_the_same_as_pairwise_merge(self):
+        transaction_types = AutomatedTextImporterHelper.SAME_DAY_TRANSACTION_TYPE_ORDER
+        list_of_sources = []
+        for i in range(4):
+            source = []
+            for day in range(0, 30, i + 1):
+                open_date = self.day0 + datetime.timedelta(days=day)
+                day_of_transactions = [
+                    build_transaction(f"S{i}-{day}-{j}", transaction_types[(day + i + j) % len(transaction_types)], open_date)
+                    for j in range(3)
+                ]
+                AutomatedTextImporterHelper.append_transactions_of_current_date(source, day_of_transactions)
+            list_of_sources.append(source)
+
+        merged_at_once = AutomatedTextImporterHelper.merge_simple_transactions(*list_of_sources)
+        merged_pairwise = list_of_sources[0]
+        for source in list_of_sources[1:]:
+            merged_pairwise = AutomatedTextImporterHelper.merge_simple_transactions(merged_pairwise, source)
+        self.assertEqual(len(merged_at_once), sum(len(source) for source in list_of_sources))
+        self.assertEqual([t.symbol for t in merged_at_once], [t.symbol for t in merged_pairwise])
+
+    def test_merge_drops_other_type(self):
+        first = [
+            build_transaction("A", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_OTHER, self.day0),
+            build_transaction("A", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, self.day0),
+        ]
+        merged = AutomatedTextImporterHelper.merge_simple_transactions(first, [])
+        self.assertEqual(len(merged), 1)
+
+    def test_merge_of_no_source(self):
+        self.assertEqual(AutomatedTextImporterHelper.merge_simple_transactions(), [])
+
+    def test_iter_merged_simple_transactions_is_lazy(self):
+        def endless_source():
+            day = 0
+            while True:
+                yield build_transaction("A", SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, self.day0 + datetime.timedelta(days=day))
+                day += 1
+
+        stream = AutomatedTextImporterHelper.iter_merged_simple_transactions(endless_source())
+        self.assertEqual(next(stream).open_date, self.day0)
+        self.assertEqual(next(stream).open_date, self.day1)
+
+
+class TestIterConcatenatedLines(unittest.TestCase):
+
+    def test_repeated_header_is_skipped(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        list_of_filepaths = []
+        for (name, content) in [("year-2023-a.csv", "header\r\n1\r\n"), ("year-2024-a.csv", "header\r\n2\r\n3"), ("year-2025-a.csv", ""), ("year-2026-a.csv", "new header\r\n4\r\n")]:
+            filepath = os.path.join(temp_dir.name, name)
+            with open(filepath, "w", encoding="euc-kr", newline="") as f:
+                f.write(content)
+            list_of_filepaths.append(filepath)
+        self.assertEqual(
+            list(AutomatedTextImporterHelper.iter_concatenated_lines(list_of_filepaths)),
+            ["header\r\n", "1\r\n", "2\r\n", "3", "new header\r\n", "4\r\n"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
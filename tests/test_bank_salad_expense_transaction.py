@@ -0,0 +1,88 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+import openpyxl
+
+from tt.bank_salad_expense_transaction import (
+    BankSaladExpenseTransactionControl, BankSaladExpenseTransactionImporter)
+from tt.db_connection import DBConnection
+
+
+def write_bank_salad_file(file_path: str, count: int) -> None:
+    # The layout of a file exported from Bank Salad. Transactions are on the second sheet.
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "뱅샐현황"
+    worksheet = workbook.create_sheet("가계부 내역")
+    worksheet.append(["날짜", "시간", "타입", "대분류", "소분류", "내용", "금액", "화폐", "결제수단", "메모"])
+    for index in range(count):
+        worksheet.append([
+            datetime.datetime(2024, 1, 1) + datetime.timedelta(days=index),
+            datetime.time(12, index % 60, 30),
+            "지출",
+            "식비",
+            None,
+            f"memo{index}",
+            -1000 * (index + 1),
+            "KRW",
+            "account0",
+            "memo1" if index % 2 else None,
+        ])
+    # A trailing empty row is skipped.
+    worksheet.append([None] * 10)
+    workbook.save(file_path)
+
+
+class TestBankSaladExpenseTransactionImporter(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "bank_salad.xlsx")
+        write_bank_salad_file(self.file_path, 5)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_iter_chunks_from_file(self):
+        importer = BankSaladExpenseTransactionImporter()
+        list_of_chunks = list(importer.iter_chunks_from_file(self.file_path, "user0", 2))
+        self.assertEqual([len(chunk) for chunk in list_of_chunks], [2, 2, 1])
+        t = list_of_chunks[0][1]
+        self.assertEqual(t.transaction_datetime, datetime.datetime(2024, 1, 2, 12, 1, 30))
+        self.assertEqual((t.type, t.category0, t.category1, t.memo0, t.amount), ("지출", "식비", None, "memo1", -2000))
+        self.assertEqual((t.currency, t.account, t.memo1, t.user_identifier), ("KRW", "account0", "memo1", "user0"))
+        self.assertIsNone(list_of_chunks[0][0].memo1)
+
+    def test_missing_file(self):
+        importer = BankSaladExpenseTransactionImporter()
+        self.assertEqual(importer.import_from_file(os.path.join(self.temp_dir.name, "missing.xlsx"), "user0"), [])
+
+
+class TestBankSaladExpenseTransactionControl(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        global_config_ir = {"database": {"backend": "sqlite"}, "sqlite": {"file_path": os.path.join(self.temp_dir.name, "finance.sqlite3")}}
+        self.db_connection = DBConnection(global_config_ir)
+        self.db_connection.do_initial_setup()
+        self.control = BankSaladExpenseTransactionControl(self.db_connection)
+        self.control.db_impl.chunk_size_for_bulk_insert = 3
+
+    def tearDown(self):
+        self.db_connection.close()
+        self.temp_dir.cleanup()
+
+    def test_import_and_append_from_file(self):
+        file_path = os.path.join(self.temp_dir.name, "bank_salad.xlsx")
+        write_bank_salad_file(file_path, 4)
+        self.assertTrue(self.control.import_and_append_from_file(file_path, "user0"))
+        # A later export has all of the earlier one.
+        write_bank_salad_file(file_path, 7)
+        self.assertTrue(self.control.import_and_append_from_file(file_path, "user0"))
+        list_of_records = self.control.db_impl.get_all_filtered_by_user_identifier("user0")
+        self.assertEqual([record.memo0 for record in list_of_records], [f"memo{index}" for index in range(7)])
+
+
+if __name__ == "__main__":
+    unittest.main()
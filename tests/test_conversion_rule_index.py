@@ -0,0 +1,134 @@
+import glob
+import itertools
+import os
+import random
+import unittest
+
+import yaml
+from pandas import DataFrame
+
+from tt.bank_salad_expense_transaction import BankSaladExpenseTransaction
+from tt.constants import Constants
+from tt.conversion_rule_index import (LIST_OF_SOURCE_FIELD_NAMES,
+                                      ConversionRuleIndex)
+
+
+def find_rule_by_scan(list_of_rules: list[dict], s: BankSaladExpenseTransaction) -> dict | None:
+    # The linear scan which |ConversionRuleIndex| replaces.
+    for rule in list_of_rules:
+        if (
+            (("type" not in rule["source"]) or (not rule["source"]["type"] or rule["source"]["type"] == s.type))
+            and (not rule["source"]["category0"] or rule["source"]["category0"] == s.category0)
+            and (not rule["source"]["category1"] or rule["source"]["category1"] == s.category1)
+            and (not rule["source"]["memo0"] or rule["source"]["memo0"] == s.memo0)
+            and (not rule["source"]["account"] or rule["source"]["account"] == s.account)
+            and (not rule["source"]["memo1"] or rule["source"]["memo1"] == s.memo1)
+        ):
+            return rule
+    return None
+
+
+def build_transaction(values: dict) -> BankSaladExpenseTransaction:
+    t = BankSaladExpenseTransaction()
+    for (field_name, value) in values.items():
+        setattr(t, field_name, value)
+    return t
+
+
+def build_random_rules(r: random.Random, count: int) -> list[dict]:
+    list_of_rules = []
+    for index in range(count):
+        source = {field_name: "" for field_name in LIST_OF_SOURCE_FIELD_NAMES}
+        for field_name in r.sample(LIST_OF_SOURCE_FIELD_NAMES, r.randint(0, 3)):
+            source[field_name] = f"{field_name}{r.randint(0, 4)}"
+        if r.random() < 0.5 and not source["type"]:
+            del source["type"]
+        list_of_rules.append({"source": source, "target": {"category0": f"target{index}"}})
+    return list_of_rules
+
+
+class TestConversionRuleIndex(unittest.TestCase):
+
+    def assert_parity(self, list_of_rules: list[dict], list_of_transactions: list[BankSaladExpenseTransaction]) -> None:
+        rule_index = ConversionRuleIndex(list_of_rules)
+        for t in list_of_transactions:
+            self.assertIs(rule_index.find(t), find_rule_by_scan(list_of_rules, t))
+
+    def test_first_rule_wins(self):
+        list_of_rules = [
+            {"source": {"category0": "", "category1": "", "memo0": "", "account": "a", "memo1": ""}, "target": {"category0": "0"}},
+            {"source": {"category0": "c", "category1": "", "memo0": "m", "account": "", "memo1": ""}, "target": {"category0": "1"}},
+            {"source": {"category0": "c", "category1": "", "memo0": "", "account": "", "memo1": ""}, "target": {"category0": "2"}},
+        ]
+        rule_index = ConversionRuleIndex(list_of_rules)
+        self.assertIs(rule_index.find(build_transaction({"category0": "c", "memo0": "m", "account": "a"})), list_of_rules[0])
+        self.assertIs(rule_index.find(build_transaction({"category0": "c", "memo0": "m"})), list_of_rules[1])
+        self.assertIs(rule_index.find(build_transaction({"category0": "c"})), list_of_rules[2])
+        self.assertIsNone(rule_index.find(build_transaction({"category0": "d"})))
+
+    def test_cache(self):
+        list_of_rules = build_random_rules(random.Random(0), 50)
+        rule_index = ConversionRuleIndex(list_of_rules, max_cached_keys=2)
+        list_of_transactions = [build_transaction({"category0": f"category0{index}"}) for index in range(3)]
+        for t in list_of_transactions + list_of_transactions[2:] + list_of_transactions[:1]:
+            self.assertIs(rule_index.find(t), find_rule_by_scan(list_of_rules, t))
+        cache_info = rule_index.get_cache_info()
+        # The first one has been evicted by the third one.
+        self.assertEqual((cache_info.hits, cache_info.misses, cache_info.currsize), (1, 4, 2))
+
+    def test_parity_with_random_rules(self):
+        r = random.Random(0)
+        list_of_rules = build_random_rules(r, 500)
+        list_of_transactions = [
+            build_transaction({field_name: f"{field_name}{r.randint(0, 4)}" for field_name in LIST_OF_SOURCE_FIELD_NAMES})
+            for _ in range(2000)
+        ]
+        self.assert_parity(list_of_rules, list_of_transactions)
+
+    def test_data_frame_parity_with_random_rules(self):
+        r = random.Random(1)
+        list_of_rules = build_random_rules(r, 300)
+        for rule in list_of_rules[::7]:
+            rule["target"]["category1"] = "target category1"
+        list_of_transactions = [
+            build_transaction(
+                {field_name: r.choice([None, f"{field_name}{r.randint(0, 4)}"]) for field_name in LIST_OF_SOURCE_FIELD_NAMES}
+            )
+            for _ in range(2000)
+        ]
+        df = DataFrame(
+            {field_name: [getattr(t, field_name) for t in list_of_transactions] for field_name in LIST_OF_SOURCE_FIELD_NAMES},
+            index=range(100, 100 + len(list_of_transactions)),
+        )
+        rule_index = ConversionRuleIndex(list_of_rules)
+        df_of_categories = rule_index.categorize_data_frame(df, "default")
+        self.assertEqual(list(df_of_categories.index), list(df.index))
+        for (t, row) in zip(list_of_transactions, df_of_categories.itertuples(index=False)):
+            rule = find_rule_by_scan(list_of_rules, t)
+            if rule is None:
+                expected = ("default", None, None, None)
+            else:
+                expected = (rule["target"]["category0"], rule["target"].get("category1", t.category1), t.memo0, t.memo1)
+            self.assertEqual(tuple(row), expected)
+
+    def test_parity_with_rule_files(self):
+        # `config/demo` has an example. Rule files of `config/active` and `config/private` are tested, too, if they are there.
+        list_of_file_paths = glob.glob(os.path.join(os.path.dirname(Constants.config_dir_path), "*", "conversion_rule.yaml"))
+        self.assertTrue(list_of_file_paths)
+        for file_path in list_of_file_paths:
+            with self.subTest(file_path=file_path):
+                with open(file_path, "rb") as f:
+                    list_of_rules = yaml.safe_load(f)["rules"]
+                # Every combination of values which appear in the rules, and a value which appears in none of them.
+                list_of_candidates = []
+                for field_name in LIST_OF_SOURCE_FIELD_NAMES:
+                    set_of_values = {rule["source"].get(field_name) for rule in list_of_rules} - {None, ""}
+                    list_of_candidates.append(sorted(set_of_values, key=str)[:4] + ["none of them"])
+                list_of_transactions = [
+                    build_transaction(dict(zip(LIST_OF_SOURCE_FIELD_NAMES, values))) for values in itertools.product(*list_of_candidates)
+                ]
+                self.assert_parity(list_of_rules, list_of_transactions)
+
+
+if __name__ == "__main__":
+    unittest.main()
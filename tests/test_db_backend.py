@@ -0,0 +1,99 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from tt.db_backend import MariaDBBackend, SQLiteBackend, build_backend
+from tt.db_connection import DBConnection
+from tt.expense_category import ExpenseCategory, ExpenseCategoryDBImpl
+from tt.simple_transaction import SimpleTransaction
+from tt.simple_transaction_db_impl import SimpleTransactionDBImpl
+from tt.stock_split import StockSplit, StockSplitDBImpl
+
+
+def build_transactions(count: int) -> list[SimpleTransaction]:
+    return [
+        SimpleTransaction(
+            symbol=f"S{index % 3}",
+            transaction_type=SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY,
+            amount=float(index + 1),
+            open_price=1.5,
+            open_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=index),
+            commission=0.25,
+            account="account0",
+        )
+        for index in range(count)
+    ]
+
+
+class TestBuildBackend(unittest.TestCase):
+
+    def test_build_backend(self):
+        self.assertIsInstance(build_backend({}), MariaDBBackend)
+        self.assertIsInstance(build_backend({"database": {"backend": "sqlite"}}), SQLiteBackend)
+        self.assertIsNone(build_backend({"database": {"backend": "unknown"}}))
+
+
+class TestSQLiteBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, "finance.sqlite3")
+        global_config_ir = {"database": {"backend": "sqlite"}, "sqlite": {"file_path": self.file_path}}
+        self.db_connection = DBConnection(global_config_ir)
+        self.db_connection.do_initial_setup()
+
+    def tearDown(self):
+        self.db_connection.close()
+        self.temp_dir.cleanup()
+
+    def test_connection(self):
+        self.assertTrue(self.db_connection.is_in_valid_state())
+        cur = self.db_connection.cur()
+        cur.execute("PRAGMA journal_mode;")
+        self.assertEqual(cur.fetchone()[0], "wal")
+
+    def test_simple_transactions(self):
+        db_impl = SimpleTransactionDBImpl(self.db_connection)
+        list_of_simple_transactions = build_transactions(5)
+        db_impl.export_all(list_of_simple_transactions)
+        self.assertEqual((db_impl.count_inserted, db_impl.count_unchanged, db_impl.count_removed), (5, 0, 0))
+
+        db_impl.export_all(list_of_simple_transactions[1:] + build_transactions(6)[5:])
+        self.assertEqual((db_impl.count_inserted, db_impl.count_unchanged, db_impl.count_removed), (1, 4, 1))
+
+        simple_transaction_filter = SimpleTransactionDBImpl.SimpleTransactionFilter()
+        simple_transaction_filter.set_of_symbols = {"S0"}
+        simple_transaction_filter.open_date_from = datetime.date(2024, 1, 2)
+        list_of_records = list(db_impl.iter_records(simple_transaction_filter))
+        self.assertEqual([record.open_date for record in list_of_records], [datetime.date(2024, 1, 4)])
+        self.assertEqual(list_of_records[0].account, "account0")
+        self.assertEqual(len(db_impl.get_all_records()), 5)
+
+    def test_expense_categories(self):
+        db_impl = ExpenseCategoryDBImpl(self.db_connection)
+        self.assertTrue(db_impl.create_table())
+        expense_category = ExpenseCategory()
+        expense_category.user_identifier = "user0"
+        expense_category.uuid = "uuid0"
+        expense_category.name = "Dennis' café"
+        self.assertTrue(db_impl.insert_records([expense_category]))
+        self.assertEqual(db_impl.get_all_filtered_by_user_identifier("user0"), [expense_category])
+
+    def test_stock_splits(self):
+        db_impl = StockSplitDBImpl(self.db_connection)
+        self.assertTrue(db_impl.create_table())
+        stock_split = StockSplit()
+        stock_split.symbol = "AAPL"
+        stock_split.symbol_namespace = "NASDAQ"
+        stock_split.event_date = datetime.date(2020, 8, 31)
+        stock_split.numerator = 4
+        stock_split.denominator = 1
+        self.assertTrue(db_impl.insert_records([stock_split]))
+        list_of_stock_splits = db_impl.get_all_filtered_by_symbol_and_symbol_namespace("AAPL", "NASDAQ")
+        self.assertEqual(len(list_of_stock_splits), 1)
+        self.assertEqual(list_of_stock_splits[0].event_date, datetime.date(2020, 8, 31))
+
+
+if __name__ == "__main__":
+    unittest.main()
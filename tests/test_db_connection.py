@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+import sqlalchemy
+
+from tt.db_connection import (DBConnection, DBConnectionPoolMetrics,
+                              MeasuredQueuePool, create_pooled_engine)
+from tt.sql_profiler import load_profile
+
+
+class TestPooledEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        url = "sqlite:///" + os.path.join(self.temp_dir.name, "finance.db")
+        self.metrics = DBConnectionPoolMetrics()
+        self.engine = create_pooled_engine(url, {"pool_size": 2, "echo": False}, self.metrics)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.temp_dir.cleanup()
+
+    def test_connections_are_reused(self):
+        self.assertIsInstance(self.engine.pool, MeasuredQueuePool)
+        for _ in range(3):
+            with self.engine.connect() as conn:
+                conn.execute(sqlalchemy.text("SELECT 1"))
+        raw_conn = self.engine.raw_connection()
+        self.assertEqual(self.engine.pool.checkedout(), 1)
+        raw_conn.close()
+        self.assertEqual(self.metrics.count_connect, 1)
+        self.assertEqual(self.metrics.count_checkout, 4)
+        self.assertEqual(self.metrics.count_checkin, 4)
+        self.assertGreater(self.metrics.total_wait_seconds, 0.0)
+        self.assertGreaterEqual(self.metrics.total_wait_seconds, self.metrics.max_wait_seconds)
+
+    def test_metrics_survive_dispose(self):
+        self.engine.dispose()
+        with self.engine.connect() as conn:
+            conn.execute(sqlalchemy.text("SELECT 1"))
+        self.assertIs(self.engine.pool.metrics, self.metrics)
+        self.assertEqual(self.metrics.count_checkout, 1)
+
+
+
+class TestDBConnection(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_pool_status_is_saved_with_the_sql_profile(self):
+        profile_file_path = os.path.join(self.temp_dir.name, "sql_profile.json")
+        global_config_ir = {
+            "database": {"backend": "sqlite"},
+            "sqlite": {"file_path": os.path.join(self.temp_dir.name, "finance.sqlite3")},
+            "sql_profiler": {"enabled": True, "profile_file_path": profile_file_path},
+        }
+        db_connection = DBConnection(global_config_ir)
+        db_connection.do_initial_setup()
+        with db_connection.engine.connect() as conn:
+            conn.execute(sqlalchemy.text("SELECT 1"))
+        db_connection.close()
+        (_, pool_statistics) = load_profile(profile_file_path)
+        self.assertEqual(pool_statistics.count_runs, 1)
+        self.assertEqual(pool_statistics.count_checkout, 2)
+        self.assertEqual(pool_statistics.count_checkin, 2)
+        self.assertGreater(pool_statistics.total_wait_seconds, 0.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from tt.bank_salad_expense_transaction import (
+    BankSaladExpenseTransaction, BankSaladExpenseTransactionDBImpl)
+from tt.db_connection import DBConnection
+from tt.db_impl_base import build_content_hash, iter_row_dicts
+
+
+def build_bank_salad_expense_transactions(count: int) -> list[BankSaladExpenseTransaction]:
+    list_of_transactions = []
+    for index in range(count):
+        t = BankSaladExpenseTransaction()
+        t.account = "account0"
+        t.amount = -index
+        t.category0 = "식비"
+        t.currency = "KRW"
+        t.transaction_datetime = datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=index)
+        t.type = "지출"
+        t.memo0 = f"memo{index}"
+        t.user_identifier = "user0"
+        t.imported_at = datetime.datetime(2024, 2, 1)
+        list_of_transactions.append(t)
+    return list_of_transactions
+
+
+class TestBulkInsert(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        global_config_ir = {"database": {"backend": "sqlite"}, "sqlite": {"file_path": os.path.join(self.temp_dir.name, "finance.sqlite3")}}
+        self.db_connection = DBConnection(global_config_ir)
+        self.db_connection.do_initial_setup()
+        self.db_impl = BankSaladExpenseTransactionDBImpl(self.db_connection)
+        self.db_impl.create_table()
+
+    def tearDown(self):
+        self.db_connection.close()
+        self.temp_dir.cleanup()
+
+    def test_insert_records_in_chunks(self):
+        self.db_impl.chunk_size_for_bulk_insert = 1000
+        list_of_transactions = build_bank_salad_expense_transactions(2500)
+        list_of_progress = []
+        self.assertEqual(self.db_impl.insert_records(list_of_transactions, list_of_progress.append), (True, 2500))
+        self.assertEqual(list_of_progress, [1000, 2000, 2500])
+
+        list_of_records = self.db_impl.get_all_filtered_by_user_identifier("user0")
+        self.assertEqual(set(list_of_records), set(list_of_transactions))
+        self.assertEqual(len(list_of_records), 2500)
+
+    def test_committed_chunks_are_kept_on_failure(self):
+        self.db_impl.chunk_size_for_bulk_insert = 2
+        table = BankSaladExpenseTransaction.__table__
+        rows = list(iter_row_dicts(build_bank_salad_expense_transactions(5), table))
+        rows[2]["transaction_datetime"] = "not a datetime"
+        (result, count_inserted) = self.db_impl.bulk_insert(table, rows)
+        self.assertFalse(result)
+        self.assertEqual(count_inserted, 2)
+        self.assertEqual(len(self.db_impl.get_all_filtered_by_user_identifier("user0")), 2)
+
+    def test_duplicates_are_skipped_by_content_hash(self):
+        self.db_impl.chunk_size_for_bulk_insert = 4
+        self.assertEqual(self.db_impl.insert_records(build_bank_salad_expense_transactions(5)), (True, 5))
+        # A later import overlaps the previous one, and has a duplicate in itself.
+        list_of_transactions = build_bank_salad_expense_transactions(8)
+        list_of_transactions.append(build_bank_salad_expense_transactions(8)[7])
+        self.assertEqual(self.db_impl.insert_records(list_of_transactions[3:]), (True, 3))
+        list_of_records = self.db_impl.get_all_filtered_by_user_identifier("user0")
+        self.assertEqual(len(list_of_records), 8)
+        self.assertEqual(set(list_of_records), set(list_of_transactions))
+
+    def test_content_hash_column_is_added_to_an_old_table(self):
+        table = BankSaladExpenseTransaction.__table__
+        table.drop(self.db_connection.engine)
+        list_of_column_names = [column.name for column in table.columns if column.name not in ("id", "content_hash")]
+        cur = self.db_connection.cur()
+        cur.execute(f"CREATE TABLE {table.name} (id integer primary key autoincrement, {', '.join(list_of_column_names)})")
+        list_of_transactions = build_bank_salad_expense_transactions(3)
+        rows = [tuple(getattr(t, column_name) for column_name in list_of_column_names) for t in list_of_transactions + list_of_transactions[:1]]
+        cur.executemany(f"INSERT INTO {table.name} ({', '.join(list_of_column_names)}) VALUES ({', '.join(['?'] * len(list_of_column_names))})", rows)
+
+        self.assertTrue(self.db_impl.create_table())
+        self.assertEqual(self.db_impl.insert_records(build_bank_salad_expense_transactions(4)), (True, 1))
+        self.assertEqual(len(self.db_impl.get_all_filtered_by_user_identifier("user0")), 5)
+
+    def test_build_content_hash(self):
+        self.assertEqual(build_content_hash([1, None, "a"]), build_content_hash([1, float("nan"), "a"]))
+        self.assertNotEqual(build_content_hash(["a|b", "c"]), build_content_hash(["a", "b|c"]))
+        self.assertNotEqual(build_content_hash([None]), build_content_hash(["None"]))
+
+    def test_iter_row_dicts(self):
+        (row,) = iter_row_dicts(build_bank_salad_expense_transactions(1), BankSaladExpenseTransaction.__table__)
+        self.assertNotIn("id", row)
+        self.assertEqual(row["memo0"], "memo0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,14 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import datetime
+import os
+import tempfile
 
 import pandas as pd
 
 from tt import *
+from tt.bank_salad_expense_transaction import (
+    BankSaladExpenseTransactionControl, BankSaladExpenseTransactionDBImpl)
 from tt.expense_transaction import ExpenseTransaction
 
 
@@ -70,9 +74,10 @@ class TestExpenseTransactionDBImpl(unittest.TestCase):
         self.mock_db_connection = MagicMock(spec=DBConnection)
         self.db_impl = ExpenseTransactionDBImpl(self.mock_db_connection)
 
+    @patch.object(DBImplBase, "add_content_hash_column")  # Mock the migration of an existing table
     @patch.object(DBImplBase, "_is_table_in_database")  # Mock method in the class
     @patch.object(ExpenseTransaction.__table__, "create")  # Mock table creation
-    def test_create_table(self, mock_create, mock_is_table_in_db):
+    def test_create_table(self, mock_create, mock_is_table_in_db, mock_add_content_hash_column):
         # Create a mock DBConnection object
         mock_db_connection = MagicMock(spec=DBConnection)
 
@@ -83,6 +88,7 @@ class TestExpenseTransactionDBImpl(unittest.TestCase):
         mock_is_table_in_db.return_value = True
         self.assertFalse(self.db_impl.create_table())
         mock_create.assert_not_called()  # Ensure create() wasn't called
+        mock_add_content_hash_column.assert_called_once()
 
         self.db_impl.db_connection.engine = None
 
@@ -113,6 +119,105 @@ class TestExpenseTransactionControl(unittest.TestCase):
         self.assertEqual(result[0].amount, 100)
         self.assertEqual(result[0].category0, "카테고리 없음")
 
+    def test_rule_index_is_rebuilt_when_rules_change(self):
+        mock_transaction = BankSaladExpenseTransaction()
+        mock_transaction.category0 = "Food"
+        conversion_rule = {
+            "rules": [{"source": {"category0": "Food", "category1": "", "memo0": "", "account": "", "memo1": ""}, "target": {"category0": "A"}}]
+        }
+        self.assertEqual(self.control._convert([mock_transaction] * 3, conversion_rule)[0].category0, "A")
+        rule_index = self.control.rule_index
+        self.assertEqual(self.control._convert([mock_transaction], conversion_rule)[0].category0, "A")
+        self.assertIs(self.control.rule_index, rule_index)
+        self.assertEqual(rule_index.get_cache_info().hits, 3)
+
+        conversion_rule["rules"][0]["target"]["category0"] = "B"
+        self.assertEqual(self.control._convert([mock_transaction], conversion_rule)[0].category0, "B")
+        self.assertIsNot(self.control.rule_index, rule_index)
+
+
+class TestExpenseTransactionControlOnSQLite(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        global_config_ir = {"database": {"backend": "sqlite"}, "sqlite": {"file_path": os.path.join(self.temp_dir.name, "finance.sqlite3")}}
+        self.db_connection = DBConnection(global_config_ir)
+        self.db_connection.do_initial_setup()
+        self.control = ExpenseTransactionControl(self.db_connection)
+        self.control.conversion_rule = {
+            "rules": [
+                {"source": {"category0": "식비", "category1": "", "memo0": "", "account": "", "memo1": ""}, "target": {"category0": "A"}},
+                {"source": {"category0": "", "category1": "", "memo0": "memo2", "account": "", "memo1": ""}, "target": {"category0": "B", "category1": "C"}},
+            ]
+        }
+        self.bank_salad_expense_transaction_db_impl = BankSaladExpenseTransactionDBImpl(self.db_connection)
+        self.bank_salad_expense_transaction_db_impl.create_table()
+        self.insert_bank_salad_expense_transactions(range(6))
+
+    def insert_bank_salad_expense_transactions(self, indexes: range) -> None:
+        list_of_bank_salad_expense_transactions = []
+        for index in indexes:
+            t = BankSaladExpenseTransaction()
+            t.account = "account0"
+            t.amount = -index
+            t.category0 = "식비" if index % 2 else "교통"
+            t.currency = "KRW"
+            t.transaction_datetime = datetime.datetime(2024, 1, 1, 12, index)
+            t.type = "지출"
+            t.memo0 = f"memo{index}"
+            t.user_identifier = "user0"
+            list_of_bank_salad_expense_transactions.append(t)
+        self.bank_salad_expense_transaction_db_impl.insert_records(list_of_bank_salad_expense_transactions)
+
+    def tearDown(self):
+        self.db_connection.close()
+        self.temp_dir.cleanup()
+
+    def get_all_records(self) -> list[tuple]:
+        return sorted(
+            (t.transaction_datetime, t.amount, t.category0, t.category1, t.memo0, t.memo1, t.source_account)
+            for t in self.control.db_impl.get_all_filtered_by_user_identifier("user0")
+        )
+
+    def test_batch_conversion_is_the_same(self):
+        self.assertTrue(self.control.import_and_append_from_database("user0"))
+        list_of_records = self.get_all_records()
+        self.assertEqual([record[2:4] for record in list_of_records], [("카테고리 없음", None), ("A", None), ("B", "C"), ("A", None), ("카테고리 없음", None), ("A", None)])
+
+        self.control.delete()
+        self.assertTrue(self.control.import_and_append_from_database("user0", flag_batch=True))
+        self.assertEqual(self.get_all_records(), list_of_records)
+
+    def test_rows_after_the_watermark_are_converted(self):
+        self.assertTrue(self.control.import_and_append_from_database("user0"))
+        self.assertEqual(self.control.watermark_db_impl.get_last_id("user0"), 6)
+        self.assertTrue(self.control.import_and_append_from_database("user0"))
+
+        self.insert_bank_salad_expense_transactions(range(6, 8))
+        self.control.conversion_rule["rules"][0]["target"]["category0"] = "D"
+        with patch.object(self.control, "_convert", wraps=self.control._convert) as mock_convert:
+            self.assertTrue(self.control.import_and_append_from_database("user0"))
+        self.assertEqual(len(mock_convert.call_args.args[0]), 2)
+        self.assertEqual(self.control.watermark_db_impl.get_last_id("user0"), 8)
+        self.assertEqual([record[2] for record in self.get_all_records()].count("D"), 1)
+
+        # `--full` applies the rule to all records.
+        self.assertTrue(self.control.import_and_append_from_database("user0", flag_batch=True, flag_full=True))
+        list_of_records = self.get_all_records()
+        self.assertEqual(len(list_of_records), 8)
+        self.assertEqual([record[2] for record in list_of_records].count("D"), 4)
+
+    def test_watermark_is_reset_with_bank_salad_records(self):
+        self.assertTrue(self.control.import_and_append_from_database("user0"))
+        self.assertEqual(self.control.watermark_db_impl.get_last_id("user0"), 6)
+        # The new table has more records than the watermark. So, its max id does not tell that it is new.
+        BankSaladExpenseTransactionControl(self.db_connection).delete()
+        self.bank_salad_expense_transaction_db_impl.create_table()
+        self.insert_bank_salad_expense_transactions(range(10, 18))
+        self.assertIsNone(self.control.watermark_db_impl.get_last_id("user0"))
+        self.assertTrue(self.control.import_and_append_from_database("user0"))
+        self.assertEqual(len(self.get_all_records()), 6 + 8)
+
 
 if __name__ == "__main__":
     unittest.main()
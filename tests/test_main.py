@@ -0,0 +1,126 @@
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import tt
+
+# It runs a command in a fresh interpreter. Then, prints modules which have been loaded and whether the database has been touched.
+PROBE_SCRIPT = """
+import json
+import sys
+
+import tt.main
+
+list_of_config_file_paths = []
+build_global_config = tt.main.build_global_config
+tt.main.build_global_config = lambda file_path: list_of_config_file_paths.append(file_path) or build_global_config(file_path)
+sys.argv = ["tt"] + sys.argv[1:]
+try:
+    tt.main.main()
+except SystemExit:
+    pass
+heavy = [name for name in ("pandas", "sqlalchemy", "mariadb", "selenium", "numpy") if name in sys.modules]
+touched = len(list_of_config_file_paths) > 0
+print(json.dumps({"heavy": heavy, "touched": touched}))
+"""
+MAX_STARTUP_SECONDS = 1.5  # Loading pandas and SQLAlchemy alone takes more than it.
+
+
+class TestStartup(unittest.TestCase):
+
+    def run_command(self, list_of_args: list[str]) -> tuple[dict, float]:
+        env = dict(os.environ)
+        src_dir_path = os.path.dirname(os.path.dirname(os.path.abspath(tt.__file__)))
+        env["PYTHONPATH"] = os.pathsep.join([src_dir_path] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+        with tempfile.TemporaryDirectory() as temp_dir_path:
+            # There is no configuration in the directory. So, a command fails if it reads the global configuration.
+            start = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, "-c", PROBE_SCRIPT] + list_of_args, cwd=temp_dir_path, env=env, capture_output=True, text=True, check=True
+            )
+            elapsed = time.perf_counter() - start
+        return (json.loads(completed.stdout.strip().splitlines()[-1]), elapsed)
+
+    def test_commands_without_database_start_fast(self):
+        for list_of_args in [["--help"], ["show", "auto"], ["create", "auto", "--help"]]:
+            with self.subTest(args=list_of_args):
+                (result, elapsed) = self.run_command(list_of_args)
+                self.assertEqual(result["heavy"], [])
+                self.assertFalse(result["touched"])
+                self.assertLess(elapsed, MAX_STARTUP_SECONDS)
+
+    def test_command_with_database_reads_global_config(self):
+        (result, _) = self.run_command(["get", "simple-transaction"])
+        self.assertTrue(result["touched"])
+
+
+class TestCreateAutoOptions(unittest.TestCase):
+
+    def test_unsupported_combinations_are_rejected(self):
+        from click.testing import CliRunner
+
+        import tt.main
+
+        for list_of_args in [["--batch", "--stream"], ["--batch", "--jobs", "2"], ["--batch", "--refresh-cache"], ["--no-cache", "--refresh-cache"]]:
+            with self.subTest(args=list_of_args):
+                with patch.object(tt.main, "global_object_control") as mock_global_object_control:
+                    result = CliRunner().invoke(tt.main.cli, ["create", "auto"] + list_of_args)
+                self.assertNotEqual(result.exit_code, 0)
+                # The database is not touched.
+                mock_global_object_control.get_valid_db_connection.assert_not_called()
+
+
+class TestCreateAutoInStreamingMode(unittest.TestCase):
+
+    def setUp(self):
+        from tt.db_connection import DBConnection
+        self.temp_dir = tempfile.TemporaryDirectory()
+        global_config_ir = {"database": {"backend": "sqlite"}, "sqlite": {"file_path": os.path.join(self.temp_dir.name, "finance.sqlite3")}}
+        self.db_connection = DBConnection(global_config_ir)
+        self.db_connection.do_initial_setup()
+
+    def tearDown(self):
+        self.db_connection.close()
+        self.temp_dir.cleanup()
+
+    def test_fresh_sqlite_database(self):
+        import tt.main
+        from tt.simple_portfolio_control import SimplePortfolioControl
+        from tt.simple_transaction import SimpleTransaction
+        from tt.simple_transaction_db_impl import SimpleTransactionDBImpl
+
+        list_of_simple_transactions = [
+            SimpleTransaction(
+                symbol="AAPL",
+                transaction_type=SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY,
+                amount=1.0,
+                open_price=100.0,
+                open_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=index),
+                commission=0.0,
+                account="account0",
+            )
+            for index in range(5)
+        ]
+        control = MagicMock()
+        control.iter_all_transactions.return_value = iter(list_of_simple_transactions)
+        # Fact data have not been bootstrapped. So, `stock_splits` is created during the command.
+        global_object_control = tt.main.GlobalObjectControl()
+        global_object_control.global_db_connection = self.db_connection
+        db_impl = SimpleTransactionDBImpl(self.db_connection)
+        with patch.object(tt.main, "global_object_control", global_object_control), patch.object(
+            SimplePortfolioControl, "do_investing_dot_com_portfolio_export"
+        ) as mock_export:
+            tt.main.create_auto_in_streaming_mode(control, db_impl, None, 2)
+        mock_export.assert_called_once()
+        self.assertEqual(db_impl.count_inserted, 5)
+        self.assertEqual(len(db_impl.get_all_records()), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
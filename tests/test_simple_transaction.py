@@ -67,6 +67,28 @@ class TestSimpleTransaction(unittest.TestCase):
         transaction_other = SimpleTransaction(transaction_type=99)
         self.assertEqual(transaction_other.get_transaction_type_string(), "OTHER")
 
+    def test_transaction_type_from_string(self):
+        for transaction_type in SimpleTransaction.SimpleTransactionTypeEnum:
+            transaction = SimpleTransaction(transaction_type=transaction_type)
+            self.assertEqual(
+                SimpleTransaction.get_transaction_type_from_string(transaction.get_transaction_type_string()),
+                transaction_type,
+            )
+        self.assertEqual(
+            SimpleTransaction.get_transaction_type_from_string("UNKNOWN"),
+            SimpleTransaction.SimpleTransactionTypeEnum.TYPE_OTHER,
+        )
+
+    def test_slots_and_interned_strings(self):
+        transaction = SimpleTransaction(symbol="".join(["AA", "PL"]), namespace="NASDAQ", account="account0")
+        self.assertFalse(hasattr(transaction, "__dict__"))
+        with self.assertRaises(AttributeError):
+            transaction.unknown_field = 0
+        other = SimpleTransaction(symbol="".join(["AA", "PL"]))
+        self.assertIs(transaction.symbol, other.symbol)
+        self.assertEqual(transaction.namespace, "NASDAQ")
+        self.assertEqual(transaction.account, "account0")
+
     def test_str(self):
         transaction = SimpleTransaction(
             symbol="AAPL",
@@ -0,0 +1,174 @@
+import datetime
+import unittest
+from unittest.mock import MagicMock
+
+from tt.db_backend import MariaDBBackend
+from tt.db_connection import DBConnection
+from tt.simple_transaction import SimpleTransaction
+from tt.simple_transaction_db_impl import (SimpleTransactionDBImpl,
+                                           escape_load_data_field)
+
+
+def build_transactions(count: int) -> list[SimpleTransaction]:
+    return [
+        SimpleTransaction(
+            symbol=f"S{index % 7}",
+            transaction_type=SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY,
+            amount=float(index),
+            open_price=1.5,
+            open_date=datetime.date(2024, 1, 1) + datetime.timedelta(days=index),
+            commission=0.25,
+            account="account0",
+        )
+        for index in range(count)
+    ]
+
+
+class TestSimpleTransactionDBImplExport(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_db_connection = MagicMock(spec=DBConnection)
+        self.mock_db_connection.backend = MariaDBBackend()
+        self.mock_db_connection.database_name = "finance"
+        self.mock_cursor = MagicMock()
+        self.mock_db_connection.cur.return_value = self.mock_cursor
+        self.db_impl = SimpleTransactionDBImpl(self.mock_db_connection)
+
+    def export_all(self, list_of_simple_transactions: list[SimpleTransaction], set_of_existing_hashes: set[str]) -> tuple[int, int, int]:
+        self.mock_cursor.reset_mock()
+        self.mock_cursor.__iter__.return_value = iter([(content_hash,) for content_hash in set_of_existing_hashes])
+        self.mock_cursor.rowcount = 0
+        self.db_impl.export_all(list_of_simple_transactions)
+        return (self.db_impl.count_inserted, self.db_impl.count_unchanged, self.db_impl.count_removed)
+
+    def get_inserted_rows(self) -> list[tuple]:
+        return [row for c in self.mock_cursor.executemany.call_args_list if c.args[0] == self.db_impl.insert_sql_string for row in c.args[1]]
+
+    def test_export_all_in_chunks_in_a_transaction(self):
+        self.db_impl.chunk_size_for_insert = 1000
+        self.assertEqual(self.export_all(build_transactions(2500), set()), (2500, 0, 0))
+
+        list_of_calls = self.mock_cursor.executemany.call_args_list
+        self.assertEqual([len(c.args[1]) for c in list_of_calls], [1000, 1000, 500])
+        self.assertEqual(list_of_calls[0].args[1][1][:7], (1.0, 0.25, datetime.date(2024, 1, 2), 1.5, "S1", "BUY", "account0"))
+        executed = [c.args[0] for c in self.mock_cursor.execute.call_args_list]
+        self.assertIn("START TRANSACTION;", executed)
+        self.mock_db_connection.commit.assert_called_once()
+
+    def test_export_all_writes_only_changes(self):
+        list_of_simple_transactions = build_transactions(10)
+        self.export_all(list_of_simple_transactions, set())
+        set_of_existing_hashes = {row[7] for row in self.get_inserted_rows()}
+        self.assertEqual(len(set_of_existing_hashes), 10)
+
+        # Nothing has changed.
+        self.assertEqual(self.export_all(list_of_simple_transactions, set_of_existing_hashes), (0, 10, 0))
+        self.mock_cursor.executemany.assert_not_called()
+
+        # One new transaction has arrived. The first one has disappeared.
+        (inserted, unchanged, removed) = self.export_all(list_of_simple_transactions[1:] + build_transactions(11)[10:], set_of_existing_hashes)
+        self.assertEqual((inserted, unchanged, removed), (1, 9, 1))
+        deleted = [c.args[1] for c in self.mock_cursor.executemany.call_args_list if c.args[0] == SimpleTransactionDBImpl.DELETE_SQL_STRING]
+        self.assertEqual(len(deleted), 1)
+        self.assertNotIn(deleted[0][0][0], {row[7] for row in self.get_inserted_rows()})
+
+    def test_identical_transactions_have_different_hashes(self):
+        transaction = build_transactions(1)[0]
+        self.assertEqual(self.export_all([transaction, transaction], set()), (2, 0, 0))
+        self.assertEqual(len({row[7] for row in self.get_inserted_rows()}), 2)
+
+    def test_occurrences_are_kept_for_the_current_date(self):
+        (first, second) = build_transactions(2)
+        self.export_all([first, first, second, second], set())
+        list_of_hashes = [row[7] for row in self.get_inserted_rows()]
+        self.assertEqual(len(set(list_of_hashes)), 4)
+        # The n-th identical transaction of a day gets the same hash, whatever comes before the day.
+        self.export_all([second, second], set())
+        self.assertEqual([row[7] for row in self.get_inserted_rows()], list_of_hashes[2:])
+        self.assertEqual(len(self.db_impl.occurrence_table), 1)
+
+    def test_export_all_with_load_data(self):
+        self.db_impl.flag_use_load_data = True
+        self.assertEqual(self.export_all(build_transactions(3), set()), (3, 0, 0))
+
+        self.mock_cursor.executemany.assert_not_called()
+        executed = [c.args[0] for c in self.mock_cursor.execute.call_args_list]
+        self.assertTrue(any(sql_string.startswith("LOAD DATA LOCAL INFILE") for sql_string in executed))
+        self.mock_db_connection.commit.assert_called_once()
+
+    def test_escape_load_data_field(self):
+        self.assertEqual(escape_load_data_field("a\tb\nc\\d"), "a\\tb\\nc\\\\d")
+
+
+class TestSimpleTransactionDBImplIterRecords(unittest.TestCase):
+
+    def setUp(self):
+        self.mock_db_connection = MagicMock(spec=DBConnection)
+        self.mock_db_connection.backend = MariaDBBackend()
+        self.mock_cursor = MagicMock()
+        self.mock_db_connection.unbuffered_cur.return_value = self.mock_cursor
+        self.db_impl = SimpleTransactionDBImpl(self.mock_db_connection)
+        rows = [(index + 1, "account0", 1.0, 0.0, datetime.date(2024, 1, 1), 2.0, "AAPL", "BUY") for index in range(5)]
+        self.mock_cursor.fetchmany.side_effect = [rows[0:2], rows[2:4], rows[4:5], []]
+
+    def test_iter_records_in_batches(self):
+        iterator = self.db_impl.iter_records(batch_size=2)
+        first = next(iterator)
+        # Only the first batch has been fetched.
+        self.mock_cursor.fetchmany.assert_called_once_with(2)
+        self.assertEqual(first.symbol, "AAPL")
+        self.assertEqual(first.account, "account0")
+        self.assertEqual(first.transaction_type, SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY)
+        self.assertEqual(len(list(iterator)), 4)
+        self.assertEqual(self.db_impl.last_record_id, 5)
+        self.mock_cursor.close.assert_called_once()
+
+    def test_iter_records_with_keyset_pagination(self):
+        simple_transaction_filter = SimpleTransactionDBImpl.SimpleTransactionFilter()
+        simple_transaction_filter.flag_filter_by["symbol"] = True
+        simple_transaction_filter.value_dict["symbol"] = "AAPL"
+        iterator = self.db_impl.iter_records(simple_transaction_filter, after_id=10, limit=3)
+        next(iterator)
+        (sql_string, parameters) = self.mock_cursor.execute.call_args.args
+        self.assertIn("WHERE symbol = ? AND id > ?", sql_string)
+        self.assertTrue(sql_string.endswith("ORDER BY id LIMIT ?"))
+        self.assertEqual(parameters, ("AAPL", 10, 3))
+        # A caller stops early.
+        iterator.close()
+        self.mock_cursor.close.assert_called_once()
+
+
+class TestSimpleTransactionFilter(unittest.TestCase):
+
+    def test_no_condition(self):
+        self.assertEqual(SimpleTransactionDBImpl.SimpleTransactionFilter().get_where_clause_and_parameters(), ("", []))
+
+    def test_range_and_set_conditions_are_bound(self):
+        simple_transaction_filter = SimpleTransactionDBImpl.SimpleTransactionFilter()
+        simple_transaction_filter.account = "account0"
+        simple_transaction_filter.set_of_symbols = {"MSFT", "AAPL"}
+        simple_transaction_filter.set_of_transaction_types = {SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL}
+        simple_transaction_filter.open_date_from = datetime.date(2024, 1, 1)
+        simple_transaction_filter.open_date_to = datetime.date(2024, 12, 31)
+        (where_clause_str, parameters) = simple_transaction_filter.get_where_clause_and_parameters()
+        self.assertEqual(
+            where_clause_str,
+            "WHERE account = ? AND symbol IN (?, ?) AND transaction_type IN (?) AND open_date >= ? AND open_date <= ?",
+        )
+        self.assertEqual(parameters, ["account0", "AAPL", "MSFT", "SELL", datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)])
+
+    def test_value_is_not_a_part_of_statement(self):
+        simple_transaction_filter = SimpleTransactionDBImpl.SimpleTransactionFilter()
+        simple_transaction_filter.set_of_symbols = {"' OR 1=1 --"}
+        (where_clause_str, parameters) = simple_transaction_filter.get_where_clause_and_parameters()
+        self.assertEqual(where_clause_str, "WHERE symbol IN (?)")
+        self.assertEqual(parameters, ["' OR 1=1 --"])
+
+    def test_empty_set_matches_nothing(self):
+        simple_transaction_filter = SimpleTransactionDBImpl.SimpleTransactionFilter()
+        simple_transaction_filter.set_of_symbols = set()
+        self.assertEqual(simple_transaction_filter.get_where_clause_and_parameters(), ("WHERE FALSE", []))
+
+
+if __name__ == "__main__":
+    unittest.main()
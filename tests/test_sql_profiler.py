@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import sqlalchemy
+
+from tt.sql_profiler import (ProfiledCursor, SQLProfiler,
+                             SQLStatementStatistics, get_statement_shape,
+                             load_profile, load_statistics_table)
+
+
+class TestStatementShape(unittest.TestCase):
+
+    def test_literals_and_lists_are_folded(self):
+        self.assertEqual(
+            get_statement_shape("SELECT id FROM t\n WHERE symbol IN ('A', 'B''s') AND amount > 1.5 AND id > ?;"),
+            "SELECT id FROM t WHERE symbol IN (...) AND amount > ? AND id > ?",
+        )
+        self.assertEqual(get_statement_shape("SELECT 1 FROM t WHERE symbol IN (?, ?, ?)"), get_statement_shape("SELECT 2 FROM t WHERE symbol IN (?)"))
+        self.assertEqual(get_statement_shape("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)"), "INSERT INTO t (a, b) VALUES (?, ?)")
+        # Digits of an identifier are kept.
+        self.assertEqual(get_statement_shape("CREATE DATABASE d CHARACTER SET utf8mb4"), "CREATE DATABASE d CHARACTER SET utf8mb4")
+
+
+class TestSQLProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.profile_file_path = os.path.join(self.temp_dir.name, "sql_profile.json")
+        self.sql_profiler = SQLProfiler({"enabled": True, "slow_query_threshold_ms": 10000, "profile_file_path": self.profile_file_path})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_disabled_profiler_does_not_wrap(self):
+        conn = sqlite3.connect(":memory:")
+        cursor = conn.cursor()
+        self.assertIs(SQLProfiler().wrap_cursor(cursor), cursor)
+        conn.close()
+
+    def test_profiled_cursor(self):
+        conn = sqlite3.connect(":memory:")
+        cur = self.sql_profiler.wrap_cursor(conn.cursor())
+        self.assertIsInstance(cur, ProfiledCursor)
+        cur.execute("CREATE TABLE t (id integer, symbol text)")
+        cur.executemany("INSERT INTO t VALUES (?, ?)", [(index, "AAPL") for index in range(5)])
+        for index in range(3):
+            cur.execute(f"SELECT id FROM t WHERE id >= {index}")
+            list(cur)
+        conn.close()
+
+        insert = self.sql_profiler.statistics_table["INSERT INTO t VALUES (?, ?)"]
+        self.assertEqual((insert.count_calls, insert.count_rows), (1, 5))
+        select = self.sql_profiler.statistics_table["SELECT id FROM t WHERE id >= ?"]
+        self.assertEqual((select.count_calls, select.count_rows), (3, 5 + 4 + 3))
+        self.assertEqual(sum(select.histogram), 3)
+
+    def test_engine_events(self):
+        engine = sqlalchemy.create_engine("sqlite://")
+        self.sql_profiler.attach(engine)
+        with engine.connect() as conn:
+            conn.execute(sqlalchemy.text("SELECT 1"))
+            conn.execute(sqlalchemy.text("SELECT 2"))
+        engine.dispose()
+        self.assertEqual(self.sql_profiler.statistics_table["SELECT ?"].count_calls, 2)
+
+    def test_engine_events_of_a_failed_statement(self):
+        engine = sqlalchemy.create_engine("sqlite://")
+        self.sql_profiler.attach(engine)
+        with engine.connect() as conn:
+            with self.assertRaises(sqlalchemy.exc.OperationalError):
+                conn.execute(sqlalchemy.text("SELECT * FROM missing_table"))
+            self.assertEqual(conn.info["sql_profiler_start"], [])
+        engine.dispose()
+        self.assertEqual(self.sql_profiler.statistics_table["SELECT * FROM missing_table"].count_calls, 1)
+
+    def test_save_merges_runs(self):
+        for _ in range(2):
+            self.sql_profiler.record("SELECT 1", 0.003, 1)
+            self.sql_profiler.save()
+        statistics_table = load_statistics_table(self.profile_file_path)
+        statistics = statistics_table["SELECT ?"]
+        self.assertEqual((statistics.count_calls, statistics.count_rows), (2, 2))
+        self.assertEqual(statistics.get_percentile_upper_bound_in_ms(95), 3.0)
+
+    def test_save_merges_pool_statistics(self):
+        pool_status = {"count_connect": 1, "count_checkout": 4, "count_checkin": 4, "total_wait_seconds": 0.002, "max_wait_seconds": 0.001}
+        for max_wait_seconds in [0.001, 0.003]:
+            self.sql_profiler.record_pool_status(dict(pool_status, max_wait_seconds=max_wait_seconds))
+            self.sql_profiler.save()
+        (statistics_table, pool_statistics) = load_profile(self.profile_file_path)
+        self.assertEqual(statistics_table, {})
+        self.assertEqual((pool_statistics.count_runs, pool_statistics.count_connect, pool_statistics.count_checkout), (2, 2, 8))
+        self.assertAlmostEqual(pool_statistics.total_wait_seconds, 0.004)
+        self.assertEqual(pool_statistics.max_wait_seconds, 0.003)
+
+    def test_load_profile_of_statements_only(self):
+        # A file of an older version is a list of statements.
+        with open(self.profile_file_path, "w", encoding="utf-8") as f:
+            json.dump([SQLStatementStatistics("SELECT ?").to_dict()], f)
+        (statistics_table, pool_statistics) = load_profile(self.profile_file_path)
+        self.assertEqual(list(statistics_table), ["SELECT ?"])
+        self.assertIsNone(pool_statistics)
+
+    def test_percentile(self):
+        statistics = SQLStatementStatistics("SELECT ?")
+        for _ in range(99):
+            statistics.record(0.0015, 0)
+        statistics.record(0.3, 0)
+        self.assertEqual(statistics.get_percentile_upper_bound_in_ms(50), 2)
+        self.assertAlmostEqual(statistics.get_percentile_upper_bound_in_ms(100), 300.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
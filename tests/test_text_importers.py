@@ -0,0 +1,270 @@
+import csv
+import datetime
+import io
+import random
+import unittest
+
+import tt.automated_text_importer_columnar
+from tt.automated_text_importer_layout import (AutomatedTextImporterLayout,
+                                               iter_simple_transactions_from_stream)
+from tt.kiwoom_text_importer import KIWOOM_LAYOUTS, KiwoomTextImporter
+from tt.meritz_text_importer import MERITZ_LAYOUTS, MeritzTextImporter
+from tt.shinhan_text_importer import SHINHAN_LAYOUTS, ShinhanTextImporter
+from tt.simple_transaction import SimpleTransaction
+from tt.symbol_config import SymbolConfig, SymbolConfigElement
+
+
+def build_symbol_config() -> SymbolConfig:
+    symbol_config = SymbolConfig()
+    for original_namespace, original_symbol, legit_namespace, legit_symbol in [
+        ("kiwoom", "IVV", "NYSEARCA", "IVV"),
+        ("kiwoom", "BRKb", "NYSE", "BRK.B"),
+        ("meritz", "IVV.AX", "NYSEARCA", "IVV"),
+        ("meritz", "QQQ.OQ", "NASDAQ", "QQQ"),
+        ("shinhan", "TSLA", "NASDAQ", "TSLA"),
+        ("shinhan", "AAPL", "NASDAQ", "AAPL"),
+    ]:
+        element = SymbolConfigElement()
+        element.original_namespace = original_namespace
+        element.original_symbol = original_symbol
+        element.legit_namespace = legit_namespace
+        element.legit_symbol = legit_symbol
+        symbol_config.symbol_config_elements.append(element)
+    return symbol_config
+
+
+def build_row(length: int, values: dict) -> list[str]:
+    row = ["0"] * length
+    for index, value in values.items():
+        row[index] = value
+    return row
+
+
+def build_csv_text(header: list[str], rows: list[list[str]]) -> str:
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\r\n")
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+    return output.getvalue()
+
+
+def build_kiwoom_csv_text() -> str:
+    header = build_row(27, {0: "거래일자", 1: "종목코드", 4: "적요명"})
+
+    def row(open_date, symbol, transaction_type, amount, open_price, commission, tax):
+        return build_row(27, {0: open_date, 1: symbol, 4: transaction_type, 7: amount, 8: open_price, 16: commission, 17: tax})
+
+    rows = [
+        row("2024/01/02", "IVV", "매수", "1,000", "470.50", "1.23", "0.01"),
+        row("2024/01/02", "BRKb", "매도", "2", "1,360.1", "0.5", "0"),
+        row("2024/01/02", "IVV", "액면분할병합출고", "3", "10", "0", "0"),
+        row("2024/01/02", "IVV", "배당금입금", "0", "0", "0", "0"),
+        row("2024/01/05", "BRKb", "타사대체입고", "4", "350", "0", "0"),
+        row("합계", "BRKb", "매수", "1", "1", "0", "0"),
+        row("2024/01/08", "IVV", "이벤트입고", "1", "0", "0", "0"),
+    ]
+    return build_csv_text(header, rows)
+
+
+def build_meritz_csv_text() -> str:
+    header = build_row(37, {0: "상품구분", 1: "거래일자", 3: "거래구분"})
+
+    def row(open_date, transaction_type, symbol, amount, open_price, commission, tax):
+        return build_row(37, {0: "해외주식", 1: open_date, 3: transaction_type, 5: symbol, 8: amount, 9: open_price, 13: commission, 14: tax})
+
+    rows = [
+        row("2024-03-04", "해외주식 매도", "QQQ.OQ", "1", "440.25", "0.22", "0.01"),
+        row("2024-03-04", "해외주식매수", "IVV.AX", "10", "51.1", "0.3", "0"),
+        row("2024-03-06", "타사대체출고", "QQQ.OQ", "2", "0", "0", "0"),
+        row("2024-03-07", "해외주식 매수", "IVV.AX", "1,200", "51.2", "0.111", "0.111"),
+    ]
+    return build_csv_text(header, rows)
+
+
+def build_shinhan_csv_text() -> str:
+    header = build_row(24, {0: "주문일자", 1: "매매구분", 3: "종목코드"})
+
+    def row(open_date, transaction_type, symbol, amount, open_price, commission):
+        return build_row(24, {0: open_date, 1: transaction_type, 3: symbol, 7: amount, 8: open_price, 11: commission})
+
+    rows = [
+        row("2024.05.01", "매도", " TSLA ", "3", "180.5", "0.27"),
+        row("2024.05.01", "매수", "AAPL", "5", "170", "0.43"),
+        row("2024.05.02", "정정", "AAPL", "5", "170", "0.43"),
+        row("2024.05.03", "매수", "TSLA", "1,000", "1,170.75", "2.5"),
+    ]
+    return build_csv_text(header, rows)
+
+
+def as_tuples(list_of_simple_transactions: list[SimpleTransaction]) -> list[tuple]:
+    return [
+        (
+            t.open_date,
+            t.transaction_type,
+            t.namespace,
+            t.symbol,
+            t.account,
+            t.amount,
+            t.open_price,
+            t.commission,
+        )
+        for t in list_of_simple_transactions
+    ]
+
+
+class TestKiwoomTextImporter(unittest.TestCase):
+
+    def test_get_list_of_simple_transactions_from_stream(self):
+        importer = KiwoomTextImporter()
+        result = importer._get_list_of_simple_transactions_from_stream(
+            io.StringIO(build_kiwoom_csv_text(), newline=""), "account0", build_symbol_config()
+        )
+        self.assertEqual(
+            as_tuples(result),
+            [
+                (datetime.date(2024, 1, 2), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_SPLIT_MERGE_DELETION, "NYSEARCA", "IVV", "account0", 3.0, 10.0, 0.0),
+                (datetime.date(2024, 1, 2), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, "NYSEARCA", "IVV", "account0", 1000.0, 470.5, 1.24),
+                (datetime.date(2024, 1, 2), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL, "NYSE", "BRK.B", "account0", 2.0, 1360.1, 0.5),
+                (datetime.date(2024, 1, 5), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_INSERTION_CAUSED_BY_OTHER_SECURITIES_FIRM, "NYSE", "BRK.B", "account0", 4.0, 350.0, 0.0),
+                (datetime.date(2024, 1, 8), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_INBOUND_TRANSFER_RESULTED_FROM_EVENT, "NYSEARCA", "IVV", "account0", 1.0, 0.0, 0.0),
+            ],
+        )
+
+    def test_iter_simple_transactions_from_stream_is_lazy(self):
+        importer = KiwoomTextImporter()
+        stream = importer._iter_simple_transactions_from_stream(
+            io.StringIO(build_kiwoom_csv_text(), newline=""), "account0", build_symbol_config()
+        )
+        self.assertEqual(next(stream).open_date, datetime.date(2024, 1, 2))
+
+
+class TestMeritzTextImporter(unittest.TestCase):
+
+    def test_get_list_of_simple_transactions_from_stream(self):
+        importer = MeritzTextImporter()
+        result = importer._get_list_of_simple_transactions_from_stream(
+            io.StringIO(build_meritz_csv_text(), newline=""), "account1", build_symbol_config()
+        )
+        self.assertEqual(
+            as_tuples(result),
+            [
+                (datetime.date(2024, 3, 4), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, "NYSEARCA", "IVV", "account1", 10.0, 51.1, 0.3),
+                (datetime.date(2024, 3, 4), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL, "NASDAQ", "QQQ", "account1", 1.0, 440.25, 0.23),
+                (datetime.date(2024, 3, 6), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_STOCK_DELETION_CAUSED_BY_OTHER_SECURITIES_FIRM, "NASDAQ", "QQQ", "account1", 2.0, 0.0, 0.0),
+                (datetime.date(2024, 3, 7), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, "NYSEARCA", "IVV", "account1", 1200.0, 51.2, 0.22),
+            ],
+        )
+
+
+class TestShinhanTextImporter(unittest.TestCase):
+
+    def test_get_list_of_simple_transactions_from_stream(self):
+        importer = ShinhanTextImporter()
+        result = importer._get_list_of_simple_transactions_from_stream(
+            io.StringIO(build_shinhan_csv_text(), newline=""), "account2", build_symbol_config()
+        )
+        self.assertEqual(
+            as_tuples(result),
+            [
+                (datetime.date(2024, 5, 1), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, "NASDAQ", "AAPL", "account2", 5.0, 170.0, 0.43),
+                (datetime.date(2024, 5, 1), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_SELL, "NASDAQ", "TSLA", "account2", 3.0, 180.5, 0.27),
+                (datetime.date(2024, 5, 3), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, "NASDAQ", "TSLA", "account2", 1000.0, 1170.75, 2.5),
+            ],
+        )
+
+
+class TestAutomatedTextImporterLayout(unittest.TestCase):
+
+    def build_layout(self, name, header_fields, date_column, symbol_column):
+        return AutomatedTextImporterLayout(
+            name=name,
+            header_sentinel="Date",
+            header_fields=header_fields,
+            expected_column_length=6,
+            date_column=date_column,
+            date_format="%Y-%m-%d",
+            transaction_type_column=1,
+            transaction_type_table={"B": SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY},
+            symbol_column=symbol_column,
+            amount_column=3,
+            open_price_column=4,
+            commission_columns=[5],
+        )
+
+    def test_layout_is_chosen_from_header(self):
+        new_layout = self.build_layout("new", {0: "Date", 1: "Type", 2: "Symbol"}, 0, 2)
+        old_layout = self.build_layout("old", {0: "Date", 1: "Type", 2: "TradeDate"}, 2, 0)
+        text = build_csv_text(["Date", "Type", "TradeDate", "Amount", "Price", "Fee"], [["TSLA", "B", "2024-05-01", "1", "2", "0.005"]])
+        text += build_csv_text(["Date", "Type", "Symbol", "Amount", "Price", "Fee"], [["2024-05-02", "B", "AAPL", "3", "4", "0.1"], ["2024-05-02", "D", "AAPL", "3", "4", "0.1"]])
+        result = list(
+            iter_simple_transactions_from_stream(
+                io.StringIO(text, newline=""), [new_layout, old_layout], "shinhan", "account0", build_symbol_config()
+            )
+        )
+        self.assertEqual(
+            as_tuples(result),
+            [
+                (datetime.date(2024, 5, 1), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, "NASDAQ", "TSLA", "account0", 1.0, 2.0, 0.01),
+                (datetime.date(2024, 5, 2), SimpleTransaction.SimpleTransactionTypeEnum.TYPE_BUY, "NASDAQ", "AAPL", "account0", 3.0, 4.0, 0.1),
+            ],
+        )
+
+
+def build_random_kiwoom_csv_text(seed: int, num_days: int) -> str:
+    rng = random.Random(seed)
+    header = build_row(27, {0: "거래일자", 1: "종목코드", 4: "적요명"})
+    transaction_types = ["매수", "매도", "액면분할병합입고", "액면분할병합출고", "이벤트입고", "타사대체입고", "타사대체출고", "배당금입금", " 매수 "]
+    rows = []
+    open_date = datetime.date(2020, 1, 1)
+    for _ in range(num_days):
+        open_date += datetime.timedelta(days=rng.randint(1, 3))
+        for _ in range(rng.randint(1, 6)):
+            rows.append(build_row(27, {
+                0: open_date.strftime("%Y/%m/%d"),
+                1: rng.choice(["IVV", "BRKb"]),
+                4: rng.choice(transaction_types),
+                7: f"{rng.randint(1, 5000):,}",
+                8: f"{rng.uniform(0, 3000):,.3f}",
+                16: rng.choice(["0.125", "1.005", "0.115", f"{rng.uniform(0, 10):.4f}"]),
+                17: rng.choice(["0", "0.01", "0.005"]),
+            }))
+        if rng.random() < 0.05:
+            rows.append(build_row(27, {0: "합계", 4: "매수"}))
+        if rng.random() < 0.05:
+            rows.append(header)
+    return build_csv_text(header, rows)
+
+
+class TestColumnarImport(unittest.TestCase):
+
+    def assert_same_as_row_wise(self, text, list_of_layouts, securities_firm_id):
+        symbol_config = build_symbol_config()
+        row_wise = list(iter_simple_transactions_from_stream(io.StringIO(text, newline=""), list_of_layouts, securities_firm_id, "account0", symbol_config))
+        columnar = tt.automated_text_importer_columnar.get_list_of_simple_transactions_from_stream(
+            io.StringIO(text, newline=""), list_of_layouts, securities_firm_id, "account0", symbol_config
+        )
+        self.assertGreater(len(row_wise), 0)
+        self.assertEqual(as_tuples(row_wise), as_tuples(columnar))
+
+    def test_parity(self):
+        self.assert_same_as_row_wise(build_kiwoom_csv_text(), KIWOOM_LAYOUTS, "kiwoom")
+        self.assert_same_as_row_wise(build_meritz_csv_text(), MERITZ_LAYOUTS, "meritz")
+        self.assert_same_as_row_wise(build_shinhan_csv_text(), SHINHAN_LAYOUTS, "shinhan")
+
+    def test_parity_with_random_rows(self):
+        for seed in range(3):
+            self.assert_same_as_row_wise(build_random_kiwoom_csv_text(seed, 300), KIWOOM_LAYOUTS, "kiwoom")
+
+    def test_parity_with_a_row_longer_than_expected(self):
+        text = build_kiwoom_csv_text() + ",".join(["2024/01/09", "IVV", "0", "0", "매수", "0", "0", "1", "2"] + ["0"] * 21) + "\r\n"
+        self.assert_same_as_row_wise(text, KIWOOM_LAYOUTS, "kiwoom")
+
+    def test_importer_with_columnar_flag(self):
+        importer = KiwoomTextImporter()
+        importer.flag_columnar = True
+        result = importer._get_list_of_simple_transactions_from_stream(io.StringIO(build_kiwoom_csv_text(), newline=""), "account0", build_symbol_config())
+        self.assertEqual(len(result), 5)
+
+if __name__ == "__main__":
+    unittest.main()
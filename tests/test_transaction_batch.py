@@ -0,0 +1,81 @@
+import datetime
+import random
+import unittest
+from unittest.mock import MagicMock
+
+from tt.automated_text_importer_helper import AutomatedTextImporterHelper
+from tt.simple_portfolio_control import SimplePortfolioControl
+from tt.simple_transaction import SimpleTransaction
+from tt.transaction_batch import TransactionBatch
+
+from tests.test_text_importers import as_tuples
+
+
+def build_random_transactions(seed: int, account: str, num_transactions: int) -> list[SimpleTransaction]:
+    """Returns transactions sorted by date as an importer does."""
+    rng = random.Random(seed)
+    list_of_transaction_types = list(SimpleTransaction.SimpleTransactionTypeEnum)
+    list_of_simple_transactions = []
+    open_date = datetime.date(2020, 1, 2)
+    for _ in range(num_transactions):
+        open_date += datetime.timedelta(days=rng.randint(0, 1))
+        transaction = SimpleTransaction(
+            symbol=rng.choice(["AAA", "BBB", "CCC"]),
+            transaction_type=rng.choice(list_of_transaction_types),
+            amount=float(rng.randint(1, 100)),
+            open_price=rng.uniform(1, 100),
+            open_date=open_date,
+            commission=round(rng.uniform(0, 1), 2),
+        )
+        transaction.namespace = rng.choice(["NYSE", "NASDAQ"])
+        transaction.account = account
+        list_of_simple_transactions.append(transaction)
+    return list_of_simple_transactions
+
+
+class TestTransactionBatch(unittest.TestCase):
+
+    def test_round_trip(self):
+        list_of_simple_transactions = build_random_transactions(0, "account0", 100)
+        batch = TransactionBatch.from_simple_transactions(list_of_simple_transactions)
+        self.assertEqual(len(batch), 100)
+        self.assertEqual(as_tuples(batch.to_simple_transactions()), as_tuples(list_of_simple_transactions))
+
+    def test_slice_shares_dictionaries(self):
+        list_of_simple_transactions = build_random_transactions(1, "account0", 20)
+        batch = TransactionBatch.from_simple_transactions(list_of_simple_transactions)
+        sliced = batch[5:10]
+        self.assertIs(sliced.symbols, batch.symbols)
+        self.assertEqual(as_tuples(sliced), as_tuples(list_of_simple_transactions[5:10]))
+        self.assertEqual(as_tuples(batch[3]), as_tuples(list_of_simple_transactions[3:4]))
+
+    def test_concatenate_and_sort_is_the_same_as_merge(self):
+        list_of_sources = [build_random_transactions(seed, f"account{seed}", 200) for seed in range(3)]
+        merged = AutomatedTextImporterHelper.merge_simple_transactions(*list_of_sources)
+        batch = TransactionBatch.concatenate(
+            [TransactionBatch.from_simple_transactions(source) for source in list_of_sources]
+        ).sort_by_date_and_type_rank()
+        self.assertEqual(as_tuples(batch), as_tuples(merged))
+
+    def test_concatenate_of_no_batch(self):
+        self.assertEqual(len(TransactionBatch.concatenate([])), 0)
+        self.assertEqual(len(TransactionBatch.concatenate([TransactionBatch.empty()])), 0)
+
+    def test_build_portfolio_from_batch(self):
+        list_of_simple_transactions = AutomatedTextImporterHelper.merge_simple_transactions(
+            build_random_transactions(2, "account0", 300)
+        )
+        batch = TransactionBatch.from_simple_transactions(list_of_simple_transactions)
+        fact_data_control = MagicMock()
+        fact_data_control.stock_split_control.get_all_filtered_by_symbol_and_symbol_namespace.return_value = []
+        control = SimplePortfolioControl(fact_data_control)
+        snapshot_date = list_of_simple_transactions[150].open_date
+        for portfolio_snapshot_date in [None, snapshot_date]:
+            with self.subTest(portfolio_snapshot_date=portfolio_snapshot_date):
+                expected = control.build_portfolio(list_of_simple_transactions, portfolio_snapshot_date)
+                actual = control.build_portfolio(batch, portfolio_snapshot_date)
+                self.assertEqual(actual.p, expected.p)
+
+
+if __name__ == "__main__":
+    unittest.main()
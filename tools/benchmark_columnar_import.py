@@ -0,0 +1,108 @@
+"""
+This tool compares the row-wise parser and the columnar parser on a synthetic Kiwoom export.
+It checks that both of them produce the same transactions in the same order.
+
+Usage:
+    python tools/benchmark_columnar_import.py --rows 200000
+"""
+
+import csv
+import datetime
+import io
+import random
+import sys
+import time
+
+import click
+from loguru import logger
+
+import tt.automated_text_importer_columnar
+import tt.automated_text_importer_layout
+from tt.kiwoom_text_importer import KIWOOM_LAYOUTS
+from tt.symbol_config import SymbolConfig, SymbolConfigElement
+
+
+def build_symbol_config(list_of_symbols: list[str]) -> SymbolConfig:
+    symbol_config = SymbolConfig()
+    for symbol in list_of_symbols:
+        element = SymbolConfigElement()
+        element.original_namespace = "kiwoom"
+        element.original_symbol = symbol
+        element.legit_namespace = "NYSEARCA"
+        element.legit_symbol = symbol
+        symbol_config.symbol_config_elements.append(element)
+    return symbol_config
+
+
+def build_kiwoom_csv_text(num_rows: int, list_of_symbols: list[str], seed: int) -> str:
+    rng = random.Random(seed)
+    transaction_types = ["매수", "매도", "액면분할병합입고", "이벤트입고", "배당금입금"]
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\r\n")
+    header = ["0"] * 27
+    header[0] = "거래일자"
+    writer.writerow(header)
+    open_date = datetime.date(2000, 1, 3)
+    for index in range(num_rows):
+        if index % 8 == 0:
+            open_date += datetime.timedelta(days=1)
+        row = ["0"] * 27
+        row[0] = open_date.strftime("%Y/%m/%d")
+        row[1] = rng.choice(list_of_symbols)
+        row[4] = rng.choice(transaction_types)
+        row[7] = f"{rng.randint(1, 5000):,}"
+        row[8] = f"{rng.uniform(1, 3000):,.2f}"
+        row[16] = f"{rng.uniform(0, 10):.3f}"
+        row[17] = f"{rng.uniform(0, 1):.3f}"
+        writer.writerow(row)
+    return output.getvalue()
+
+
+def as_tuples(list_of_simple_transactions) -> list[tuple]:
+    return [
+        (t.open_date, t.transaction_type, t.namespace, t.symbol, t.account, t.amount, t.open_price, t.commission)
+        for t in list_of_simple_transactions
+    ]
+
+
+@click.command()
+@click.option("--rows", type=click.IntRange(min=1), default=200000, show_default=True, help="The number of rows.")
+@click.option("--symbols", type=click.IntRange(min=1), default=50, show_default=True, help="The number of distinct symbols.")
+@click.option("--repeat", type=click.IntRange(min=1), default=3, show_default=True, help="The best of N runs is reported.")
+def benchmark(rows: int, symbols: int, repeat: int):
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+    list_of_symbols = [f"S{i:04d}" for i in range(symbols)]
+    symbol_config = build_symbol_config(list_of_symbols)
+    text = build_kiwoom_csv_text(rows, list_of_symbols, 0)
+
+    def run_row_wise():
+        return list(
+            tt.automated_text_importer_layout.iter_simple_transactions_from_stream(
+                io.StringIO(text, newline=""), KIWOOM_LAYOUTS, "kiwoom", "account0", symbol_config
+            )
+        )
+
+    def run_columnar():
+        return tt.automated_text_importer_columnar.get_list_of_simple_transactions_from_stream(
+            io.StringIO(text, newline=""), KIWOOM_LAYOUTS, "kiwoom", "account0", symbol_config
+        )
+
+    results = {}
+    for (name, run) in [("row-wise", run_row_wise), ("columnar", run_columnar)]:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results[name] = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:>9}: {best:8.3f} s {rows / best:12,.0f} rows/s ({len(results[name])} transactions)")
+
+    if as_tuples(results["row-wise"]) != as_tuples(results["columnar"]):
+        print("Results differ.")
+        sys.exit(1)
+    print("Results are the same.")
+
+
+if __name__ == "__main__":
+    benchmark()
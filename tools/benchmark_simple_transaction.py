@@ -0,0 +1,111 @@
+"""
+This tool measures the memory and the throughput of |SimpleTransaction|.
+It compares the slotted |SimpleTransaction| against a replica of the former layout - a |__dict__| per transaction,
+non-interned strings and list-based type/string conversion.
+
+Usage:
+    python tools/benchmark_simple_transaction.py --count 1000000
+"""
+
+import datetime
+import gc
+import random
+import time
+import tracemalloc
+
+import click
+
+from tt.simple_transaction import SimpleTransaction
+
+
+class DictBackedSimpleTransaction:
+    """A replica of the former |SimpleTransaction|. Only for a comparison."""
+
+    def __init__(self, symbol, transaction_type, amount, open_price, open_date, commission):
+        self.namespace = ""
+        self.account = ""
+        self.amount = amount
+        self.commission = commission
+        self.open_date = open_date
+        self.open_price = open_price
+        self.symbol = symbol
+        self.transaction_type = transaction_type
+
+    def get_transaction_type_string(self):
+        array_of_transaction_type = list(SimpleTransaction.TRANSACTION_TYPE_STRING_TABLE.keys())
+        array_of_transaction_type_string = list(SimpleTransaction.TRANSACTION_TYPE_STRING_TABLE.values())
+        assert SimpleTransaction.NUMBER_OF_TYPES - 1 == len(array_of_transaction_type)
+        assert len(array_of_transaction_type) == len(array_of_transaction_type_string)
+        try:
+            return array_of_transaction_type_string[array_of_transaction_type.index(self.transaction_type)]
+        except ValueError:
+            return "OTHER"
+
+    @staticmethod
+    def get_transaction_type_from_string(transaction_type_string):
+        for (transaction_type, value) in SimpleTransaction.TRANSACTION_TYPE_STRING_TABLE.items():
+            if transaction_type_string == value:
+                return transaction_type
+        return SimpleTransaction.SimpleTransactionTypeEnum.TYPE_OTHER
+
+
+def build_rows(count: int, num_symbols: int, seed: int) -> list[tuple]:
+    """Rows as a DB cursor returns them. Each symbol is a new string object as it is for a row read from the DB."""
+    rng = random.Random(seed)
+    list_of_type_strings = list(SimpleTransaction.TRANSACTION_TYPE_STRING_TABLE.values())
+    start = datetime.date(2000, 1, 3)
+    return [
+        (
+            float(rng.randint(1, 1000)),
+            round(rng.uniform(0, 10), 2),
+            start + datetime.timedelta(days=index // 100),
+            rng.uniform(1, 1000),
+            "".join(["S", str(rng.randrange(num_symbols))]),
+            rng.choice(list_of_type_strings),
+        )
+        for index in range(count)
+    ]
+
+
+def measure(name: str, rows: list[tuple], transaction_class) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    list_of_transactions = [
+        transaction_class(
+            symbol,
+            transaction_class.get_transaction_type_from_string(transaction_type_string),
+            amount,
+            open_price,
+            open_date,
+            commission,
+        )
+        for (amount, commission, open_date, open_price, symbol, transaction_type_string) in rows
+    ]
+    elapsed_build = time.perf_counter() - start
+    (current, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for t in list_of_transactions:
+        t.get_transaction_type_string()
+    elapsed_to_string = time.perf_counter() - start
+
+    count = len(rows)
+    print(
+        f"{name:>9}: {current / count:7.1f} bytes/transaction {current / (1024 * 1024):8.1f} MiB "
+        f"build {count / elapsed_build:12,.0f} rows/s to-string {count / elapsed_to_string:12,.0f} rows/s"
+    )
+
+
+@click.command()
+@click.option("--count", type=click.IntRange(min=1), default=1000000, show_default=True, help="The number of transactions.")
+@click.option("--symbols", type=click.IntRange(min=1), default=500, show_default=True, help="The number of distinct symbols.")
+def benchmark(count: int, symbols: int):
+    rows = build_rows(count, symbols, 0)
+    measure("former", rows, DictBackedSimpleTransaction)
+    measure("slotted", rows, SimpleTransaction)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,100 @@
+"""
+This tool compares two ways to write `simple_transactions` on a SQLite stand-in of MariaDB.
+
+    - per-row: One formatted `INSERT` per transaction on an autocommit connection. It is the former |export_all|.
+    - executemany: A parameterized `INSERT` with `executemany` in chunks, inside a single transaction, as |SimpleTransactionDBImpl| does.
+
+A file database is used. So, each commit pays for a sync as a server does.
+
+Usage:
+    python tools/benchmark_simple_transaction_export.py --rows 20000 --chunk-size 1000
+"""
+
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import click
+
+from tt.simple_transaction import SimpleTransaction
+from tt.simple_transaction_db_impl import SimpleTransactionDBImpl
+
+INSERT_SQL_STRING = (
+    "INSERT INTO simple_transactions "
+    "(amount, commission, open_date, open_price, symbol, transaction_type) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+CREATE_TABLE_SQL_STRING = (
+    "CREATE TABLE simple_transactions(\n"
+    "id integer primary key autoincrement,\n"
+    "amount float,\n"
+    "commission float,\n"
+    "open_date date,\n"
+    "open_price float,\n"
+    "symbol varchar(512) not null,\n"
+    "transaction_type varchar(512) not null\n"
+    ");\n"
+)
+
+
+def build_rows(count: int, seed: int) -> list[tuple]:
+    rng = random.Random(seed)
+    list_of_type_strings = list(SimpleTransaction.TRANSACTION_TYPE_STRING_TABLE.values())
+    start = datetime.date(2000, 1, 3)
+    return [
+        (
+            float(rng.randint(1, 1000)),
+            round(rng.uniform(0, 10), 2),
+            (start + datetime.timedelta(days=index // 100)).isoformat(),
+            rng.uniform(1, 1000),
+            f"S{rng.randrange(500)}",
+            rng.choice(list_of_type_strings),
+        )
+        for index in range(count)
+    ]
+
+
+def export_per_row(conn: sqlite3.Connection, rows: list[tuple], chunk_size: int) -> None:
+    cur = conn.cursor()
+    for (amount, commission, open_date, open_price, symbol, transaction_type) in rows:
+        cur.execute(
+            f"INSERT INTO simple_transactions \n"
+            f"(amount, commission, open_date, open_price, symbol, transaction_type) \n"
+            f"VALUES \n"
+            f"({amount}, {commission}, '{open_date}', {open_price}, '{symbol}', '{transaction_type}') \n"
+        )
+
+
+def export_with_executemany(conn: sqlite3.Connection, rows: list[tuple], chunk_size: int) -> None:
+    cur = conn.cursor()
+    cur.execute("BEGIN")
+    for start in range(0, len(rows), chunk_size):
+        cur.executemany(INSERT_SQL_STRING, rows[start:start + chunk_size])
+    cur.execute("COMMIT")
+
+
+@click.command()
+@click.option("--rows", type=click.IntRange(min=1), default=20000, show_default=True, help="The number of transactions.")
+@click.option("--chunk-size", type=click.IntRange(min=1), default=SimpleTransactionDBImpl.DEFAULT_CHUNK_SIZE_FOR_INSERT, show_default=True)
+def benchmark(rows: int, chunk_size: int):
+    list_of_rows = build_rows(rows, 0)
+    with tempfile.TemporaryDirectory() as temp_dir_path:
+        for (name, export) in [("per-row", export_per_row), ("executemany", export_with_executemany)]:
+            database_file_path = os.path.join(temp_dir_path, f"{name}.db")
+            # Autocommit. A transaction is opened explicitly, as |SimpleTransactionDBImpl.prepare_export| does.
+            conn = sqlite3.connect(database_file_path, isolation_level=None)
+            conn.execute(CREATE_TABLE_SQL_STRING)
+            start = time.perf_counter()
+            export(conn, list_of_rows, chunk_size)
+            elapsed = time.perf_counter() - start
+            (count,) = conn.execute("SELECT COUNT(*) FROM simple_transactions").fetchone()
+            conn.close()
+            assert count == rows
+            print(f"{name:>11}: {elapsed:8.3f} s {rows / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    benchmark()